@@ -0,0 +1,101 @@
+//
+//  microbench.cpp
+//  Energy_Simulator
+//
+//  Microbenchmarks of the native hot paths, printed as one JSON object
+//  (name -> seconds per operation) so runs can be stored and compared.
+//  Usage : microbench [min_seconds_per_benchmark]
+//
+#include "../include/smart_grid.h"
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <functional>
+#include <string>
+#include <vector>
+
+/**
+ * @brief Build a grid with n_assets producers and n_assets consumers spread over every type
+ * @param n_assets Number of producers (and of consumers) to add
+ * @return SmartGrid ready to be stepped
+ */
+static SmartGrid build_grid(int n_assets) {
+    std::vector<int> ids(n_assets), producer_kinds(n_assets), consumer_kinds(n_assets);
+    std::vector<double> capacities(n_assets, 5.0), base_demands(n_assets, 3.0);
+    for (int i = 0; i < n_assets; ++i) {
+        ids[i] = i;
+        producer_kinds[i] = i % PRODUCER_KINDS;
+        consumer_kinds[i] = i % CONSUMER_KINDS;
+    }
+    SmartGrid grid(1000.0, 100.0);
+    grid.add_producers(n_assets, ids.data(), producer_kinds.data(), capacities.data());
+    grid.add_consumers(n_assets, ids.data(), consumer_kinds.data(), base_demands.data());
+    return grid;
+}
+
+/**
+ * @brief Time an operation, repeating it until min_seconds have elapsed
+ * @param operation Operation to time, returns the number of units it processed
+ * @param min_seconds Minimum measurement time
+ * @return Seconds per unit
+ */
+static double time_per_unit(const std::function<long()>& operation, double min_seconds) {
+    operation();  // Warm-up
+    long units = 0;
+    auto start = std::chrono::steady_clock::now();
+    double elapsed = 0.0;
+    do {
+        units += operation();
+        elapsed = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+    } while (elapsed < min_seconds);
+    return elapsed / units;
+}
+
+int main(int argc, char** argv) {
+    double min_seconds = argc > 1 ? std::atof(argv[1]) : 0.2;
+    std::vector<std::pair<std::string, double>> results;
+
+    for (int n_assets : {10, 1000, 100000}) {
+        std::string suffix = "[" + std::to_string(n_assets) + "]";
+        SmartGrid grid = build_grid(n_assets);
+        const int n_steps = 100;
+        std::vector<double> out(RUN_COLUMNS * n_steps);
+        results.emplace_back("step" + suffix, time_per_unit([&] {
+            grid.run(n_steps, out.data());
+            return static_cast<long>(n_steps);
+        }, min_seconds));
+
+        // Même boucle, instrumentation activée
+        grid.enable_stats(true);
+        results.emplace_back("step_profiled" + suffix, time_per_unit([&] {
+            grid.run(n_steps, out.data());
+            return static_cast<long>(n_steps);
+        }, min_seconds));
+        grid.enable_stats(false);
+
+        GridState state;
+        results.emplace_back("fill_state" + suffix, time_per_unit([&] {
+            grid.fill_state(state);
+            return 1L;
+        }, min_seconds));
+
+        results.emplace_back("get_state_json" + suffix, time_per_unit([&] {
+            return static_cast<long>(grid.get_state().dump().size() > 0);
+        }, min_seconds));
+
+        // Connexion / déconnexion d'un actif (bornes de recharge)
+        int next_id = n_assets;
+        results.emplace_back("add_remove_producer" + suffix, time_per_unit([&] {
+            grid.add_producer(EnergyProducer(next_id, "solar", 5.0));
+            grid.remove_producer(next_id++);
+            return 1L;
+        }, min_seconds));
+    }
+
+    std::printf("{\n");
+    for (size_t i = 0; i < results.size(); ++i) {
+        std::printf("  \"%s\": %.6e%s\n", results[i].first.c_str(), results[i].second, i + 1 < results.size() ? "," : "");
+    }
+    std::printf("}\n");
+    return 0;
+}
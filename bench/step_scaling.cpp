@@ -0,0 +1,51 @@
+//
+//  step_scaling.cpp
+//  Energy_Simulator
+//
+//  Benchmark : SmartGrid step time vs. number of assets, compared with the
+//  recorded time of the former per-asset objects (std::string type compared
+//  at every step), measured with 200 steps on the reference machine.
+//  Usage : step_scaling [n_steps]
+//
+#include "../include/smart_grid.h"
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+
+/**
+ * @brief Build a grid with n_assets producers and n_assets consumers spread over every type
+ * @param n_assets Number of producers (and of consumers) to add
+ * @return SmartGrid ready to be stepped
+ */
+static SmartGrid build_grid(int n_assets) {
+    static const char* producer_types[] = {"solar", "wind", "grid"};
+    static const char* consumer_types[] = {"household", "industry"};
+    SmartGrid grid(1000.0, 100.0);
+    for (int i = 0; i < n_assets; ++i) {
+        grid.add_producer(EnergyProducer(i, producer_types[i % 3], 5.0));
+        grid.add_consumer(EnergyConsumer(i, consumer_types[i % 2], 3.0));
+    }
+    return grid;
+}
+
+int main(int argc, char** argv) {
+    int n_steps = argc > 1 ? std::atoi(argv[1]) : 200;
+    const int asset_counts[] = {10, 100, 1000, 10000, 100000};
+    // Temps de référence des objets par actif (us/step), pour chaque nombre d'actifs
+    const double baseline_us[] = {0.99, 9.80, 92.32, 876.43, 8417.18};
+    std::vector<double> out(RUN_COLUMNS * n_steps);
+
+    std::printf("%10s %16s %16s %16s %10s\n", "assets", "us/step", "ns/asset/step", "baseline us/step", "speedup");
+    for (size_t i = 0; i < sizeof(asset_counts) / sizeof(asset_counts[0]); ++i) {
+        const int n_assets = asset_counts[i];
+        SmartGrid grid = build_grid(n_assets);
+        grid.run(1, out.data());  // Warm-up
+        auto start = std::chrono::steady_clock::now();
+        grid.run(n_steps, out.data());
+        auto stop = std::chrono::steady_clock::now();
+        double ns = std::chrono::duration<double, std::nano>(stop - start).count() / n_steps;
+        std::printf("%10d %16.2f %16.2f %16.2f %9.1fx\n", n_assets, ns / 1000.0, ns / (2.0 * n_assets),
+                    baseline_us[i], baseline_us[i] * 1000.0 / ns);
+    }
+    return 0;
+}
@@ -0,0 +1,258 @@
+#pragma once
+#include <vector>
+#include <algorithm>
+#include <numeric>
+#include <cmath>
+
+/**
+ * @enum FleetPolicy
+ * @brief How a BatteryFleet shares a surplus or a deficit between its batteries
+ */
+enum FleetPolicy {
+    FLEET_PROPORTIONAL = 0,  // In proportion to what each battery can take or give this step
+    FLEET_PRIORITY,          // Lowest priority value first, the next one only when it is at its limit
+    FLEET_SOC_BALANCING,     // Emptiest batteries charged first, fullest discharged first, towards a common state of charge
+    FLEET_POLICIES
+};
+
+static const char* const FLEET_POLICY_NAMES[FLEET_POLICIES] = {"proportional", "priority", "soc_balancing"};
+
+/**
+ * @struct BatteryFleet
+ * @brief Contiguous storage and dispatch of many distributed batteries
+ * Each battery has its own capacity, charge and discharge rates and round-trip efficiency,
+ * applied half on charge and half on discharge (sqrt of the round-trip efficiency each way).
+ * A surplus or a deficit is shared between every battery in a few passes over the arrays.
+ */
+struct BatteryFleet {
+    std::vector<int> ids;
+    std::vector<double> capacity;       // Capacity (kWh)
+    std::vector<double> stored;         // Stored energy (kWh)
+    std::vector<double> max_charge;     // Maximum charging power (kW)
+    std::vector<double> max_discharge;  // Maximum discharge power (kW)
+    std::vector<double> efficiency;     // One-way efficiency, sqrt of the round-trip efficiency
+    std::vector<int> priority;          // Dispatch order of FLEET_PRIORITY, lowest first
+    double capacity_total = 0.0;        // Sum of the capacities, kept up to date on add/remove (kWh)
+    double stored_total = 0.0;          // Sum of the stored energies, kept up to date on every change (kWh)
+    int policy = FLEET_PROPORTIONAL;
+
+    size_t size() const { return ids.size(); }
+
+    void reserve(size_t n) {
+        ids.reserve(n);
+        capacity.reserve(n);
+        stored.reserve(n);
+        max_charge.reserve(n);
+        max_discharge.reserve(n);
+        efficiency.reserve(n);
+        priority.reserve(n);
+    }
+
+    /**
+     * @brief Append a battery, half charged like the main battery
+     * @param id Unique identifier for the battery
+     * @param battery_capacity Capacity in kWh
+     * @param charge_rate Maximum charging power in kW
+     * @param discharge_rate Maximum discharge power in kW
+     * @param round_trip_efficiency Fraction of the energy charged that can be discharged (0-1]
+     * @param battery_priority Dispatch order of FLEET_PRIORITY, lowest first
+     */
+    void add(int id, double battery_capacity, double charge_rate, double discharge_rate,
+             double round_trip_efficiency, int battery_priority) {
+        ids.push_back(id);
+        capacity.push_back(battery_capacity);
+        stored.push_back(battery_capacity / 2);
+        max_charge.push_back(charge_rate);
+        max_discharge.push_back(discharge_rate);
+        efficiency.push_back(std::sqrt(round_trip_efficiency));
+        priority.push_back(battery_priority);
+        capacity_total += battery_capacity;
+        stored_total += battery_capacity / 2;
+        order_dirty = true;
+    }
+
+    /**
+     * @brief Remove the battery at the given position in O(1)
+     * The last battery is moved into the freed position, so the order is not preserved.
+     * @param index Position of the battery to remove
+     */
+    void remove_at(size_t index) {
+        // Repartir de zéro quand la dernière batterie part, sans erreur d'arrondi accumulée
+        capacity_total = ids.size() > 1 ? capacity_total - capacity[index] : 0.0;
+        stored_total = ids.size() > 1 ? stored_total - stored[index] : 0.0;
+        ids[index] = ids.back();
+        capacity[index] = capacity.back();
+        stored[index] = stored.back();
+        max_charge[index] = max_charge.back();
+        max_discharge[index] = max_discharge.back();
+        efficiency[index] = efficiency.back();
+        priority[index] = priority.back();
+        ids.pop_back();
+        capacity.pop_back();
+        stored.pop_back();
+        max_charge.pop_back();
+        max_discharge.pop_back();
+        efficiency.pop_back();
+        priority.pop_back();
+        order_dirty = true;
+    }
+
+    void clear() {
+        ids.clear();
+        capacity.clear();
+        stored.clear();
+        max_charge.clear();
+        max_discharge.clear();
+        efficiency.clear();
+        priority.clear();
+        capacity_total = 0.0;
+        stored_total = 0.0;
+        order_dirty = true;
+    }
+
+    /**
+     * @brief Put every battery back at half charge
+     */
+    void reset() {
+        for (size_t i = 0; i < stored.size(); ++i) stored[i] = capacity[i] / 2;
+        stored_total = capacity_total / 2;
+    }
+
+    /**
+     * @brief Store part of a surplus
+     * @param energy Surplus offered to the fleet (kWh)
+     * @param step_hours Duration of the step in hours
+     * @return Energy taken from the surplus (kWh), before charging losses
+     */
+    double charge(double energy, double step_hours) {
+        const size_t n = size();
+        if (energy <= 0.0 || n == 0) return 0.0;
+        limit.resize(n);
+        double total = 0.0;
+        for (size_t i = 0; i < n; ++i) {
+            limit[i] = std::max(0.0, std::min(max_charge[i] * step_hours, (capacity[i] - stored[i]) / efficiency[i]));
+            total += limit[i];
+        }
+        double taken = allocate(std::min(energy, total), total, true);
+        double sum = 0.0;
+        for (size_t i = 0; i < n; ++i) {
+            stored[i] = std::min(capacity[i], stored[i] + amount[i] * efficiency[i]);
+            sum += stored[i];
+        }
+        stored_total = sum;
+        return taken;
+    }
+
+    /**
+     * @brief Cover part of a deficit
+     * @param energy_needed Deficit to cover (kWh)
+     * @param step_hours Duration of the step in hours
+     * @return Energy delivered (kWh), after discharge losses
+     */
+    double discharge(double energy_needed, double step_hours) {
+        const size_t n = size();
+        if (energy_needed <= 0.0 || n == 0) return 0.0;
+        limit.resize(n);
+        double total = 0.0;
+        for (size_t i = 0; i < n; ++i) {
+            limit[i] = std::max(0.0, std::min(max_discharge[i] * step_hours, stored[i] * efficiency[i]));
+            total += limit[i];
+        }
+        double delivered = allocate(std::min(energy_needed, total), total, false);
+        double sum = 0.0;
+        for (size_t i = 0; i < n; ++i) {
+            stored[i] = std::max(0.0, stored[i] - amount[i] / efficiency[i]);
+            sum += stored[i];
+        }
+        stored_total = sum;
+        return delivered;
+    }
+
+private:
+    std::vector<double> limit;    // Most each battery can take or give this step (kWh)
+    std::vector<double> amount;   // Share of each battery (kWh)
+    std::vector<double> high;     // Shares at the upper bound of the SoC search
+    std::vector<size_t> order;    // Battery positions sorted by priority
+    bool order_dirty = true;
+
+    /**
+     * @brief Share an energy between the batteries according to the policy
+     * @param request Energy to share, at most the sum of the limits (kWh)
+     * @param total Sum of the limits (kWh)
+     * @param charging true to charge, false to discharge
+     * @return request
+     */
+    double allocate(double request, double total, bool charging) {
+        const size_t n = size();
+        amount.resize(n);
+        if (request >= total) {
+            // Toute la flotte à sa limite : pas de choix à faire
+            std::copy(limit.begin(), limit.end(), amount.begin());
+            return total;
+        }
+        if (policy == FLEET_PRIORITY) {
+            sort_by_priority();
+            std::fill(amount.begin(), amount.end(), 0.0);
+            double remaining = request;
+            for (size_t k = 0; k < n && remaining > 0.0; ++k) {
+                size_t i = order[k];
+                amount[i] = std::min(limit[i], remaining);
+                remaining -= amount[i];
+            }
+        } else if (policy == FLEET_SOC_BALANCING) {
+            balance_soc(request, charging);
+        } else {
+            double share = request / total;
+            for (size_t i = 0; i < n; ++i) amount[i] = limit[i] * share;
+        }
+        return request;
+    }
+
+    /**
+     * @brief Share of each battery when every battery is moved towards the state of charge level
+     * Charging fills batteries below level, discharging empties batteries above it, within their limits.
+     * @param level Target state of charge (0-1)
+     * @param charging true to charge, false to discharge
+     * @param out Receives the share of each battery (kWh)
+     * @return Sum of the shares (kWh)
+     */
+    double shares_at(double level, bool charging, double* out) const {
+        double sum = 0.0;
+        for (size_t i = 0; i < size(); ++i) {
+            double gap = charging ? (level * capacity[i] - stored[i]) / efficiency[i]
+                                  : (stored[i] - level * capacity[i]) * efficiency[i];
+            out[i] = std::min(limit[i], std::max(0.0, gap));
+            sum += out[i];
+        }
+        return sum;
+    }
+
+    /**
+     * @brief Water-filling towards a common state of charge
+     * The level is found by bisection; the energy left between the two bounds is shared in
+     * proportion to what each battery would take between them, so exactly request is dispatched.
+     */
+    void balance_soc(double request, bool charging) {
+        const size_t n = size();
+        high.resize(n);
+        // Niveau t croissant avec l'énergie répartie : SoC cible t à la charge, 1 - t à la décharge
+        double low_t = 0.0, high_t = 1.0;
+        for (int iteration = 0; iteration < 40; ++iteration) {
+            double mid = 0.5 * (low_t + high_t);
+            if (shares_at(charging ? mid : 1.0 - mid, charging, amount.data()) < request) low_t = mid;
+            else high_t = mid;
+        }
+        double low_sum = shares_at(charging ? low_t : 1.0 - low_t, charging, amount.data());
+        double high_sum = shares_at(charging ? high_t : 1.0 - high_t, charging, high.data());
+        double fraction = high_sum > low_sum ? (request - low_sum) / (high_sum - low_sum) : 0.0;
+        for (size_t i = 0; i < n; ++i) amount[i] += fraction * (high[i] - amount[i]);
+    }
+
+    void sort_by_priority() {
+        if (!order_dirty && order.size() == size()) return;
+        order.resize(size());
+        std::iota(order.begin(), order.end(), size_t(0));
+        std::stable_sort(order.begin(), order.end(), [this](size_t a, size_t b) { return priority[a] < priority[b]; });
+        order_dirty = false;
+    }
+};
@@ -0,0 +1,136 @@
+#pragma once
+#include <vector>
+#include <algorithm>
+#include <cmath>
+#include <limits>
+
+/**
+ * @enum DispatchMode
+ * @brief How the main battery is charged and discharged at each step
+ */
+enum DispatchMode {
+    DISPATCH_GREEDY = 0,  // Charge on surplus, discharge on deficit, buy the rest
+    DISPATCH_LOOKAHEAD,   // Schedule optimised over a forecast horizon, re-solved at each step
+    DISPATCH_MODES
+};
+
+static const char* const DISPATCH_MODE_NAMES[DISPATCH_MODES] = {"greedy", "lookahead"};
+
+/**
+ * @struct DispatchOptimizer
+ * @brief Receding-horizon dispatch of a battery by dynamic programming over discretised states of charge
+ * Given the net energy (production - demand) and the purchase price of the next `horizon` steps,
+ * finds the charge/discharge schedule minimising the cost of the energy bought, and returns its
+ * first move. With every price at 1 the cost is the purchased energy.
+ *
+ * The state of charge is discretised in `levels` levels from empty to full. The cost of a move only
+ * depends on the step and on the number of levels moved, not on the starting level, so each stage
+ * of the backward recursion is a min-plus convolution of the cost-to-go: one pass over the
+ * contiguous level array per possible move.
+ */
+struct DispatchOptimizer {
+    int mode = DISPATCH_GREEDY;
+    int horizon = 48;           // Steps looked ahead, the current one included
+    int levels = 101;           // Discretised states of charge, empty and full included
+    bool grid_charging = false; // Allow buying energy to charge the battery (useful with a tariff)
+    std::vector<double> tariff; // Price per hour of the day (24 values), empty for a flat price of 1
+
+    std::vector<double> net;    // Forecast net energy of each step of the horizon (kWh), filled by the caller
+    std::vector<double> price;  // Purchase price of each step of the horizon, filled by the caller
+
+    /**
+     * @brief Price of the energy bought at a given hour of the day
+     * @param hour Time of day in hours (0-24)
+     */
+    double price_at(double hour) const {
+        if (tariff.empty()) return 1.0;
+        return tariff[std::min(static_cast<size_t>(hour), tariff.size() - 1)];
+    }
+
+    /**
+     * @brief Energy to put into the battery during the first step of the horizon
+     * net and price must hold horizon values; net[0] is the actual balance of the current step.
+     * @param stored Energy stored now (kWh)
+     * @param capacity Capacity of the battery (kWh)
+     * @param max_charge Most energy that can be charged in one step (kWh)
+     * @param max_discharge Most energy that can be discharged in one step (kWh)
+     * @return Energy to charge (kWh), negative to discharge
+     */
+    double plan(double stored, double capacity, double max_charge, double max_discharge) {
+        const double greedy = std::max(-max_discharge, std::min(net[0], max_charge));
+        if (capacity <= 0.0 || levels < 2 || horizon < 2) return greedy;
+        const int n = levels;
+        const double delta = capacity / (n - 1);
+        const int up = static_cast<int>(max_charge / delta + 1e-9);
+        const int down = static_cast<int>(max_discharge / delta + 1e-9);
+        if (up == 0 && down == 0) return greedy;  // Pas de déplacement possible d'un niveau entier
+
+        // Coût restant après le dernier pas : nul
+        value.assign(n, 0.0);
+        next.resize(n);
+        for (int t = horizon - 1; t >= 1; --t) {
+            const double surplus = std::max(0.0, net[t]);
+            const int highest = grid_charging ? up : std::min(up, static_cast<int>(surplus / delta + 1e-9));
+            std::fill(next.begin(), next.end(), std::numeric_limits<double>::infinity());
+            // Rester sur place d'abord, puis les déplacements de plus en plus grands : à coût égal, le plus petit l'emporte
+            for (int step = 0; step <= std::max(highest, down); ++step) {
+                if (step <= highest) relax(next.data(), step, move_cost(step * delta, t));
+                if (step > 0 && step <= down) relax(next.data(), -step, move_cost(-step * delta, t));
+            }
+            value.swap(next);
+        }
+
+        // Premier pas depuis l'état réel, hors grille : mouvement glouton d'abord, puis vers chaque niveau atteignable
+        const double room_up = grid_charging ? max_charge : std::min(max_charge, std::max(0.0, net[0]));
+        const double lowest = std::max(0.0, stored - max_discharge);
+        const double highest = std::min(capacity, stored + room_up);
+        double best_move = std::max(lowest - stored, std::min(greedy, highest - stored));
+        double best_cost = move_cost(best_move, 0) + cost_to_go(stored + best_move, delta);
+        const double tolerance = 1e-9 * (1.0 + std::abs(best_cost));
+        for (int level = static_cast<int>(std::ceil(lowest / delta - 1e-9)); level <= n - 1 && level * delta <= highest + 1e-9; ++level) {
+            const double target = std::min(level * delta, capacity);
+            const double move = target - stored;
+            const double cost = move_cost(move, 0) + cost_to_go(target, delta);
+            if (cost < best_cost - tolerance) {
+                best_cost = cost;
+                best_move = move;
+            }
+        }
+        return best_move;
+    }
+
+private:
+    std::vector<double> value;  // Cost-to-go of each level at the stage after the current one
+    std::vector<double> next;   // Cost-to-go being built
+
+    /**
+     * @brief Cost of the energy bought when the battery takes move kWh during step t
+     */
+    double move_cost(double move, int t) const {
+        return price[t] * std::max(0.0, move - net[t]);
+    }
+
+    /**
+     * @brief next[i] = min(next[i], cost + value[i + shift]) for every level i with i + shift in range
+     */
+    void relax(double* out, int shift, double cost) const {
+        const int n = static_cast<int>(value.size());
+        const int first = std::max(0, -shift);
+        const int last = std::min(n, n - shift);
+        const double* in = value.data() + shift;
+        for (int i = first; i < last; ++i) {
+            const double candidate = cost + in[i];
+            out[i] = candidate < out[i] ? candidate : out[i];
+        }
+    }
+
+    /**
+     * @brief Cost-to-go linearly interpolated between the two levels around an energy
+     */
+    double cost_to_go(double energy, double delta) const {
+        const double position = std::max(0.0, std::min(energy / delta, static_cast<double>(value.size() - 1)));
+        const size_t below = std::min(static_cast<size_t>(position), value.size() - 2);
+        const double fraction = position - below;
+        return value[below] + fraction * (value[below + 1] - value[below]);
+    }
+};
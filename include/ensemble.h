@@ -0,0 +1,89 @@
+#pragma once
+#include <vector>
+#include <algorithm>
+#include <cstdint>
+#include <limits>
+#include "smart_grid.h"
+#include "thread_pool.h"
+
+/**
+ * @enum EnsembleColumn
+ * @brief Columns filled by run_ensemble, in output order
+ * Each column is a contiguous block of n_steps doubles in the output buffer.
+ */
+enum EnsembleColumn {
+    ENS_STORED_P5 = 0,     // 5th percentile of the stored energy (kWh)
+    ENS_STORED_P50,        // Median of the stored energy (kWh)
+    ENS_STORED_P95,        // 95th percentile of the stored energy (kWh)
+    ENS_PURCHASE_P5,       // 5th percentile of the purchased energy (kWh)
+    ENS_PURCHASE_P50,      // Median of the purchased energy (kWh)
+    ENS_PURCHASE_P95,      // 95th percentile of the purchased energy (kWh)
+    ENSEMBLE_COLUMNS
+};
+
+/**
+ * @brief Percentile of a sample, linearly interpolated between the closest ranks
+ * The sample is partially reordered.
+ * @param values Sample of n values
+ * @param n Size of the sample
+ * @param q Quantile between 0 and 1
+ * @return Value of the quantile, NaN for an empty sample
+ */
+inline double percentile(double* values, size_t n, double q) {
+    if (n == 0) return std::numeric_limits<double>::quiet_NaN();
+    double position = q * (n - 1);
+    size_t lower = static_cast<size_t>(position);
+    std::nth_element(values, values + lower, values + n);
+    double low = values[lower];
+    if (lower + 1 >= n) return low;
+    double high = *std::min_element(values + lower + 1, values + n);
+    return low + (position - lower) * (high - low);
+}
+
+/**
+ * @brief Monte Carlo ensemble of a smart grid
+ * Clones the grid into n_members copies with independent random sequences, steps them on a
+ * thread pool and reduces every step to P5/P50/P95 bands of stored and purchased energy.
+ * Steps are processed in blocks so memory stays bounded whatever the horizon.
+ * @param base Configured grid to clone, left untouched
+ * @param n_members Number of ensemble members
+ * @param n_steps Number of time steps to simulate
+ * @param seed Seed from which every member seed is derived
+ * @param n_threads Number of threads (0 uses every hardware thread)
+ * @param out Buffer of ENSEMBLE_COLUMNS * n_steps doubles, filled column by column (see EnsembleColumn),
+ *            left untouched if n_members or n_steps is not positive
+ */
+inline void run_ensemble(const SmartGrid& base, int n_members, int n_steps, uint64_t seed, unsigned n_threads, double* out) {
+    if (n_members <= 0 || n_steps <= 0) return;
+    static const double quantiles[3] = {0.05, 0.50, 0.95};
+    const size_t members = static_cast<size_t>(n_members);
+    const int block_steps = 256;
+
+    std::vector<SmartGrid> grids(members, base);
+    for (size_t m = 0; m < members; ++m) {
+        grids[m].reseed(CounterRng::derive(seed, m));
+    }
+
+    // Trajectoires d'un bloc de pas : une ligne par pas, une colonne par membre
+    std::vector<double> stored(block_steps * members);
+    std::vector<double> purchase(block_steps * members);
+    ThreadPool pool(n_threads);
+
+    for (int block_start = 0; block_start < n_steps; block_start += block_steps) {
+        const int steps = std::min(block_steps, n_steps - block_start);
+        pool.parallel_for(members, [&](size_t begin, size_t end) {
+            for (size_t m = begin; m < end; ++m) {
+                grids[m].run_trajectory(steps, &stored[m], &purchase[m], members);
+            }
+        });
+        pool.parallel_for(steps, [&](size_t begin, size_t end) {
+            for (size_t i = begin; i < end; ++i) {
+                const size_t t = block_start + i;
+                for (int q = 0; q < 3; ++q) {
+                    out[(ENS_STORED_P5 + q) * n_steps + t] = percentile(&stored[i * members], members, quantiles[q]);
+                    out[(ENS_PURCHASE_P5 + q) * n_steps + t] = percentile(&purchase[i * members], members, quantiles[q]);
+                }
+            }
+        });
+    }
+}
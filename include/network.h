@@ -0,0 +1,335 @@
+#pragma once
+#include <vector>
+#include <algorithm>
+#include <limits>
+#include <memory>
+#include "smart_grid.h"
+#include "thread_pool.h"
+
+/**
+ * @enum NetworkColumn
+ * @brief Columns filled by GridNetwork::run, in output order
+ * Each column is a contiguous block of n_steps doubles in the output buffer.
+ */
+enum NetworkColumn {
+    NET_TIME = 0,          // Time of day (h)
+    NET_STORED_ENERGY,     // Energy stored in every battery, fleets included (kWh)
+    NET_PRODUCTION,        // Total production of every grid (kW)
+    NET_DEMAND,            // Total demand of every grid (kW)
+    NET_EXCHANGED,         // Energy delivered from one grid to another over the tie-lines (kWh)
+    NET_PURCHASE_ENERGY,   // Energy still purchased from the main grid after the exchange (kWh)
+    NET_SURPLUS_ENERGY,    // Surplus neither stored nor exported (kWh)
+    NETWORK_COLUMNS
+};
+
+/**
+ * @class MaxFlow
+ * @brief Maximum flow (Dinic) over a graph whose structure is fixed and capacities change
+ * Edges are stored in pairs: edge e and its reverse e ^ 1. The flow of a pair is kept on the
+ * forward edge and is negative when it goes backward, so an undirected tie-line is a pair with
+ * the same capacity in both directions.
+ */
+class MaxFlow {
+public:
+    /**
+     * @brief Constructor for MaxFlow
+     * @param n_nodes Number of nodes
+     */
+    explicit MaxFlow(int n_nodes = 0) : adjacency(n_nodes), level(n_nodes), next_edge(n_nodes) {}
+
+    /**
+     * @brief Add an edge pair
+     * @param from Start node
+     * @param to End node
+     * @param capacity Capacity from -> to
+     * @param reverse_capacity Capacity to -> from (0 for a one-way edge)
+     * @return Index of the forward edge
+     */
+    int add_edge(int from, int to, double capacity, double reverse_capacity = 0.0) {
+        int edge = static_cast<int>(heads.size());
+        heads.push_back(to);
+        heads.push_back(from);
+        capacities.push_back(capacity);
+        capacities.push_back(reverse_capacity);
+        flows.push_back(0.0);
+        flows.push_back(0.0);
+        adjacency[from].push_back(edge);
+        adjacency[to].push_back(edge + 1);
+        return edge;
+    }
+
+    /**
+     * @brief Change the capacities of an edge pair
+     * @param edge Index of the forward edge
+     * @param capacity Capacity from -> to
+     * @param reverse_capacity Capacity to -> from
+     */
+    void set_capacity(int edge, double capacity, double reverse_capacity = 0.0) {
+        capacities[edge] = capacity;
+        capacities[edge + 1] = reverse_capacity;
+    }
+
+    /**
+     * @brief Net flow of an edge pair, positive from -> to
+     * @param edge Index of the forward edge
+     */
+    double flow(int edge) const { return flows[edge]; }
+
+    /**
+     * @brief Compute a maximum flow, starting from zero
+     * @param source Source node
+     * @param sink Sink node
+     * @return Value of the flow
+     */
+    double solve(int source, int sink) {
+        std::fill(flows.begin(), flows.end(), 0.0);
+        double total = 0.0;
+        while (build_levels(source, sink)) {
+            std::fill(next_edge.begin(), next_edge.end(), 0);
+            double pushed;
+            while ((pushed = augment(source, sink, std::numeric_limits<double>::infinity())) > EPSILON) {
+                total += pushed;
+            }
+        }
+        return total;
+    }
+
+private:
+    static constexpr double EPSILON = 1e-12;  // Capacités résiduelles négligeables (kWh)
+
+    std::vector<int> heads;           // Node reached by each edge
+    std::vector<double> capacities;   // Capacity of each edge
+    std::vector<double> flows;        // Flow of each edge, flows[e ^ 1] == -flows[e]
+    std::vector<std::vector<int>> adjacency;  // Edges leaving each node
+    std::vector<int> level;
+    std::vector<size_t> next_edge;    // First edge of each node not yet saturated in this phase
+    std::vector<int> queue;
+
+    double residual(int edge) const { return capacities[edge] - flows[edge]; }
+
+    /**
+     * @brief Breadth-first distances from the source over edges with residual capacity
+     * @return true if the sink is reachable
+     */
+    bool build_levels(int source, int sink) {
+        std::fill(level.begin(), level.end(), -1);
+        queue.clear();
+        queue.push_back(source);
+        level[source] = 0;
+        for (size_t head = 0; head < queue.size(); ++head) {
+            int node = queue[head];
+            for (int edge : adjacency[node]) {
+                int to = heads[edge];
+                if (level[to] < 0 && residual(edge) > EPSILON) {
+                    level[to] = level[node] + 1;
+                    queue.push_back(to);
+                }
+            }
+        }
+        return level[sink] >= 0;
+    }
+
+    /**
+     * @brief Push flow along one shortest augmenting path
+     * @return Flow pushed (0 if the node is a dead end in this phase)
+     */
+    double augment(int node, int sink, double limit) {
+        if (node == sink) return limit;
+        for (size_t& i = next_edge[node]; i < adjacency[node].size(); ++i) {
+            int edge = adjacency[node][i];
+            int to = heads[edge];
+            if (level[to] != level[node] + 1 || residual(edge) <= EPSILON) continue;
+            double pushed = augment(to, sink, std::min(limit, residual(edge)));
+            if (pushed > EPSILON) {
+                flows[edge] += pushed;
+                flows[edge ^ 1] -= pushed;
+                return pushed;
+            }
+        }
+        return 0.0;
+    }
+};
+
+/**
+ * @struct TieLine
+ * @brief Link between two grids of a GridNetwork
+ */
+struct TieLine {
+    int from;         // Index of the first grid
+    int to;           // Index of the second grid
+    double capacity;  // Maximum power in either direction (kW)
+};
+
+/**
+ * @class GridNetwork
+ * @brief Microgrids exchanging energy over capacity-limited tie-lines
+ * Every step, each grid first balances itself (production, demand, battery) in parallel on a
+ * thread pool. Surpluses the batteries could not store then cover the deficits of other grids,
+ * possibly through intermediate grids, as a maximum flow limited by the tie-line capacities:
+ * the energy purchased from the main grid is minimised. What is not covered is still purchased
+ * by each grid, what is not exported is lost.
+ */
+class GridNetwork {
+public:
+    /**
+     * @brief Constructor for GridNetwork
+     * @param n_threads Number of threads stepping the grids (0 uses every hardware thread)
+     */
+    explicit GridNetwork(unsigned n_threads = 0) : pool(std::make_unique<ThreadPool>(n_threads)) {}
+
+    size_t size() const { return grids.size(); }
+
+    size_t n_links() const { return links.size(); }
+
+    /**
+     * @brief Add a copy of a grid to the network
+     * @param grid Configured grid, copied in its current state
+     * @return Index of the grid, or GRID_TIME_STEP_MISMATCH if its time step differs from the other grids
+     */
+    int add_grid(const SmartGrid& grid) {
+        if (!grids.empty() && grid.time_step() != grids.front().time_step()) return GRID_TIME_STEP_MISMATCH;
+        grids.push_back(grid.fork());
+        return static_cast<int>(grids.size()) - 1;
+    }
+
+    /**
+     * @brief Grid of the network
+     * @param index Index returned by add_grid
+     * @return Grid in its current state, or nullptr if the index is unknown
+     */
+    SmartGrid* grid(int index) {
+        return index >= 0 && static_cast<size_t>(index) < grids.size() ? &grids[index] : nullptr;
+    }
+
+    /**
+     * @brief Connect two grids
+     * @param from Index of the first grid
+     * @param to Index of the second grid
+     * @param capacity Maximum power in either direction (kW)
+     * @return Index of the link, or GRID_UNKNOWN_ID if a grid index is unknown
+     */
+    int add_link(int from, int to, double capacity) {
+        if (!grid(from) || !grid(to) || from == to) return GRID_UNKNOWN_ID;
+        links.push_back(TieLine{from, to, std::max(0.0, capacity)});
+        return static_cast<int>(links.size()) - 1;
+    }
+
+    /**
+     * @brief Simulate n_steps time steps of every grid and of the exchanges between them
+     * @param n_steps Number of time steps to simulate
+     * @param out Buffer of NETWORK_COLUMNS * n_steps doubles, filled column by column (see NetworkColumn)
+     * @param grid_purchase Optional buffer of size() * n_steps doubles receiving the purchase of grid g after step i at g * n_steps + i (kWh)
+     * @param link_flow Optional buffer of n_links() * n_steps doubles receiving the energy sent over link l at l * n_steps + i, positive from -> to (kWh)
+     */
+    void run(int n_steps, double* out, double* grid_purchase = nullptr, double* link_flow = nullptr) {
+        const size_t n_grids = grids.size();
+        build_flow_graph();
+        std::vector<GridState> states(n_grids);
+        std::vector<double> surplus(n_grids);
+
+        for (int i = 0; i < n_steps; ++i) {
+            // Équilibre local de chaque microréseau, en parallèle
+            pool->parallel_for(n_grids, [&](size_t begin, size_t end) {
+                for (size_t g = begin; g < end; ++g) {
+                    grids[g].advance();
+                    grids[g].fill_state(states[g]);
+                    surplus[g] = grids[g].surplus();
+                }
+            });
+
+            // Échanges : les excédents couvrent les déficits, dans la limite des lignes
+            double total_surplus = 0.0, total_deficit = 0.0;
+            for (size_t g = 0; g < n_grids; ++g) {
+                total_surplus += surplus[g];
+                total_deficit += states[g].purchase_energy;
+            }
+            double exchanged = 0.0;
+            if (total_surplus > 0.0 && total_deficit > 0.0 && !links.empty()) {
+                exchanged = exchange(states, surplus);
+            }
+            if (link_flow) {
+                for (size_t l = 0; l < links.size(); ++l) {
+                    link_flow[l * n_steps + i] = exchanged > 0.0 ? flow_graph.flow(link_edges[l]) : 0.0;
+                }
+            }
+
+            double stored = 0.0, production = 0.0, demand = 0.0, purchase = 0.0, lost = 0.0;
+            for (size_t g = 0; g < n_grids; ++g) {
+                const GridState& state = states[g];
+                stored += state.stored_energy + state.fleet_stored_energy;
+                production += state.solar + state.wind + state.grid;
+                demand += state.household + state.industry;
+                purchase += state.purchase_energy;
+                lost += surplus[g];
+                if (grid_purchase) grid_purchase[g * n_steps + i] = state.purchase_energy;
+            }
+            out[NET_TIME * n_steps + i] = n_grids > 0 ? states[0].time : 0.0;
+            out[NET_STORED_ENERGY * n_steps + i] = stored;
+            out[NET_PRODUCTION * n_steps + i] = production;
+            out[NET_DEMAND * n_steps + i] = demand;
+            out[NET_EXCHANGED * n_steps + i] = exchanged;
+            out[NET_PURCHASE_ENERGY * n_steps + i] = purchase;
+            out[NET_SURPLUS_ENERGY * n_steps + i] = lost;
+        }
+    }
+
+private:
+    std::vector<SmartGrid> grids;
+    std::vector<TieLine> links;
+    std::unique_ptr<ThreadPool> pool;
+    // Graphe des échanges : un nœud par grille, plus une source (excédents) et un puits (déficits)
+    MaxFlow flow_graph;
+    std::vector<int> supply_edges;  // Source -> grid g
+    std::vector<int> demand_edges;  // Grid g -> sink
+    std::vector<int> link_edges;    // Tie-line l, both directions
+
+    /**
+     * @brief Build the exchange graph for the current grids and links
+     * Capacities are set at every step, the structure only changes with the topology.
+     */
+    void build_flow_graph() {
+        const int n_grids = static_cast<int>(grids.size());
+        const int source = n_grids, sink = n_grids + 1;
+        flow_graph = MaxFlow(n_grids + 2);
+        supply_edges.resize(n_grids);
+        demand_edges.resize(n_grids);
+        for (int g = 0; g < n_grids; ++g) {
+            supply_edges[g] = flow_graph.add_edge(source, g, 0.0);
+            demand_edges[g] = flow_graph.add_edge(g, sink, 0.0);
+        }
+        link_edges.resize(links.size());
+        for (size_t l = 0; l < links.size(); ++l) {
+            link_edges[l] = flow_graph.add_edge(links[l].from, links[l].to, 0.0, 0.0);
+        }
+    }
+
+    /**
+     * @brief Route surpluses to deficits for the current step and settle every grid
+     * @param states State of each grid after its local step, purchase updated in place
+     * @param surplus Surplus of each grid, updated in place to what could not be exported
+     * @return Energy delivered to grids in deficit (kWh)
+     */
+    double exchange(std::vector<GridState>& states, std::vector<double>& surplus) {
+        const int n_grids = static_cast<int>(grids.size());
+        const double step_hours = grids.front().time_step() / 3600.0;
+        for (int g = 0; g < n_grids; ++g) {
+            flow_graph.set_capacity(supply_edges[g], surplus[g]);
+            flow_graph.set_capacity(demand_edges[g], states[g].purchase_energy);
+        }
+        for (size_t l = 0; l < links.size(); ++l) {
+            double energy = links[l].capacity * step_hours;
+            flow_graph.set_capacity(link_edges[l], energy, energy);
+        }
+        double exchanged = flow_graph.solve(n_grids, n_grids + 1);
+        for (int g = 0; g < n_grids; ++g) {
+            double imported = flow_graph.flow(demand_edges[g]);
+            double exported = flow_graph.flow(supply_edges[g]);
+            if (imported > 0.0 || exported > 0.0) {
+                grids[g].settle_exchange(imported, exported);
+                states[g].purchase_energy = std::max(0.0, states[g].purchase_energy - imported);
+                surplus[g] = grids[g].surplus();
+            }
+        }
+        return exchanged;
+    }
+};
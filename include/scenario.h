@@ -0,0 +1,133 @@
+#pragma once
+#include <fstream>
+#include <stdexcept>
+#include <string>
+#include <vector>
+#include "smart_grid.h"
+
+/*
+ * Scenario files describe a whole grid in JSON. Every key is optional; keys left out keep
+ * the current value of the grid (assets are always replaced):
+ *
+ * {
+ *     "battery": {"capacity": 200.0, "charge_rate": 20.0},
+ *     "time_step": 3600,
+ *     "seed": 42,
+ *     "solar_seasonality": 0.4,
+ *     "producers": [{"id": 1, "type": "solar", "capacity": 50.0}, ...],
+ *     "consumers": [{"id": 1, "type": "household", "base_demand": 20.0}, ...]
+ * }
+ *
+ * For large feeders, "producers" and "consumers" can also be given column by column, which
+ * is faster to parse: {"id": [1, 2, ...], "type": ["solar", "wind", ...], "capacity": [...]}.
+ */
+
+/**
+ * @struct AssetColumns
+ * @brief Assets of one family read from a scenario, ready for add_producers / add_consumers
+ */
+struct AssetColumns {
+    std::vector<int> ids;
+    std::vector<int> kinds;
+    std::vector<double> values;
+};
+
+/**
+ * @brief Index of a type name in a table of kind names
+ * @param names PRODUCER_TYPES or CONSUMER_TYPES
+ * @param n_kinds Number of names in the table
+ * @param name Type name to look up
+ * @return Kind index, or -1 if the name is unknown
+ */
+inline int kind_index(const char* const* names, int n_kinds, const std::string& name) {
+    for (int kind = 0; kind < n_kinds; ++kind) {
+        if (name == names[kind]) return kind;
+    }
+    return -1;
+}
+
+/**
+ * @brief Read the assets of one family from a scenario
+ * @param assets JSON array of objects, or JSON object of arrays
+ * @param names PRODUCER_TYPES or CONSUMER_TYPES
+ * @param n_kinds Number of names in the table
+ * @param value_key Key of the asset value ("capacity" or "base_demand")
+ * @return Assets, column by column
+ */
+inline AssetColumns read_assets(const json& assets, const char* const* names, int n_kinds, const char* value_key) {
+    AssetColumns columns;
+    auto add = [&](int id, const std::string& type, double value) {
+        int kind = kind_index(names, n_kinds, type);
+        if (kind < 0) throw std::runtime_error("Unknown asset type in scenario: " + type);
+        columns.ids.push_back(id);
+        columns.kinds.push_back(kind);
+        columns.values.push_back(value);
+    };
+
+    if (assets.is_object()) {
+        const json& ids = assets.at("id");
+        const json& types = assets.at("type");
+        const json& values = assets.at(value_key);
+        if (types.size() != ids.size() || values.size() != ids.size()) {
+            throw std::runtime_error(std::string("Asset columns of different lengths in scenario (\"") + value_key + "\")");
+        }
+        columns.ids.reserve(ids.size());
+        columns.kinds.reserve(ids.size());
+        columns.values.reserve(ids.size());
+        for (size_t i = 0; i < ids.size(); ++i) {
+            add(ids[i].get<int>(), types[i].get_ref<const std::string&>(), values[i].get<double>());
+        }
+    } else {
+        columns.ids.reserve(assets.size());
+        columns.kinds.reserve(assets.size());
+        columns.values.reserve(assets.size());
+        for (const json& asset : assets) {
+            add(asset.at("id").get<int>(), asset.at("type").get_ref<const std::string&>(), asset.at(value_key).get<double>());
+        }
+    }
+    return columns;
+}
+
+/**
+ * @brief Configure a grid from a scenario file
+ * The file is fully read and checked before the grid is touched. The grid is then reset and
+ * its assets replaced; if the assets are inconsistent (duplicate IDs) the grid is left empty.
+ * @param grid Grid to configure
+ * @param path Path of the JSON scenario file
+ * @throws std::exception with a readable message if the file is missing or invalid
+ */
+inline void load_scenario(SmartGrid& grid, const std::string& path) {
+    std::ifstream file(path);
+    if (!file) throw std::runtime_error("Cannot open scenario file: " + path);
+    json config = json::parse(file);
+
+    AssetColumns producers, consumers;
+    if (config.contains("producers")) {
+        producers = read_assets(config["producers"], PRODUCER_TYPES, PRODUCER_KINDS, "capacity");
+    }
+    if (config.contains("consumers")) {
+        consumers = read_assets(config["consumers"], CONSUMER_TYPES, CONSUMER_KINDS, "base_demand");
+    }
+    double time_step = config.value("time_step", grid.time_step());
+    if (time_step <= 0) throw std::runtime_error("time_step must be positive");
+    bool has_battery = config.contains("battery");
+    double battery_capacity = has_battery ? config["battery"].at("capacity").get<double>() : 0.0;
+    double charge_rate = has_battery ? config["battery"].at("charge_rate").get<double>() : 0.0;
+    uint64_t seed = config.value("seed", grid.seed());
+    double solar_seasonality = config.value("solar_seasonality", grid.get_solar_seasonality());
+
+    grid.reset();
+    if (has_battery) grid.updateBattery(battery_capacity, charge_rate);
+    grid.set_time_step(time_step);
+    grid.reseed(seed);
+    grid.set_solar_seasonality(solar_seasonality);
+
+    if (grid.add_producers(static_cast<int>(producers.ids.size()), producers.ids.data(), producers.kinds.data(), producers.values.data()) != GRID_OK) {
+        grid.reset();
+        throw std::runtime_error("Duplicate producer id in scenario file: " + path);
+    }
+    if (grid.add_consumers(static_cast<int>(consumers.ids.size()), consumers.ids.data(), consumers.kinds.data(), consumers.values.data()) != GRID_OK) {
+        grid.reset();
+        throw std::runtime_error("Duplicate consumer id in scenario file: " + path);
+    }
+}
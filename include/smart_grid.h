@@ -6,21 +6,345 @@
 #include <cmath>
 #include <iostream>
 #include <string>
+#include <algorithm>
+#include <numeric>
+#include <cstdint>
+#include <cstring>
+#include <chrono>
+#include <unordered_map>
 #include "json.hpp"
+#include "battery_fleet.h"
+#include "dispatch_optimizer.h"
 
 using json = nlohmann::json;
 
+/**
+ * @enum RunColumn
+ * @brief Columns filled by SmartGrid::run, in output order
+ * Each column is a contiguous block of n_steps doubles in the output buffer.
+ */
+enum RunColumn {
+    COL_TIME = 0,          // Time of day (h)
+    COL_DAY,               // Day of the year (0-364)
+    COL_STORED_ENERGY,     // Battery stored energy (kWh)
+    COL_SOLAR,             // Total solar production (kW)
+    COL_WIND,              // Total wind production (kW)
+    COL_GRID,              // Total main grid production (kW)
+    COL_HOUSEHOLD,         // Total household demand (kW)
+    COL_INDUSTRY,          // Total industry demand (kW)
+    COL_PURCHASE_ENERGY,   // Energy purchased from the main grid (kWh)
+    COL_FLEET_STORED_ENERGY,  // Energy stored in the battery fleet (kWh)
+    RUN_COLUMNS
+};
+
+/**
+ * @struct GridState
+ * @brief Fixed-layout snapshot of the smart grid state
+ * Filled in place by SmartGrid::fill_state, so it can be read from Python without any parsing or allocation.
+ */
+struct GridState {
+    double time;              // Time of day (h)
+    double stored_energy;     // Battery stored energy (kWh)
+    double battery_capacity;  // Battery capacity (kWh)
+    double solar;             // Total solar production (kW)
+    double wind;              // Total wind production (kW)
+    double grid;              // Total main grid production (kW)
+    double household;         // Total household demand (kW)
+    double industry;          // Total industry demand (kW)
+    double purchase_energy;   // Energy purchased from the main grid (kWh)
+    int n_producers;          // Number of producers in the grid
+    int n_consumers;          // Number of consumers in the grid
+    int day;                  // Day of the year (0-364)
+    double fleet_stored_energy;  // Energy stored in the battery fleet (kWh)
+    double fleet_capacity;       // Capacity of the battery fleet (kWh)
+    int n_batteries;             // Number of batteries in the fleet
+};
+
+/**
+ * @enum StateField
+ * @brief Fields of GridState, in declaration order; bit i of a delta mask is field i
+ */
+enum StateField {
+    STATE_TIME = 0,
+    STATE_STORED_ENERGY,
+    STATE_BATTERY_CAPACITY,
+    STATE_SOLAR,
+    STATE_WIND,
+    STATE_GRID,
+    STATE_HOUSEHOLD,
+    STATE_INDUSTRY,
+    STATE_PURCHASE_ENERGY,
+    STATE_N_PRODUCERS,
+    STATE_N_CONSUMERS,
+    STATE_DAY,
+    STATE_FLEET_STORED_ENERGY,
+    STATE_FLEET_CAPACITY,
+    STATE_N_BATTERIES,
+    STATE_FIELDS
+};
+
+/**
+ * @enum StatPhase
+ * @brief Phases timed by the optional instrumentation, index of GridStats::phase_ns
+ */
+enum StatPhase {
+    PHASE_PRODUCERS = 0,  // Production models (noise draws included)
+    PHASE_CONSUMERS,      // Demand models
+    PHASE_AGGREGATION,    // Totals per type and supply/demand balance
+    PHASE_BATTERY,        // Battery charge/discharge and purchase
+    PHASE_LOG,            // std::cout logging of update()
+    PHASE_STATE_JSON,     // get_state() and serialisation of get_grid_state
+    STAT_PHASES
+};
+
+/**
+ * @struct GridStats
+ * @brief Counters of the optional instrumentation (see SmartGrid::enable_stats)
+ * Only what happens while the instrumentation is enabled is counted.
+ */
+struct GridStats {
+    uint64_t steps;                   // Time steps simulated
+    uint64_t phase_ns[STAT_PHASES];   // Cumulative time per StatPhase (ns)
+    uint64_t state_json_calls;        // Calls to get_grid_state
+    uint64_t state_json_allocations;  // Heap blocks allocated by those calls (JSON tree, string and C buffer)
+    uint64_t state_json_bytes;        // Bytes of JSON returned by those calls
+};
+
+/**
+ * @enum ProducerKind
+ * @brief Kind of energy producer, also the index of its asset arrays in SmartGrid
+ */
+enum ProducerKind {
+    PRODUCER_SOLAR = 0,
+    PRODUCER_WIND,
+    PRODUCER_GRID,
+    PRODUCER_KINDS
+};
+
+/**
+ * @enum ConsumerKind
+ * @brief Kind of energy consumer, also the index of its asset arrays in SmartGrid
+ */
+enum ConsumerKind {
+    CONSUMER_HOUSEHOLD = 0,
+    CONSUMER_INDUSTRY,
+    CONSUMER_KINDS
+};
+
+/**
+ * @enum GridError
+ * @brief Status codes returned by the asset registry (and the C API)
+ */
+enum GridError {
+    GRID_OK = 0,
+    GRID_UNKNOWN_ID = -1,    // No asset with this ID
+    GRID_DUPLICATE_ID = -2,  // An asset with this ID already exists
+    GRID_INVALID_KIND = -3,  // Kind index outside ProducerKind / ConsumerKind
+    GRID_CONFIG_ERROR = -4,  // Scenario file missing or malformed (see grid_last_error), or invalid setting
+    GRID_SNAPSHOT_ERROR = -5,  // Snapshot blob truncated, corrupted or of another format version
+    GRID_TIME_STEP_MISMATCH = -6,  // Grid time step differs from the other grids of a GridNetwork
+    GRID_INVALID_VALUE = -7  // Asset parameter out of range (negative capacity or rate, efficiency outside (0, 1])
+};
+
+/**
+ * @struct AssetSlot
+ * @brief Location of an asset in the per-kind arrays of SmartGrid
+ */
+struct AssetSlot {
+    int kind;      // ProducerKind or ConsumerKind
+    size_t index;  // Position in the arrays of the kind
+};
+
+static const char* const PRODUCER_TYPES[PRODUCER_KINDS] = {"solar", "wind", "grid"};
+static const char* const CONSUMER_TYPES[CONSUMER_KINDS] = {"household", "industry"};
+
+/**
+ * @brief Convert a producer type name to its kind
+ * @param type Type of producer ("solar", "wind", anything else is the main grid)
+ * @return Matching ProducerKind
+ */
+inline ProducerKind producer_kind(const std::string& type) {
+    if (type == "solar") return PRODUCER_SOLAR;
+    if (type == "wind") return PRODUCER_WIND;
+    return PRODUCER_GRID;
+}
+
+/**
+ * @brief Convert a consumer type name to its kind
+ * @param type Type of consumer ("household", anything else is an industry)
+ * @return Matching ConsumerKind
+ */
+inline ConsumerKind consumer_kind(const std::string& type) {
+    if (type == "household") return CONSUMER_HOUSEHOLD;
+    return CONSUMER_INDUSTRY;
+}
+
+/**
+ * @brief Solar production factor based on time of day, peak at noon
+ * @param current_time Current time in hours (0-24)
+ * @return Fraction of the capacity available (0-1) before random variation
+ */
+inline double solar_profile(double current_time) {
+    return std::max(0.0, 1.0 - std::abs((current_time - 12.0) / 6.0));
+}
+
+/**
+ * @brief Household demand based on time of day
+ * Peak in the morning (7h - 9h) and in the evening (18h - 22h)
+ * @param current_time Current time in hours (0-24)
+ * @return Demand of one household in kW
+ */
+inline double household_profile(double current_time) {
+    return 2.0 + 5.0 * (
+        std::exp(-0.5 * std::pow((current_time - 8) / 2, 2)) + // Peak the morning
+        std::exp(-0.5 * std::pow((current_time - 20) / 2, 2)) // Peak the evening
+    );
+}
+
+/**
+ * @brief Industry demand based on time of day
+ * Constant demand with a slight peak at midday
+ * @param current_time Current time in hours (0-24)
+ * @return Demand of one industry in kW
+ */
+inline double industry_profile(double current_time) {
+    return 50.0 + 30.0 * std::exp(-0.5 * std::pow((current_time - 12) / 6, 2));
+}
+
+/**
+ * @struct SimulationClock
+ * @brief Calendar-aware simulation clock
+ * Time is derived from the integer number of steps taken, so it does not drift
+ * over long runs at sub-hourly resolution.
+ */
+struct SimulationClock {
+    static constexpr int DAYS_PER_YEAR = 365;
+
+    double time_step;    // Secondes
+    int64_t step_count;  // Steps simulated since the start
+
+    /**
+     * @brief Constructor for SimulationClock
+     * @param time_step Time step in seconds
+     */
+    explicit SimulationClock(double time_step = 3600) : time_step(time_step), step_count(0) {}
+
+    /**
+     * @brief Time step in hours
+     */
+    double step_hours() const { return time_step / 3600.0; }
+
+    /**
+     * @brief Time elapsed since the start in seconds
+     */
+    double elapsed_seconds() const { return step_count * time_step; }
+
+    /**
+     * @brief Current time of day in hours (0-24)
+     */
+    double hour_of_day() const { return std::fmod(elapsed_seconds(), 86400.0) / 3600.0; }
+
+    /**
+     * @brief Current day of the year (0-364)
+     */
+    int day_of_year() const {
+        return static_cast<int>(static_cast<int64_t>(elapsed_seconds() / 86400.0) % DAYS_PER_YEAR);
+    }
+};
+
+/**
+ * @brief Seasonal modulation of the solar production
+ * Peaks at the summer solstice (day 172) and is lowest at the winter solstice.
+ * @param day Day of the year (0-364)
+ * @param amplitude Relative amplitude of the modulation (0 disables it)
+ * @return Factor applied to the solar production
+ */
+inline double solar_season_factor(int day, double amplitude) {
+    return 1.0 + amplitude * std::cos(2.0 * M_PI * (day - 172) / SimulationClock::DAYS_PER_YEAR);
+}
+
+/**
+ * @class CounterRng
+ * @brief Counter-based random generator (SplitMix64)
+ * Each draw is a hash of the seed and a counter, so the whole state fits in two integers:
+ * a grid owning one can be copied, stepped on its own thread and replayed bit for bit.
+ */
+class CounterRng {
+public:
+    uint64_t seed;
+    uint64_t counter;  // Number of values already drawn
+
+    /**
+     * @brief Constructor for CounterRng
+     * @param seed Seed of the sequence
+     */
+    explicit CounterRng(uint64_t seed = 0) : seed(seed), counter(0) {}
+
+    /**
+     * @brief Draw one uniform value
+     * @return Uniform value in [0, 1)
+     */
+    double uniform() {
+        return at(counter++);
+    }
+
+    /**
+     * @brief Draw n uniform values at once
+     * @param out Buffer of n doubles receiving values in [0, 1)
+     * @param n Number of values to draw
+     */
+    void fill_uniform(double* out, size_t n) {
+        for (size_t i = 0; i < n; ++i) {
+            out[i] = at(counter + i);
+        }
+        counter += n;
+    }
+
+    /**
+     * @brief Derive an independent seed, e.g. one per ensemble member
+     * @param seed Parent seed
+     * @param stream Index of the derived sequence
+     * @return Seed of the derived sequence
+     */
+    static uint64_t derive(uint64_t seed, uint64_t stream) {
+        return mix(mix(seed) ^ (stream * 0xD1B54A32D192ED03ULL));
+    }
+
+private:
+    static constexpr uint64_t GOLDEN_GAMMA = 0x9E3779B97F4A7C15ULL;
+
+    /**
+     * @brief SplitMix64 finaliser
+     * @param z Value to hash
+     * @return Hashed value
+     */
+    static uint64_t mix(uint64_t z) {
+        z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+        z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+        return z ^ (z >> 31);
+    }
+
+    /**
+     * @brief Value number index of the sequence
+     * @param index Position in the sequence
+     * @return Uniform value in [0, 1) built from the 53 high bits of the hash
+     */
+    double at(uint64_t index) const {
+        return (mix(seed + (index + 1) * GOLDEN_GAMMA) >> 11) * 0x1.0p-53;
+    }
+};
+
 /**
  * @class EnergyProducer
- * @brief Energy Producer in the Smart Grid
- * This class represents an energy producer such as solar panels, wind turbines, or the main grid.
+ * @brief Description of an energy producer to add to the Smart Grid
+ * Solar panels, wind turbines or the main grid. SmartGrid::add_producer stores it in the
+ * arrays of its kind, where its output is updated at each step.
  */
 class EnergyProducer {
 public:
     int id;
     std::string type;  // "solar", "wind", "grid"
     double capacity;   // Maximum capacity (kW)
-    double current_output;  // Current Production (kW)
 
     /**
      * @brief Constructor for EnergyProducer
@@ -29,44 +353,20 @@ public:
      * @param capacity Maximum capacity of the producer in kW
      */
     EnergyProducer(int id, std::string type, double capacity)
-        :id(id), type(type), capacity(capacity), current_output(0.0) {}
-
-    /**
-     * @brief Update output based on time of day and randomness
-     * @param current_time Current time in hours (0-24)
-     */
-    void update_output(double current_time) {
-        if (type == "solar") {
-            double solar_factor = std::max(0.0, 1.0 - std::abs((current_time - 12.0) / 6.0)); // Peak at noon
-            current_output = capacity * solar_factor * (0.8 + 0.2 * (((double) rand() / (RAND_MAX)) + 1)); // Random varation between 80% and 100%
-        } else if (type == "wind") {
-            double wind_factor = 0.3 + 0.7 * (((double) rand() / (RAND_MAX)) + 1); // Wind between 30% and 100% of its capacity
-            current_output = capacity * wind_factor;
-        } else {  // Grid (Main grid)
-            current_output = capacity;
-        }
-    }
-    
-    /**
-     * @brief Check if the producer ID matches
-     * @param producerId ID to compare
-     * @return true if IDs match, false otherwise
-     */
-    bool isEqual(int producerId) {
-        return producerId == id;
-    }
+        :id(id), type(type), capacity(capacity) {}
 };
 
 /**
  * @class EnergyConsumer
- * @brief Energy Consumer in the Smart Grid
- * This class represents an energy consumer such as households or industries.
+ * @brief Description of an energy consumer to add to the Smart Grid
+ * Households or industries. SmartGrid::add_consumer stores it in the arrays of its kind,
+ * where its demand is updated at each step.
  */
 class EnergyConsumer {
 public:
     int id;
-    std::string type;  // "household", "industry"
-    double demand;     // Actual Demand (kW)
+    std::string type;    // "household", "industry"
+    double base_demand;  // Base demand (kW)
 
     /**
      * @brief Constructor for EnergyConsumer
@@ -75,33 +375,7 @@ public:
      * @param base_demand Base demand of the consumer in kW
      */
     EnergyConsumer(int id, std::string type, double base_demand)
-        :id(id), type(type), demand(base_demand) {}
-
-    /**
-     * @brief Update demand based on time of day
-     * @param current_time Current time in hours (0-24)
-     */
-    void update_demand(double current_time) {
-        // Demand variation over time 
-        if (type == "household") {
-            //Peak in the morning (7h - 9h) and in the evening (18h - 22h)
-            demand = 2.0 + 5.0 * (
-                std::exp(-0.5 * std::pow((current_time - 8) / 2, 2)) + // Peak the morning
-                std::exp(-0.5 * std::pow((current_time - 20) / 2, 2)) // Peak the evening
-            );
-        } else {  // Industry
-            demand = 50.0 + 30.0 * std::exp(-0.5 * std::pow((current_time - 12) / 6, 2));  // Constant demand with a slight peak at midday
-        }
-    }
-    
-    /**
-     * @brief Check if the consumer ID matches
-     * @param consumerId ID to compare
-     * @return true if IDs match, false otherwise
-     */
-    bool isEqual(int consumerId) {
-        return id == consumerId;
-    }
+        :id(id), type(type), base_demand(base_demand) {}
 };
 
 /**
@@ -168,19 +442,249 @@ public:
         return energy_to_release;
     }
 };
+/**
+ * @struct ProducerArrays
+ * @brief Contiguous storage for every producer of one kind
+ */
+struct ProducerArrays {
+    std::vector<int> ids;
+    std::vector<double> capacity;  // Maximum capacity (kW)
+    std::vector<double> output;    // Current Production (kW)
+    double capacity_total = 0.0;   // Sum of the capacities, kept up to date on add/remove (kW)
+
+    size_t size() const { return ids.size(); }
+
+    void reserve(size_t n) {
+        ids.reserve(n);
+        capacity.reserve(n);
+        output.reserve(n);
+    }
+
+    /**
+     * @brief Append a producer
+     * @param id Unique identifier for the producer
+     * @param producer_capacity Maximum capacity of the producer in kW
+     */
+    void add(int id, double producer_capacity) {
+        ids.push_back(id);
+        capacity.push_back(producer_capacity);
+        output.push_back(0.0);
+        capacity_total += producer_capacity;
+    }
+
+    /**
+     * @brief Remove the producer at the given position in O(1)
+     * The last producer is moved into the freed position, so the order is not preserved.
+     * @param index Position of the producer to remove
+     */
+    void remove_at(size_t index) {
+        // Repartir de zéro quand le dernier producteur part, sans erreur d'arrondi accumulée
+        capacity_total = ids.size() > 1 ? capacity_total - capacity[index] : 0.0;
+        ids[index] = ids.back();
+        capacity[index] = capacity.back();
+        output[index] = output.back();
+        ids.pop_back();
+        capacity.pop_back();
+        output.pop_back();
+    }
+
+    void clear() {
+        ids.clear();
+        capacity.clear();
+        output.clear();
+        capacity_total = 0.0;
+    }
+
+    /**
+     * @brief Set every output to capacity * scale * (low + span * noise[i])
+     * @param scale Factor shared by every producer of the kind
+     * @param low Lower bound of the per-producer factor
+     * @param span Width of the per-producer factor
+     * @param noise One random draw per producer
+     * @return Total output of the kind in kW, summed in the same pass
+     */
+    double update_outputs(double scale, double low, double span, const double* noise) {
+        const size_t n = output.size();
+        double total = 0.0;
+        for (size_t i = 0; i < n; ++i) {
+            output[i] = capacity[i] * scale * (low + span * noise[i]);
+            total += output[i];
+        }
+        return total;
+    }
+
+    /**
+     * @brief Set every output to a fixed fraction of its capacity
+     * @param scale Fraction of the capacity produced
+     * @return Total output of the kind in kW, from the running capacity total
+     */
+    double update_outputs(double scale) {
+        const size_t n = output.size();
+        for (size_t i = 0; i < n; ++i) {
+            output[i] = capacity[i] * scale;
+        }
+        return capacity_total * scale;
+    }
+
+    /**
+     * @brief Total output of the kind
+     * @return Sum of the outputs in kW
+     */
+    double total() const {
+        return std::accumulate(output.begin(), output.end(), 0.0);
+    }
+};
+
+/**
+ * @struct ConsumerArrays
+ * @brief Contiguous storage for every consumer of one kind
+ */
+struct ConsumerArrays {
+    std::vector<int> ids;
+    std::vector<double> base_demand;  // Base demand (kW)
+    std::vector<double> demand;       // Actual Demand (kW)
+
+    size_t size() const { return ids.size(); }
+
+    void reserve(size_t n) {
+        ids.reserve(n);
+        base_demand.reserve(n);
+        demand.reserve(n);
+    }
+
+    /**
+     * @brief Append a consumer
+     * @param id Unique identifier for the consumer
+     * @param consumer_base_demand Base demand of the consumer in kW
+     */
+    void add(int id, double consumer_base_demand) {
+        ids.push_back(id);
+        base_demand.push_back(consumer_base_demand);
+        demand.push_back(consumer_base_demand);
+    }
+
+    /**
+     * @brief Remove the consumer at the given position in O(1)
+     * The last consumer is moved into the freed position, so the order is not preserved.
+     * @param index Position of the consumer to remove
+     */
+    void remove_at(size_t index) {
+        ids[index] = ids.back();
+        base_demand[index] = base_demand.back();
+        demand[index] = demand.back();
+        ids.pop_back();
+        base_demand.pop_back();
+        demand.pop_back();
+    }
+
+    void clear() {
+        ids.clear();
+        base_demand.clear();
+        demand.clear();
+    }
+
+    /**
+     * @brief Set the demand of every consumer of the kind
+     * @param consumer_demand Demand of one consumer in kW
+     */
+    void update_demand(double consumer_demand) {
+        std::fill(demand.begin(), demand.end(), consumer_demand);
+    }
+
+    /**
+     * @brief Total demand of the kind
+     * @return Sum of the demands in kW
+     */
+    double total() const {
+        return std::accumulate(demand.begin(), demand.end(), 0.0);
+    }
+};
+
+/**
+ * @struct SnapshotWriter
+ * @brief Appends plain values to a snapshot blob, in the byte order of the machine
+ */
+struct SnapshotWriter {
+    uint8_t* out;
+
+    template <typename T>
+    void put(const T& value) {
+        std::memcpy(out, &value, sizeof(T));
+        out += sizeof(T);
+    }
+
+    template <typename T>
+    void put_array(const std::vector<T>& values) {
+        if (values.empty()) return;
+        std::memcpy(out, values.data(), values.size() * sizeof(T));
+        out += values.size() * sizeof(T);
+    }
+};
+
+/**
+ * @struct SnapshotReader
+ * @brief Reads back the values written by SnapshotWriter, checking the blob bounds
+ * Every read fails (returns false) once the blob is exhausted, so a truncated blob is detected
+ * by checking the last read only.
+ */
+struct SnapshotReader {
+    const uint8_t* in;
+    size_t remaining;
+
+    template <typename T>
+    bool get(T& value) {
+        if (remaining < sizeof(T)) return false;
+        std::memcpy(&value, in, sizeof(T));
+        in += sizeof(T);
+        remaining -= sizeof(T);
+        return true;
+    }
+
+    template <typename T>
+    bool get_array(std::vector<T>& values, uint64_t n) {
+        if (n > remaining / sizeof(T)) return false;
+        values.resize(static_cast<size_t>(n));
+        if (n > 0) std::memcpy(values.data(), in, n * sizeof(T));
+        in += n * sizeof(T);
+        remaining -= n * sizeof(T);
+        return true;
+    }
+};
+
 /**
  * @class SmartGrid
  * @brief Smart Grid electric system simulator
  * This class simulates a smart grid electric system with energy producers, consumers and a battery storage.
+ * Assets are stored as contiguous arrays per kind so the update loop has no per-asset branching.
  */
 class SmartGrid {
+public:
+    static constexpr uint32_t SNAPSHOT_MAGIC = 0x53475331;  // "SGS1"
+    static constexpr uint32_t SNAPSHOT_VERSION = 4;
+
 private:
-    std::vector<EnergyProducer> producers;
-    std::vector<EnergyConsumer> consumers;
+    ProducerArrays producers[PRODUCER_KINDS];
+    ConsumerArrays consumers[CONSUMER_KINDS];
+    std::unordered_map<int, AssetSlot> producer_slots;  // Producer ID -> position in producers
+    std::unordered_map<int, AssetSlot> consumer_slots;  // Consumer ID -> position in consumers
+    BatteryFleet fleet;  // Distributed batteries, dispatched after the main battery
+    std::unordered_map<int, size_t> battery_slots;  // Battery ID -> position in fleet
+    CounterRng rng;  // Random generator owned by the grid
+    std::vector<double> noise;  // Random draws of the current step, one per producer
+    double production_totals[PRODUCER_KINDS];  // Current production per kind, kept up to date on step/add/remove (kW)
+    double demand_totals[CONSUMER_KINDS];  // Current demand per kind, kept up to date on step/add/remove (kW)
+    uint64_t state_version;  // Version of the state last seen by get_state_delta
+    uint64_t field_versions[STATE_FIELDS];  // Version at which each field last changed
+    double published[STATE_FIELDS];  // Field values at state_version
     Battery battery;
-    double time_step;  // Secondes
+    DispatchOptimizer dispatcher;  // Dispatch mode of the main battery and look-ahead solver
+    SimulationClock clock;
     double current_time;  // Heures (0-24)
+    double solar_seasonality;  // Relative amplitude of the seasonal solar modulation
     double purchase_energy; // kWh purchased from the main grid
+    double surplus_energy;  // kWh produced in excess that the battery could not store
+    bool profiling;  // Phase timers and counters enabled
+    GridStats stats;
 
 public:
     /**
@@ -188,42 +692,284 @@ public:
      * @param battery_capacity Capacity or the battery in kWh
      * @param charge_rate Maximum charge/discharge rate of the battery in kW
      * @param time_step Time step for the simulation in seconds (default is 3600s)
+     * @param seed Seed of the random generator, the same seed gives the same run
      */
-    SmartGrid(double battery_capacity, double charge_rate, double time_step=3600)
-    : battery(battery_capacity, charge_rate), time_step(time_step), current_time(0.0), purchase_energy(0.0) {}
+    SmartGrid(double battery_capacity, double charge_rate, double time_step=3600, uint64_t seed=0)
+    : rng(seed), production_totals(), demand_totals(), state_version(0), field_versions(),
+      battery(battery_capacity, charge_rate),
+      clock(time_step), current_time(0.0), solar_seasonality(0.0), purchase_energy(0.0), surplus_energy(0.0),
+      profiling(false), stats() {
+        // Aucune valeur publiée : le premier get_state_delta rapporte tous les champs
+        std::fill(published, published + STATE_FIELDS, std::nan(""));
+    }
 
     /**
      * @brief Add an energy producer to the smart grid
      * @param producer EnergyProducer object to add
+     * @return GRID_OK, or GRID_DUPLICATE_ID if a producer with the same ID exists
      */
-    void add_producer(EnergyProducer producer) {
-        producers.push_back(producer);
+    int add_producer(EnergyProducer producer) {
+        int kind = producer_kind(producer.type);
+        return add_producers(1, &producer.id, &kind, &producer.capacity);
+    }
+
+    /**
+     * @brief Add many energy producers at once
+     * Either every producer is added or, on error, none of them.
+     * @param n Number of producers
+     * @param ids Unique identifier of each producer
+     * @param kinds ProducerKind of each producer
+     * @param capacities Maximum capacity of each producer in kW
+     * @return GRID_OK, GRID_INVALID_KIND or GRID_DUPLICATE_ID
+     */
+    int add_producers(int n, const int* ids, const int* kinds, const double* capacities) {
+        size_t counts[PRODUCER_KINDS] = {};
+        for (int i = 0; i < n; ++i) {
+            if (kinds[i] < 0 || kinds[i] >= PRODUCER_KINDS) return GRID_INVALID_KIND;
+            ++counts[kinds[i]];
+        }
+        for (int kind = 0; kind < PRODUCER_KINDS; ++kind) {
+            producers[kind].reserve(producers[kind].size() + counts[kind]);
+        }
+        producer_slots.reserve(producer_slots.size() + n);
+        for (int i = 0; i < n; ++i) {
+            auto inserted = producer_slots.emplace(ids[i], AssetSlot{kinds[i], producers[kinds[i]].size()});
+            if (!inserted.second) {
+                // Annuler les ajouts du lot, du dernier au premier
+                while (i-- > 0) remove_producer(ids[i]);
+                return GRID_DUPLICATE_ID;
+            }
+            producers[kinds[i]].add(ids[i], capacities[i]);
+        }
+        return GRID_OK;
+    }
+
+    /**
+     * @brief Copy the identity of every producer, kind by kind
+     * @param ids Receives the ID of each producer
+     * @param kinds Receives the ProducerKind of each producer
+     * @param capacities Receives the capacity of each producer (kW)
+     * Each buffer must hold one value per producer (see GridState::n_producers).
+     */
+    void list_producers(int* ids, int* kinds, double* capacities) const {
+        size_t offset = 0;
+        for (int kind = 0; kind < PRODUCER_KINDS; ++kind) {
+            const auto& arrays = producers[kind];
+            std::copy(arrays.ids.begin(), arrays.ids.end(), ids + offset);
+            std::fill(kinds + offset, kinds + offset + arrays.size(), kind);
+            std::copy(arrays.capacity.begin(), arrays.capacity.end(), capacities + offset);
+            offset += arrays.size();
+        }
     }
     
     /**
-     * @brief Remove an energy producer from the smart grid
+     * @brief Remove an energy producer from the smart grid in O(1)
      * @param id ID of the producer to remove
+     * @return GRID_OK, or GRID_UNKNOWN_ID if no producer has this ID
      */
-    void remove_producer(int id) {
-        producers.erase(producers.begin() + id);
-        std::cout << id << " Removed !" << std::endl;
+    int remove_producer(int id) {
+        auto found = producer_slots.find(id);
+        if (found == producer_slots.end()) return GRID_UNKNOWN_ID;
+        AssetSlot slot = found->second;
+        producer_slots.erase(found);
+        ProducerArrays& arrays = producers[slot.kind];
+        production_totals[slot.kind] = arrays.size() > 1 ? production_totals[slot.kind] - arrays.output[slot.index] : 0.0;
+        // Le dernier producteur prend la place libérée
+        if (slot.index + 1 < arrays.size()) producer_slots[arrays.ids.back()].index = slot.index;
+        arrays.remove_at(slot.index);
+        return GRID_OK;
     }
 
     /**
      * @brief Add an energy consumer to the smart grid
      * @param consumer EnergyConsumer object to add
+     * @return GRID_OK, or GRID_DUPLICATE_ID if a consumer with the same ID exists
+     */
+    int add_consumer(EnergyConsumer consumer) {
+        int kind = consumer_kind(consumer.type);
+        return add_consumers(1, &consumer.id, &kind, &consumer.base_demand);
+    }
+
+    /**
+     * @brief Add many energy consumers at once
+     * Either every consumer is added or, on error, none of them.
+     * @param n Number of consumers
+     * @param ids Unique identifier of each consumer
+     * @param kinds ConsumerKind of each consumer
+     * @param base_demands Base demand of each consumer in kW
+     * @return GRID_OK, GRID_INVALID_KIND or GRID_DUPLICATE_ID
+     */
+    int add_consumers(int n, const int* ids, const int* kinds, const double* base_demands) {
+        size_t counts[CONSUMER_KINDS] = {};
+        for (int i = 0; i < n; ++i) {
+            if (kinds[i] < 0 || kinds[i] >= CONSUMER_KINDS) return GRID_INVALID_KIND;
+            ++counts[kinds[i]];
+        }
+        for (int kind = 0; kind < CONSUMER_KINDS; ++kind) {
+            consumers[kind].reserve(consumers[kind].size() + counts[kind]);
+        }
+        consumer_slots.reserve(consumer_slots.size() + n);
+        for (int i = 0; i < n; ++i) {
+            auto inserted = consumer_slots.emplace(ids[i], AssetSlot{kinds[i], consumers[kinds[i]].size()});
+            if (!inserted.second) {
+                // Annuler les ajouts du lot, du dernier au premier
+                while (i-- > 0) remove_consumer(ids[i]);
+                return GRID_DUPLICATE_ID;
+            }
+            consumers[kinds[i]].add(ids[i], base_demands[i]);
+            demand_totals[kinds[i]] += base_demands[i];  // Demande initiale = demande de base
+        }
+        return GRID_OK;
+    }
+
+    /**
+     * @brief Copy the identity of every consumer, kind by kind
+     * @param ids Receives the ID of each consumer
+     * @param kinds Receives the ConsumerKind of each consumer
+     * @param base_demands Receives the base demand of each consumer (kW)
+     * Each buffer must hold one value per consumer (see GridState::n_consumers).
      */
-    void add_consumer(EnergyConsumer consumer) {
-        consumers.push_back(consumer);
+    void list_consumers(int* ids, int* kinds, double* base_demands) const {
+        size_t offset = 0;
+        for (int kind = 0; kind < CONSUMER_KINDS; ++kind) {
+            const auto& arrays = consumers[kind];
+            std::copy(arrays.ids.begin(), arrays.ids.end(), ids + offset);
+            std::fill(kinds + offset, kinds + offset + arrays.size(), kind);
+            std::copy(arrays.base_demand.begin(), arrays.base_demand.end(), base_demands + offset);
+            offset += arrays.size();
+        }
     }
+    
     /**
-     * @brief Remove an energy consumer from the smart grid
+     * @brief Remove an energy consumer from the smart grid in O(1)
      * @param id ID of the consumer to remove
+     * @return GRID_OK, or GRID_UNKNOWN_ID if no consumer has this ID
+     */
+    int remove_consumer(int id) {
+        auto found = consumer_slots.find(id);
+        if (found == consumer_slots.end()) return GRID_UNKNOWN_ID;
+        AssetSlot slot = found->second;
+        consumer_slots.erase(found);
+        ConsumerArrays& arrays = consumers[slot.kind];
+        demand_totals[slot.kind] = arrays.size() > 1 ? demand_totals[slot.kind] - arrays.demand[slot.index] : 0.0;
+        // Le dernier consommateur prend la place libérée
+        if (slot.index + 1 < arrays.size()) consumer_slots[arrays.ids.back()].index = slot.index;
+        arrays.remove_at(slot.index);
+        return GRID_OK;
+    }
+    /**
+     * @brief Add many distributed batteries to the fleet in one call, all or nothing
+     * They are dispatched after the main battery: surpluses it cannot store charge the fleet,
+     * deficits it cannot cover discharge it, following the fleet policy.
+     * @param n Number of batteries
+     * @param ids Unique identifier of each battery
+     * @param capacities Capacity of each battery (kWh)
+     * @param charge_rates Maximum charging power of each battery (kW)
+     * @param discharge_rates Maximum discharge power of each battery (kW)
+     * @param efficiencies Round-trip efficiency of each battery (0-1]
+     * @param priorities Dispatch order of each battery under FLEET_PRIORITY, lowest first
+     * @return GRID_OK, GRID_INVALID_VALUE if a capacity or rate is negative or an efficiency outside (0, 1],
+     *         or GRID_DUPLICATE_ID if an ID is already used (no battery is added in either case)
+     */
+    int add_batteries(int n, const int* ids, const double* capacities, const double* charge_rates,
+                      const double* discharge_rates, const double* efficiencies, const int* priorities) {
+        // Tout le lot est vérifié avant d'enregistrer un id (les NaN sont refusés aussi)
+        for (int i = 0; i < n; ++i) {
+            if (!(capacities[i] >= 0.0) || !(charge_rates[i] >= 0.0) || !(discharge_rates[i] >= 0.0)
+                || !(efficiencies[i] > 0.0 && efficiencies[i] <= 1.0)) {
+                return GRID_INVALID_VALUE;
+            }
+        }
+        battery_slots.reserve(battery_slots.size() + n);
+        for (int i = 0; i < n; ++i) {
+            if (!battery_slots.emplace(ids[i], fleet.size() + i).second) {
+                // Annuler les enregistrements du lot
+                while (i-- > 0) battery_slots.erase(ids[i]);
+                return GRID_DUPLICATE_ID;
+            }
+        }
+        fleet.reserve(fleet.size() + n);
+        for (int i = 0; i < n; ++i) {
+            fleet.add(ids[i], capacities[i], charge_rates[i], discharge_rates[i], efficiencies[i], priorities[i]);
+        }
+        return GRID_OK;
+    }
+
+    /**
+     * @brief Remove a battery from the fleet in O(1)
+     * @param id ID of the battery to remove
+     * @return GRID_OK, or GRID_UNKNOWN_ID if no battery has this ID
+     */
+    int remove_battery(int id) {
+        auto found = battery_slots.find(id);
+        if (found == battery_slots.end()) return GRID_UNKNOWN_ID;
+        size_t index = found->second;
+        battery_slots.erase(found);
+        if (index + 1 < fleet.size()) battery_slots[fleet.ids.back()] = index;
+        fleet.remove_at(index);
+        return GRID_OK;
+    }
+
+    /**
+     * @brief Copy the state of every battery of the fleet
+     * Each buffer must hold one value per battery (see GridState::n_batteries).
+     * @param ids Receives the ID of each battery
+     * @param capacities Receives the capacity of each battery (kWh)
+     * @param stored Receives the energy stored in each battery (kWh)
+     */
+    void list_batteries(int* ids, double* capacities, double* stored) const {
+        std::copy(fleet.ids.begin(), fleet.ids.end(), ids);
+        std::copy(fleet.capacity.begin(), fleet.capacity.end(), capacities);
+        std::copy(fleet.stored.begin(), fleet.stored.end(), stored);
+    }
+
+    /**
+     * @brief Choose how surpluses and deficits are shared between the batteries of the fleet
+     * @param policy FleetPolicy
+     * @return GRID_OK, or GRID_INVALID_KIND if the policy is unknown
+     */
+    int set_fleet_policy(int policy) {
+        if (policy < 0 || policy >= FLEET_POLICIES) return GRID_INVALID_KIND;
+        fleet.policy = policy;
+        return GRID_OK;
+    }
+
+    int fleet_policy() const { return fleet.policy; }
+
+    /**
+     * @brief Choose how the main battery is dispatched
+     * In DISPATCH_LOOKAHEAD mode, each step solves the schedule minimising the cost of the energy
+     * bought over the next horizon steps (see DispatchOptimizer) and applies its first move.
+     * @param mode DispatchMode
+     * @param horizon Steps looked ahead, the current one included
+     * @param levels Discretised states of charge of the battery, more is finer and slower
+     * @param grid_charging Allow buying energy to charge the battery ahead of expensive hours
+     * @return GRID_OK, GRID_INVALID_KIND if the mode is unknown, GRID_CONFIG_ERROR if horizon < 1 or levels < 2
      */
-    void remove_consumer(int id) {
-        consumers.erase(consumers.begin() + id);
-        std::cout << id << " Removed !" << std::endl;
+    int set_dispatch_mode(int mode, int horizon, int levels, bool grid_charging) {
+        if (mode < 0 || mode >= DISPATCH_MODES) return GRID_INVALID_KIND;
+        if (horizon < 1 || levels < 2) return GRID_CONFIG_ERROR;
+        dispatcher.mode = mode;
+        dispatcher.horizon = horizon;
+        dispatcher.levels = levels;
+        dispatcher.grid_charging = grid_charging;
+        return GRID_OK;
     }
+
+    int dispatch_mode() const { return dispatcher.mode; }
+
+    /**
+     * @brief Set the purchase price used by the look-ahead dispatch
+     * @param prices Price of the energy bought at each hour of the day, or nullptr for a flat price
+     * @param n 24, or 0 to go back to a flat price (the purchased energy is then minimised)
+     * @return GRID_OK, or GRID_CONFIG_ERROR if n is neither 0 nor 24
+     */
+    int set_dispatch_tariff(const double* prices, int n) {
+        if (n != 0 && n != 24) return GRID_CONFIG_ERROR;
+        dispatcher.tariff.assign(prices, prices + n);
+        return GRID_OK;
+    }
+
     /**
      * @brief Update battery parameters
      * @param capacity New capacity of the battery in kWh
@@ -237,86 +983,729 @@ public:
      * @brief Reset the smart grid to initial state
      */
     void reset() {
-        producers.clear();
-        consumers.clear();
+        for (auto& arrays : producers) arrays.clear();
+        for (auto& arrays : consumers) arrays.clear();
+        producer_slots.clear();
+        consumer_slots.clear();
+        fleet.clear();
+        battery_slots.clear();
+        std::fill(production_totals, production_totals + PRODUCER_KINDS, 0.0);
+        std::fill(demand_totals, demand_totals + CONSUMER_KINDS, 0.0);
         battery.reset();
+        clock.step_count = 0;
         current_time = 0.0;
+        rng.counter = 0;
     }
 
+    /**
+     * @brief Set the seasonal modulation of the solar production
+     * @param amplitude Relative amplitude, e.g. 0.4 gives +40% at the summer solstice and -40% in winter (0 disables it)
+     */
+    void set_solar_seasonality(double amplitude) {
+        solar_seasonality = amplitude;
+    }
+
+    double get_solar_seasonality() const { return solar_seasonality; }
+
     /**
      * @brief Simulate one time step of the smart grid
-     * @return Amount of energy bought from the main grid (kWh)
+     * Logs the energy purchased from the main grid, if any.
      */
     void update() {
-        current_time += time_step / 3600.0;
-        if (current_time >= 24.0) current_time -= 24.0;  // Cycle de 24h
+        step();
+        if (purchase_energy > 0.0) {
+            auto mark = profiling ? StatClock::now() : StatClock::time_point();
+            // Acheter de l'énergie au réseau principal
+            std::cout << "Purchasing additional energy from the grid : "
+                      << purchase_energy << " kWh" << std::endl;
+            if (profiling) lap(PHASE_LOG, mark);
+        }
+    }
 
-        // Mettre à jour la production et la demande
-        double time_factor = 0.5 * (1.0 + sin(M_PI * current_time / 12.0));  // Variation journalière
-        for (auto& producer : producers) {
-            producer.update_output(current_time);
+    /**
+     * @brief Simulate n_steps time steps and record the grid state after each one
+     * Optional traces replace the built-in production and demand models (trace replay). A NaN
+     * in a trace leaves the matching kind on its built-in model for that step.
+     * @param n_steps Number of time steps to simulate
+     * @param out Buffer of RUN_COLUMNS * n_steps doubles, filled column by column (see RunColumn)
+     * @param producer_factors Optional n_steps * PRODUCER_KINDS row-major trace of the fraction of capacity produced per kind
+     * @param consumer_demand Optional n_steps * CONSUMER_KINDS row-major trace of the demand of one consumer per kind (kW)
+     */
+    void run(int n_steps, double* out, const double* producer_factors = nullptr, const double* consumer_demand = nullptr) {
+        for (int i = 0; i < n_steps; ++i) {
+            step(producer_factors ? producer_factors + i * PRODUCER_KINDS : nullptr,
+                 consumer_demand ? consumer_demand + i * CONSUMER_KINDS : nullptr);
+            out[COL_TIME * n_steps + i] = current_time;
+            out[COL_DAY * n_steps + i] = clock.day_of_year();
+            out[COL_STORED_ENERGY * n_steps + i] = battery.stored_energy;
+            out[COL_SOLAR * n_steps + i] = production_totals[PRODUCER_SOLAR];
+            out[COL_WIND * n_steps + i] = production_totals[PRODUCER_WIND];
+            out[COL_GRID * n_steps + i] = production_totals[PRODUCER_GRID];
+            out[COL_HOUSEHOLD * n_steps + i] = demand_totals[CONSUMER_HOUSEHOLD];
+            out[COL_INDUSTRY * n_steps + i] = demand_totals[CONSUMER_INDUSTRY];
+            out[COL_PURCHASE_ENERGY * n_steps + i] = purchase_energy;
+            out[COL_FLEET_STORED_ENERGY * n_steps + i] = fleet.stored_total;
         }
-        for (auto& consumer : consumers) {
-            consumer.update_demand(current_time);
+    }
+
+    /**
+     * @brief Simulate n_steps time steps, recording only the battery and purchase trajectories
+     * @param n_steps Number of time steps to simulate
+     * @param stored Receives the stored energy (kWh) after step i at stored[i * stride]
+     * @param purchase Receives the purchased energy (kWh) after step i at purchase[i * stride]
+     * @param stride Distance between two consecutive steps in the output buffers
+     */
+    void run_trajectory(int n_steps, double* stored, double* purchase, size_t stride) {
+        for (int i = 0; i < n_steps; ++i) {
+            step();
+            stored[i * stride] = battery.stored_energy;
+            purchase[i * stride] = purchase_energy;
         }
+    }
 
-        // Calculer l'équilibre offre/demande
-        double total_production = 0.0;
-        for (const auto& producer : producers) {
-            total_production += producer.current_output;
+    /**
+     * @brief Simulate one time step without logging, e.g. for a GridNetwork
+     */
+    void advance() {
+        step();
+    }
+
+    /**
+     * @brief Energy of the last step produced in excess and not stored by the battery
+     * @return Surplus in kWh
+     */
+    double surplus() const { return surplus_energy; }
+
+    /**
+     * @brief Account for energy exchanged with other grids during the last step
+     * Imports replace part of the purchase from the main grid, exports use part of the surplus.
+     * @param imported Energy received from other grids (kWh), at most the purchase of the step
+     * @param exported Energy sent to other grids (kWh), at most the surplus of the step
+     */
+    void settle_exchange(double imported, double exported) {
+        purchase_energy = std::max(0.0, purchase_energy - imported);
+        surplus_energy = std::max(0.0, surplus_energy - exported);
+    }
+
+    /**
+     * @brief Change the duration of a time step
+     * @param time_step Time step in seconds
+     */
+    void set_time_step(double time_step) {
+        clock.time_step = time_step;
+    }
+
+    double time_step() const { return clock.time_step; }
+
+    uint64_t seed() const { return rng.seed; }
+
+    /**
+     * @brief Restart the random generator from a new seed
+     * @param seed Seed of the random generator
+     */
+    void reseed(uint64_t seed) {
+        rng = CounterRng(seed);
+    }
+
+    /**
+     * @brief Write the current state of the smart grid into a fixed-layout struct
+     * @param state GridState to fill, production and demand are summed per type
+     */
+    void fill_state(GridState& state) const {
+        state.time = current_time;
+        state.stored_energy = battery.stored_energy;
+        state.battery_capacity = battery.capacity;
+        state.solar = production_totals[PRODUCER_SOLAR];
+        state.wind = production_totals[PRODUCER_WIND];
+        state.grid = production_totals[PRODUCER_GRID];
+        state.household = demand_totals[CONSUMER_HOUSEHOLD];
+        state.industry = demand_totals[CONSUMER_INDUSTRY];
+        state.purchase_energy = purchase_energy;
+        state.n_producers = static_cast<int>(producer_slots.size());
+        state.n_consumers = static_cast<int>(consumer_slots.size());
+        state.day = clock.day_of_year();
+        state.fleet_stored_energy = fleet.stored_total;
+        state.fleet_capacity = fleet.capacity_total;
+        state.n_batteries = static_cast<int>(fleet.size());
+    }
+
+    /**
+     * @brief Current state, and which of its fields changed since a version seen by the caller
+     * Versions are only advanced here, when a change is observed, so stepping the grid costs
+     * nothing extra. Pass 0 the first time to get every field.
+     * @param since_version Version returned by a previous call, or 0
+     * @param state GridState to fill with the current values (every field)
+     * @param changed_mask Receives bit i set if StateField i changed after since_version
+     * @return Current version, to pass to the next call
+     */
+    uint64_t get_state_delta(uint64_t since_version, GridState& state, uint32_t& changed_mask) {
+        fill_state(state);
+        const double values[STATE_FIELDS] = {
+            state.time, state.stored_energy, state.battery_capacity, state.solar, state.wind,
+            state.grid, state.household, state.industry, state.purchase_energy,
+            static_cast<double>(state.n_producers), static_cast<double>(state.n_consumers),
+            static_cast<double>(state.day), state.fleet_stored_energy, state.fleet_capacity,
+            static_cast<double>(state.n_batteries)
+        };
+        bool changed = false;
+        for (int field = 0; field < STATE_FIELDS; ++field) {
+            if (!(values[field] == published[field])) {
+                if (!changed) ++state_version;
+                changed = true;
+                field_versions[field] = state_version;
+                published[field] = values[field];
+            }
         }
+        changed_mask = 0;
+        for (int field = 0; field < STATE_FIELDS; ++field) {
+            if (field_versions[field] > since_version) changed_mask |= 1u << field;
+        }
+        return state_version;
+    }
 
-        double total_demand = 0.0;
-        for (const auto& consumer : consumers) {
-            total_demand += consumer.demand;
+    /**
+     * @brief Current output of the producers matching a type and an ID range
+     * Small ranges are looked up ID by ID, large ones scan the producer arrays, so the cost is
+     * O(min(id_max - id_min, n_producers)). Matches are written in no particular order.
+     * @param kind ProducerKind to select, or -1 for every kind
+     * @param id_min Smallest ID selected
+     * @param id_max End of the ID range (excluded)
+     * @param ids Receives the ID of each match
+     * @param kinds Receives the ProducerKind of each match
+     * @param outputs Receives the output of each match in kW
+     * @param max_count Size of the output buffers, extra matches are counted but not written
+     * @return Number of matches
+     */
+    int query_producers(int kind, int id_min, int id_max, int* ids, int* kinds, double* outputs, int max_count) const {
+        return query_assets(producers, PRODUCER_KINDS, producer_slots, &ProducerArrays::output,
+                            kind, id_min, id_max, ids, kinds, outputs, max_count);
+    }
+
+    /**
+     * @brief Current demand of the consumers matching a type and an ID range
+     * Same selection rules as query_producers.
+     * @param kind ConsumerKind to select, or -1 for every kind
+     * @param id_min Smallest ID selected
+     * @param id_max End of the ID range (excluded)
+     * @param ids Receives the ID of each match
+     * @param kinds Receives the ConsumerKind of each match
+     * @param demands Receives the demand of each match in kW
+     * @param max_count Size of the output buffers, extra matches are counted but not written
+     * @return Number of matches
+     */
+    int query_consumers(int kind, int id_min, int id_max, int* ids, int* kinds, double* demands, int max_count) const {
+        return query_assets(consumers, CONSUMER_KINDS, consumer_slots, &ConsumerArrays::demand,
+                            kind, id_min, id_max, ids, kinds, demands, max_count);
+    }
+
+    /**
+     * @brief Size of the blob written by write_snapshot
+     * @return Number of bytes
+     */
+    size_t snapshot_size() const {
+        size_t size = 2 * sizeof(uint32_t) + sizeof(double) + sizeof(int64_t) + 2 * sizeof(uint64_t)
+                    + 4 * sizeof(double) + 4 * sizeof(double);
+        for (const auto& arrays : producers) {
+            size += sizeof(uint64_t) + 2 * sizeof(double) + arrays.size() * (sizeof(int) + 2 * sizeof(double));
+        }
+        for (const auto& arrays : consumers) {
+            size += sizeof(uint64_t) + sizeof(double) + arrays.size() * (sizeof(int) + 2 * sizeof(double));
         }
+        size += sizeof(int) + sizeof(uint64_t) + 2 * sizeof(double) + fleet.size() * (2 * sizeof(int) + 5 * sizeof(double));
+        size += 4 * sizeof(int) + sizeof(uint64_t) + dispatcher.tariff.size() * sizeof(double);
+        return size;
+    }
 
-        double imbalance = total_production - total_demand;
-        double energy = 0.0;
-        if (imbalance > 0) {
-            // Excédent : stocker dans la batterie
-            battery.charge(imbalance * (time_step / 3600.0), time_step);
-            energy = imbalance;
-            purchase_energy = 0.0;
-        } else {
-            // Déficit : utiliser la batterie
-            double energy_needed = -imbalance * (time_step / 3600.0);
-            double energy_from_battery = battery.discharge(energy_needed, time_step);
-            if (energy_from_battery < energy_needed) {
-                energy = energy_needed - energy_from_battery;
-                purchase_energy = energy;
-                // Acheter de l'énergie au réseau principal
-                std::cout << "Purchasing additional energy from the grid : "
-                          << energy << " kWh" << std::endl;
+    /**
+     * @brief Write the whole simulation state into a compact binary blob
+     * Assets, batteries, dispatch settings, clock and random generator are saved, so a grid restored from the blob
+     * continues bit for bit like this one. Statistics are not part of the state.
+     * The blob uses the byte order of the machine and is meant to be restored by the same build.
+     * @param out Buffer of snapshot_size() bytes
+     */
+    void write_snapshot(uint8_t* out) const {
+        SnapshotWriter writer{out};
+        writer.put(SNAPSHOT_MAGIC);
+        writer.put(SNAPSHOT_VERSION);
+        writer.put(clock.time_step);
+        writer.put(clock.step_count);
+        writer.put(rng.seed);
+        writer.put(rng.counter);
+        writer.put(current_time);
+        writer.put(solar_seasonality);
+        writer.put(purchase_energy);
+        writer.put(surplus_energy);
+        writer.put(battery.capacity);
+        writer.put(battery.stored_energy);
+        writer.put(battery.max_charge_rate);
+        writer.put(battery.max_discharge_rate);
+        for (int kind = 0; kind < PRODUCER_KINDS; ++kind) {
+            const ProducerArrays& arrays = producers[kind];
+            writer.put(static_cast<uint64_t>(arrays.size()));
+            writer.put(arrays.capacity_total);
+            writer.put(production_totals[kind]);
+            writer.put_array(arrays.ids);
+            writer.put_array(arrays.capacity);
+            writer.put_array(arrays.output);
+        }
+        for (int kind = 0; kind < CONSUMER_KINDS; ++kind) {
+            const ConsumerArrays& arrays = consumers[kind];
+            writer.put(static_cast<uint64_t>(arrays.size()));
+            writer.put(demand_totals[kind]);
+            writer.put_array(arrays.ids);
+            writer.put_array(arrays.base_demand);
+            writer.put_array(arrays.demand);
+        }
+        writer.put(fleet.policy);
+        writer.put(static_cast<uint64_t>(fleet.size()));
+        writer.put(fleet.capacity_total);
+        writer.put(fleet.stored_total);
+        writer.put_array(fleet.ids);
+        writer.put_array(fleet.capacity);
+        writer.put_array(fleet.stored);
+        writer.put_array(fleet.max_charge);
+        writer.put_array(fleet.max_discharge);
+        writer.put_array(fleet.efficiency);
+        writer.put_array(fleet.priority);
+        writer.put(dispatcher.mode);
+        writer.put(dispatcher.horizon);
+        writer.put(dispatcher.levels);
+        writer.put(static_cast<int>(dispatcher.grid_charging));
+        writer.put(static_cast<uint64_t>(dispatcher.tariff.size()));
+        writer.put_array(dispatcher.tariff);
+    }
+
+    /**
+     * @brief Snapshot of the simulation state (see write_snapshot)
+     * @return Binary blob
+     */
+    std::vector<uint8_t> snapshot() const {
+        std::vector<uint8_t> blob(snapshot_size());
+        write_snapshot(blob.data());
+        return blob;
+    }
+
+    /**
+     * @brief Put the grid back in the state saved by write_snapshot
+     * The blob is fully checked before the grid is touched. Statistics and the versions of
+     * get_state_delta are kept, so a delta after restore reports what the restore changed.
+     * @param data Snapshot blob
+     * @param size Size of the blob in bytes
+     * @return GRID_OK, or GRID_SNAPSHOT_ERROR if the blob is invalid (the grid is then unchanged)
+     */
+    int restore(const uint8_t* data, size_t size) {
+        SnapshotReader reader{data, size};
+        uint32_t magic = 0, version = 0;
+        if (!reader.get(magic) || !reader.get(version) || magic != SNAPSHOT_MAGIC || version != SNAPSHOT_VERSION) {
+            return GRID_SNAPSHOT_ERROR;
+        }
+        SimulationClock restored_clock;
+        CounterRng restored_rng;
+        double restored_time = 0.0, restored_seasonality = 0.0, restored_purchase = 0.0, restored_surplus = 0.0;
+        Battery restored_battery(0.0, 0.0);
+        reader.get(restored_clock.time_step);
+        reader.get(restored_clock.step_count);
+        reader.get(restored_rng.seed);
+        reader.get(restored_rng.counter);
+        reader.get(restored_time);
+        reader.get(restored_seasonality);
+        reader.get(restored_purchase);
+        reader.get(restored_surplus);
+        reader.get(restored_battery.capacity);
+        reader.get(restored_battery.stored_energy);
+        reader.get(restored_battery.max_charge_rate);
+        if (!reader.get(restored_battery.max_discharge_rate)) return GRID_SNAPSHOT_ERROR;
+
+        ProducerArrays restored_producers[PRODUCER_KINDS];
+        ConsumerArrays restored_consumers[CONSUMER_KINDS];
+        double restored_production[PRODUCER_KINDS], restored_demand[CONSUMER_KINDS];
+        std::unordered_map<int, AssetSlot> restored_producer_slots, restored_consumer_slots;
+        for (int kind = 0; kind < PRODUCER_KINDS; ++kind) {
+            ProducerArrays& arrays = restored_producers[kind];
+            uint64_t n = 0;
+            if (!reader.get(n) || !reader.get(arrays.capacity_total) || !reader.get(restored_production[kind])
+                || !reader.get_array(arrays.ids, n) || !reader.get_array(arrays.capacity, n) || !reader.get_array(arrays.output, n)
+                || !index_slots(arrays.ids, kind, restored_producer_slots)) {
+                return GRID_SNAPSHOT_ERROR;
             }
         }
+        for (int kind = 0; kind < CONSUMER_KINDS; ++kind) {
+            ConsumerArrays& arrays = restored_consumers[kind];
+            uint64_t n = 0;
+            if (!reader.get(n) || !reader.get(restored_demand[kind])
+                || !reader.get_array(arrays.ids, n) || !reader.get_array(arrays.base_demand, n) || !reader.get_array(arrays.demand, n)
+                || !index_slots(arrays.ids, kind, restored_consumer_slots)) {
+                return GRID_SNAPSHOT_ERROR;
+            }
+        }
+        BatteryFleet restored_fleet;
+        std::unordered_map<int, size_t> restored_battery_slots;
+        uint64_t n_batteries = 0;
+        if (!reader.get(restored_fleet.policy) || !reader.get(n_batteries) || !reader.get(restored_fleet.capacity_total)
+            || !reader.get(restored_fleet.stored_total) || !reader.get_array(restored_fleet.ids, n_batteries)
+            || !reader.get_array(restored_fleet.capacity, n_batteries) || !reader.get_array(restored_fleet.stored, n_batteries)
+            || !reader.get_array(restored_fleet.max_charge, n_batteries) || !reader.get_array(restored_fleet.max_discharge, n_batteries)
+            || !reader.get_array(restored_fleet.efficiency, n_batteries) || !reader.get_array(restored_fleet.priority, n_batteries)
+            || restored_fleet.policy < 0 || restored_fleet.policy >= FLEET_POLICIES) {
+            return GRID_SNAPSHOT_ERROR;
+        }
+        for (size_t i = 0; i < restored_fleet.size(); ++i) {
+            if (!restored_battery_slots.emplace(restored_fleet.ids[i], i).second) return GRID_SNAPSHOT_ERROR;
+        }
+        DispatchOptimizer restored_dispatcher;
+        int restored_grid_charging = 0;
+        uint64_t n_prices = 0;
+        if (!reader.get(restored_dispatcher.mode) || !reader.get(restored_dispatcher.horizon) || !reader.get(restored_dispatcher.levels)
+            || !reader.get(restored_grid_charging) || !reader.get(n_prices) || !reader.get_array(restored_dispatcher.tariff, n_prices)
+            || restored_dispatcher.mode < 0 || restored_dispatcher.mode >= DISPATCH_MODES
+            || restored_dispatcher.horizon < 1 || restored_dispatcher.levels < 2 || (n_prices != 0 && n_prices != 24)) {
+            return GRID_SNAPSHOT_ERROR;
+        }
+        restored_dispatcher.grid_charging = restored_grid_charging != 0;
+        if (reader.remaining != 0 || !(restored_clock.time_step > 0)) return GRID_SNAPSHOT_ERROR;
+
+        // Blob valide : remplacer l'état d'un bloc
+        for (int kind = 0; kind < PRODUCER_KINDS; ++kind) {
+            producers[kind] = std::move(restored_producers[kind]);
+            production_totals[kind] = restored_production[kind];
+        }
+        for (int kind = 0; kind < CONSUMER_KINDS; ++kind) {
+            consumers[kind] = std::move(restored_consumers[kind]);
+            demand_totals[kind] = restored_demand[kind];
+        }
+        producer_slots = std::move(restored_producer_slots);
+        consumer_slots = std::move(restored_consumer_slots);
+        fleet = std::move(restored_fleet);
+        battery_slots = std::move(restored_battery_slots);
+        dispatcher = std::move(restored_dispatcher);
+        clock = restored_clock;
+        rng = restored_rng;
+        battery = restored_battery;
+        current_time = restored_time;
+        solar_seasonality = restored_seasonality;
+        purchase_energy = restored_purchase;
+        surplus_energy = restored_surplus;
+        return GRID_OK;
+    }
+
+    /**
+     * @brief Independent copy of the grid, to simulate a what-if branch from the current state
+     * Assets, battery, clock and random generator are copied, so the fork and the original
+     * continue identically until one of them is changed. Statistics of the fork start at zero.
+     * @return New grid, owned by the caller
+     */
+    SmartGrid fork() const {
+        SmartGrid copy(*this);
+        copy.reset_stats();
+        return copy;
+    }
+
+    /**
+     * @brief Turn the phase timers and counters on or off
+     * Disabled by default: a disabled grid only tests this flag once per phase.
+     * @param enabled true to start counting, false to stop (counters are kept)
+     */
+    void enable_stats(bool enabled) {
+        profiling = enabled;
+    }
+
+    bool stats_enabled() const { return profiling; }
+
+    /**
+     * @brief Counters accumulated while the instrumentation was enabled
+     * @return Copy of the counters
+     */
+    GridStats get_stats() const { return stats; }
+
+    /**
+     * @brief Set every counter back to zero
+     */
+    void reset_stats() {
+        stats = GridStats();
+    }
+
+    /**
+     * @brief Current state serialised to JSON, as returned by get_grid_state
+     * Timed and counted under PHASE_STATE_JSON when the instrumentation is enabled.
+     * @return JSON text of get_state()
+     */
+    std::string state_json() {
+        if (!profiling) return get_state().dump();
+        auto mark = StatClock::now();
+        json state = get_state();
+        std::string text = state.dump();
+        lap(PHASE_STATE_JSON, mark);
+        ++stats.state_json_calls;
+        // Arbre JSON + chaîne produite + JsonString et son tampon côté API C
+        stats.state_json_allocations += json_allocations(state) + (text.size() > std::string().capacity() ? 1 : 0) + 2;
+        stats.state_json_bytes += text.size() + 1;
+        return text;
     }
 
     /**
      * @brief Get the current state of the smart grid
+     * Production and demand are summed per type.
      * @return JSON object representing the current state of the smart grid
      */
     json get_state() const {
         json state;
         state["time"] = current_time;
+        state["day"] = clock.day_of_year();
         state["battery"] = {
             {"stored_energy", battery.stored_energy},
             {"capacity", battery.capacity}
         };
 
         json producers_state;
-        for (const auto& producer : producers) {
-            producers_state[producer.type] = producer.current_output;
+        for (int kind = 0; kind < PRODUCER_KINDS; ++kind) {
+            if (producers[kind].size() > 0) {
+                producers_state[PRODUCER_TYPES[kind]] = production_totals[kind];
+            }
         }
         state["producers"] = producers_state;
 
         json consumers_state;
-        for (const auto& consumer : consumers) {
-            consumers_state[consumer.type] = consumer.demand;
+        for (int kind = 0; kind < CONSUMER_KINDS; ++kind) {
+            if (consumers[kind].size() > 0) {
+                consumers_state[CONSUMER_TYPES[kind]] = demand_totals[kind];
+            }
         }
         state["consumers"] = consumers_state;
+        if (fleet.size() > 0) {
+            state["fleet"] = {
+                {"stored_energy", fleet.stored_total},
+                {"capacity", fleet.capacity_total},
+                {"batteries", fleet.size()}
+            };
+        }
         state["purchase_energy"] = purchase_energy;
         return state;
     }
-};
 
+private:
+    using StatClock = std::chrono::steady_clock;
+
+    /**
+     * @brief Register the IDs of one kind of restored assets
+     * @param ids IDs of the assets, in array order
+     * @param kind Kind of the assets
+     * @param slots Registry to fill
+     * @return false if an ID is already registered
+     */
+    static bool index_slots(const std::vector<int>& ids, int kind, std::unordered_map<int, AssetSlot>& slots) {
+        slots.reserve(slots.size() + ids.size());
+        for (size_t i = 0; i < ids.size(); ++i) {
+            if (!slots.emplace(ids[i], AssetSlot{kind, i}).second) return false;
+        }
+        return true;
+    }
+
+    /**
+     * @brief Add the time elapsed since mark to a phase, and move mark to now
+     * @param phase StatPhase to charge
+     * @param mark Start of the phase, updated to the start of the next one
+     */
+    void lap(int phase, StatClock::time_point& mark) {
+        auto now = StatClock::now();
+        stats.phase_ns[phase] += static_cast<uint64_t>(std::chrono::duration_cast<std::chrono::nanoseconds>(now - mark).count());
+        mark = now;
+    }
+
+    /**
+     * @brief Number of heap blocks held by a JSON value
+     * Objects count their map and one node per member, arrays their buffer, strings their
+     * buffer unless short enough for the small string optimisation; numbers are stored inline.
+     * @param value JSON value
+     * @return Number of allocations made to build it
+     */
+    static uint64_t json_allocations(const json& value) {
+        uint64_t count = 0;
+        if (value.is_object()) {
+            count += 1 + value.size();
+            for (auto it = value.begin(); it != value.end(); ++it) {
+                if (it.key().size() > std::string().capacity()) ++count;
+                count += json_allocations(it.value());
+            }
+        } else if (value.is_array()) {
+            count += 1;
+            for (const json& element : value) count += json_allocations(element);
+        } else if (value.is_string()) {
+            count += 1 + (value.get_ref<const std::string&>().size() > std::string().capacity() ? 1 : 0);
+        }
+        return count;
+    }
+
+    /**
+     * @brief Shared implementation of query_producers and query_consumers
+     * @param arrays Per-kind asset arrays
+     * @param n_kinds Number of kinds
+     * @param slots ID -> position of the assets
+     * @param values Member holding the value to report (output or demand)
+     * @return Number of matches
+     */
+    template <typename Arrays>
+    static int query_assets(const Arrays* arrays, int n_kinds, const std::unordered_map<int, AssetSlot>& slots,
+                            std::vector<double> Arrays::* values, int kind, int id_min, int id_max,
+                            int* ids, int* kinds, double* out, int max_count) {
+        int count = 0;
+        auto emit = [&](int asset_kind, size_t index) {
+            if (count < max_count) {
+                ids[count] = arrays[asset_kind].ids[index];
+                kinds[count] = asset_kind;
+                out[count] = (arrays[asset_kind].*values)[index];
+            }
+            ++count;
+        };
+        if (id_max <= id_min) return 0;
+        if (static_cast<int64_t>(id_max) - id_min <= static_cast<int64_t>(slots.size())) {
+            // Plage courte : recherche de chaque ID dans le registre
+            for (int64_t id = id_min; id < id_max; ++id) {
+                auto found = slots.find(static_cast<int>(id));
+                if (found != slots.end() && (kind < 0 || found->second.kind == kind)) {
+                    emit(found->second.kind, found->second.index);
+                }
+            }
+        } else {
+            for (int asset_kind = 0; asset_kind < n_kinds; ++asset_kind) {
+                if (kind >= 0 && asset_kind != kind) continue;
+                const std::vector<int>& asset_ids = arrays[asset_kind].ids;
+                for (size_t i = 0; i < asset_ids.size(); ++i) {
+                    if (asset_ids[i] >= id_min && asset_ids[i] < id_max) emit(asset_kind, i);
+                }
+            }
+        }
+        return count;
+    }
+
+    /**
+     * @brief First move of the look-ahead schedule of the main battery
+     * The forecast of the coming steps is the expectation of the built-in models: solar and
+     * demand profiles, solar at 90% and wind at 65% of their capacity (the mean of their noise),
+     * main grid at full capacity. Traces replayed are only known once their step is reached.
+     * @param energy Actual net energy of the current step (kWh)
+     * @return Energy to charge into the battery (kWh), negative to discharge
+     */
+    double lookahead_move(double energy) {
+        const int horizon = dispatcher.horizon;
+        const double hours = clock.step_hours();
+        dispatcher.net.resize(horizon);
+        dispatcher.price.resize(horizon);
+        dispatcher.net[0] = energy;
+        dispatcher.price[0] = dispatcher.price_at(current_time);
+        const double steady = producers[PRODUCER_WIND].capacity_total * 0.65 + producers[PRODUCER_GRID].capacity_total;
+        const double solar = producers[PRODUCER_SOLAR].capacity_total * 0.9;
+        const double households = static_cast<double>(consumers[CONSUMER_HOUSEHOLD].size());
+        const double industries = static_cast<double>(consumers[CONSUMER_INDUSTRY].size());
+        SimulationClock ahead = clock;
+        for (int t = 1; t < horizon; ++t) {
+            ++ahead.step_count;
+            double hour = ahead.hour_of_day();
+            double production = steady + solar * solar_profile(hour) * solar_season_factor(ahead.day_of_year(), solar_seasonality);
+            double demand = households * household_profile(hour) + industries * industry_profile(hour);
+            dispatcher.net[t] = (production - demand) * hours;
+            dispatcher.price[t] = dispatcher.price_at(hour);
+        }
+        return dispatcher.plan(battery.stored_energy, battery.capacity,
+                               battery.max_charge_rate * hours, battery.max_discharge_rate * hours);
+    }
+
+    /**
+     * @brief Fill the noise buffer with one random draw in [0, 1) per producer
+     * @param n Number of draws needed
+     */
+    void draw_noise(size_t n) {
+        noise.resize(std::max(noise.size(), n));
+        rng.fill_uniform(noise.data(), n);
+    }
+
+    /**
+     * @brief Check whether a trace row gives a value for a kind
+     * @param row Trace row, or nullptr when there is no trace
+     * @param kind Index of the kind in the row
+     * @return true if the trace value must replace the built-in model
+     */
+    static bool has_trace(const double* row, int kind) {
+        return row != nullptr && !std::isnan(row[kind]);
+    }
+
+    /**
+     * @brief Advance the clock and balance production, demand and battery for one time step
+     * @param producer_factors Optional trace row of PRODUCER_KINDS fractions of capacity
+     * @param consumer_trace Optional trace row of CONSUMER_KINDS demands per consumer (kW)
+     */
+    void step(const double* producer_factors = nullptr, const double* consumer_trace = nullptr) {
+        const bool timed = profiling;
+        auto mark = timed ? StatClock::now() : StatClock::time_point();
+        ++clock.step_count;
+        current_time = clock.hour_of_day();  // Cycle de 24h
+
+        // Mettre à jour la production et la demande
+        // Les totaux par type sont calculés pendant la mise à jour, sans second passage
+        if (has_trace(producer_factors, PRODUCER_SOLAR)) {
+            production_totals[PRODUCER_SOLAR] = producers[PRODUCER_SOLAR].update_outputs(producer_factors[PRODUCER_SOLAR]);
+        } else {
+            draw_noise(producers[PRODUCER_SOLAR].size());
+            double solar_factor = solar_profile(current_time) * solar_season_factor(clock.day_of_year(), solar_seasonality);
+            production_totals[PRODUCER_SOLAR] = producers[PRODUCER_SOLAR].update_outputs(solar_factor, 0.8, 0.2, noise.data());  // Random varation between 80% and 100%
+        }
+        if (has_trace(producer_factors, PRODUCER_WIND)) {
+            production_totals[PRODUCER_WIND] = producers[PRODUCER_WIND].update_outputs(producer_factors[PRODUCER_WIND]);
+        } else {
+            draw_noise(producers[PRODUCER_WIND].size());
+            production_totals[PRODUCER_WIND] = producers[PRODUCER_WIND].update_outputs(1.0, 0.3, 0.7, noise.data());  // Wind between 30% and 100% of its capacity
+        }
+        // Main grid at full capacity unless replayed
+        production_totals[PRODUCER_GRID] = producers[PRODUCER_GRID].update_outputs(has_trace(producer_factors, PRODUCER_GRID) ? producer_factors[PRODUCER_GRID] : 1.0);
+        if (timed) lap(PHASE_PRODUCERS, mark);
+        double consumer_demand[CONSUMER_KINDS] = {household_profile(current_time), industry_profile(current_time)};
+        for (int kind = 0; kind < CONSUMER_KINDS; ++kind) {
+            if (has_trace(consumer_trace, kind)) consumer_demand[kind] = consumer_trace[kind];
+            consumers[kind].update_demand(consumer_demand[kind]);
+        }
+        if (timed) lap(PHASE_CONSUMERS, mark);
+
+        // Calculer l'équilibre offre/demande
+        double total_production = 0.0;
+        for (int kind = 0; kind < PRODUCER_KINDS; ++kind) {
+            total_production += production_totals[kind];
+        }
+
+        double total_demand = 0.0;
+        for (int kind = 0; kind < CONSUMER_KINDS; ++kind) {
+            demand_totals[kind] = consumer_demand[kind] * consumers[kind].size();  // Same demand for every consumer of a kind
+            total_demand += demand_totals[kind];
+        }
+
+        double imbalance = total_production - total_demand;
+        if (timed) lap(PHASE_AGGREGATION, mark);
+        purchase_energy = 0.0;
+        surplus_energy = 0.0;
+        // Énergie prise par la batterie principale : tout l'écart en glouton, le premier pas du plan sinon
+        double energy = imbalance * clock.step_hours();
+        double move = dispatcher.mode == DISPATCH_LOOKAHEAD ? lookahead_move(energy) : energy;
+        double balance = energy;
+        if (move > 0) {
+            // Charger, depuis l'excédent seulement sauf si la recharge sur le réseau est permise
+            double stored_before = battery.stored_energy;
+            battery.charge(dispatcher.grid_charging ? move : std::min(move, std::max(0.0, energy)), clock.time_step);
+            balance -= battery.stored_energy - stored_before;
+        } else if (energy < 0) {
+            // Décharger, jamais au-delà du déficit réel
+            balance += battery.discharge(std::min(-move, -energy), clock.time_step);
+        }
+        if (balance > 0) {
+            // Excédent restant : la flotte de batteries, le reste est perdu (ou exporté par un GridNetwork)
+            surplus_energy = balance;
+            if (fleet.size() > 0) surplus_energy -= fleet.charge(surplus_energy, clock.step_hours());
+        } else if (balance < 0) {
+            // Puis la flotte de batteries, et acheter le reste au réseau principal
+            double remaining = -balance;
+            if (fleet.size() > 0) remaining -= fleet.discharge(remaining, clock.step_hours());
+            purchase_energy = std::max(0.0, remaining);
+        }
+        if (timed) {
+            lap(PHASE_BATTERY, mark);
+            ++stats.steps;
+        }
+    }
+};
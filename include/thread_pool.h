@@ -0,0 +1,110 @@
+#pragma once
+#include <vector>
+#include <thread>
+#include <mutex>
+#include <condition_variable>
+#include <atomic>
+#include <functional>
+#include <algorithm>
+
+/**
+ * @class ThreadPool
+ * @brief Fixed set of worker threads running parallel loops
+ * Workers are started once and reused by every parallel_for call, so a loop can be
+ * dispatched every simulation step without paying for thread creation.
+ */
+class ThreadPool {
+public:
+    /**
+     * @brief Constructor for ThreadPool
+     * @param n_threads Total number of threads including the caller (0 uses every hardware thread)
+     */
+    explicit ThreadPool(unsigned n_threads = 0) {
+        if (n_threads == 0) n_threads = std::max(1u, std::thread::hardware_concurrency());
+        for (unsigned i = 1; i < n_threads; ++i) {
+            workers.emplace_back([this] { worker_loop(); });
+        }
+    }
+
+    ThreadPool(const ThreadPool&) = delete;
+    ThreadPool& operator=(const ThreadPool&) = delete;
+
+    ~ThreadPool() {
+        {
+            std::lock_guard<std::mutex> lock(mutex);
+            stop = true;
+        }
+        start.notify_all();
+        for (auto& worker : workers) worker.join();
+    }
+
+    /**
+     * @brief Number of threads taking part in a loop, including the caller
+     */
+    size_t size() const { return workers.size() + 1; }
+
+    /**
+     * @brief Run fn over [0, n) split in chunks, and wait for every chunk to finish
+     * The calling thread works too. Calls must not be nested.
+     * @param n Number of iterations
+     * @param fn Called as fn(begin, end) on disjoint ranges covering [0, n)
+     */
+    void parallel_for(size_t n, const std::function<void(size_t, size_t)>& fn) {
+        if (n == 0) return;
+        if (workers.empty() || n == 1) {
+            fn(0, n);
+            return;
+        }
+        {
+            std::lock_guard<std::mutex> lock(mutex);
+            task = &fn;
+            task_size = n;
+            chunk = std::max<size_t>(1, n / (size() * 4));
+            next = 0;
+            busy = workers.size();
+            ++generation;
+        }
+        start.notify_all();
+        work();
+        std::unique_lock<std::mutex> lock(mutex);
+        done.wait(lock, [this] { return busy == 0; });
+        task = nullptr;
+    }
+
+private:
+    std::vector<std::thread> workers;
+    std::mutex mutex;
+    std::condition_variable start;
+    std::condition_variable done;
+    const std::function<void(size_t, size_t)>* task = nullptr;
+    size_t task_size = 0;
+    size_t chunk = 1;
+    std::atomic<size_t> next{0};
+    size_t busy = 0;  // Workers still running the current loop
+    unsigned long generation = 0;  // Incremented for every loop
+    bool stop = false;
+
+    void work() {
+        size_t begin;
+        while ((begin = next.fetch_add(chunk)) < task_size) {
+            (*task)(begin, std::min(begin + chunk, task_size));
+        }
+    }
+
+    void worker_loop() {
+        unsigned long seen = 0;
+        for (;;) {
+            {
+                std::unique_lock<std::mutex> lock(mutex);
+                start.wait(lock, [&] { return stop || generation != seen; });
+                if (stop) return;
+                seen = generation;
+            }
+            work();
+            {
+                std::lock_guard<std::mutex> lock(mutex);
+                if (--busy == 0) done.notify_one();
+            }
+        }
+    }
+};
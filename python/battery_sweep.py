@@ -0,0 +1,114 @@
+"""
+Battery sizing sweep.
+
+Evaluates every (battery_capacity, charge_rate) pair of a grid of values on a fixed asset
+configuration. Points run in parallel worker processes, each owning its own GridSimulator,
+and results are cached on disk under the hash of the full point configuration, so running
+a sweep again with one extra point only simulates that point.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# À incrémenter quand le modèle change, pour invalider le cache
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".sweep_cache"
+
+SWEEP_COLUMNS = [
+    "battery_capacity",
+    "charge_rate",
+    "total_purchase",
+    "peak_purchase",
+    "battery_cycles",
+    "cached",
+]
+
+
+def config_hash(config) -> str:
+    """Hash of a point configuration, used as cache key."""
+    payload = json.dumps({"version": CACHE_VERSION, **config}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def evaluate_point(config) -> dict:
+    """
+    Simulate one sweep point and summarise it.
+    - total_purchase : energy bought from the main grid over the run (kWh)
+    - peak_purchase : largest purchase in one time step (kWh)
+    - battery_cycles : energy moved in and out of the battery, in full cycles
+    """
+    # Import dans le worker : chaque processus charge sa propre librairie
+    from grid_simulator import GridSimulator
+
+    capacity = config["battery_capacity"]
+    simulator = GridSimulator(capacity, config["charge_rate"], seed=config["seed"])
+    for id, producer_type, producer_capacity in config["producers"]:
+        simulator.add_producer(id, producer_type, producer_capacity)
+    for id, consumer_type, base_demand in config["consumers"]:
+        simulator.add_consumer(id, consumer_type, base_demand)
+    results = simulator.run(config["n_steps"])
+
+    purchase = results["purchase_energy"]
+    stored = results["stored_energy"]
+    throughput = np.abs(np.diff(stored, prepend=capacity / 2)).sum()
+    return {
+        "total_purchase": float(purchase.sum()),
+        "peak_purchase": float(purchase.max()) if purchase.size else 0.0,
+        "battery_cycles": float(throughput / (2 * capacity)) if capacity > 0 else 0.0,
+    }
+
+
+def sweep(battery_capacities, charge_rates, producers, consumers, n_steps=8760, seed=0,
+          workers=None, cache_dir=DEFAULT_CACHE_DIR) -> pd.DataFrame:
+    """
+    Evaluate every (battery_capacity, charge_rate) pair.
+    `producers` and `consumers` are lists of (id, type, capacity) tuples, identical for every point.
+    Every point uses the same `seed`, so differences between points come from the battery only.
+    `workers` is the number of processes (None uses every CPU).
+    Returns one row per point with the columns of SWEEP_COLUMNS; `cached` tells whether the
+    row was read from `cache_dir` instead of simulated.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    configs = [
+        {
+            "battery_capacity": float(capacity),
+            "charge_rate": float(charge_rate),
+            "producers": [[int(id), str(kind), float(value)] for id, kind, value in producers],
+            "consumers": [[int(id), str(kind), float(value)] for id, kind, value in consumers],
+            "n_steps": int(n_steps),
+            "seed": int(seed),
+        }
+        for capacity, charge_rate in product(battery_capacities, charge_rates)
+    ]
+
+    rows = [None] * len(configs)
+    missing = []
+    for index, config in enumerate(configs):
+        cache_file = cache_dir / f"{config_hash(config)}.json"
+        if cache_file.exists():
+            with open(cache_file, "r") as f:
+                rows[index] = {**json.load(f), "cached": True}
+        else:
+            missing.append(index)
+
+    if missing:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(workers, len(missing))) as executor:
+            summaries = executor.map(evaluate_point, [configs[index] for index in missing])
+            for index, summary in zip(missing, summaries):
+                with open(cache_dir / f"{config_hash(configs[index])}.json", "w") as f:
+                    json.dump(summary, f)
+                rows[index] = {**summary, "cached": False}
+
+    for config, row in zip(configs, rows):
+        row["battery_capacity"] = config["battery_capacity"]
+        row["charge_rate"] = config["charge_rate"]
+    return pd.DataFrame(rows, columns=SWEEP_COLUMNS)
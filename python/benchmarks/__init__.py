@@ -0,0 +1,12 @@
+"""
+Performance benchmarks of the simulator: native step, ctypes boundary, data generator and GUI.
+
+Run from the `python` directory:
+
+    python -m benchmarks                          # every benchmark, saved to benchmarks/results/<commit>.json
+    python -m benchmarks --filter run_steps       # only the cases whose name contains "run_steps"
+    python -m benchmarks --compare OLD.json NEW.json
+
+The C++ microbenchmarks are included when the `microbench` target has been built
+(cmake -DSMART_GRID_BUILD_BENCHMARKS=ON).
+"""
@@ -0,0 +1,53 @@
+import argparse
+import json
+import os
+import sys
+
+from benchmarks.runner import compare, run_benchmarks, run_native, run_subprocess, save_results
+
+MODULES = ("benchmarks.bench_grid", "benchmarks.bench_generator", "benchmarks.bench_startup")
+# Qt dans un interpréteur séparé, en mode offscreen
+GUI_MODULE = "benchmarks.bench_gui"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the simulator benchmarks.")
+    parser.add_argument("--filter", help="only run the cases whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent timing each case")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per case")
+    parser.add_argument("--no-gui", action="store_true", help="skip the Qt benchmarks")
+    parser.add_argument("--no-native", action="store_true", help="skip the C++ microbenchmarks")
+    parser.add_argument("--no-save", action="store_true", help="do not write a result file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    parser.add_argument("--module", help=argparse.SUPPRESS)
+    parser.add_argument("--json", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print("\n".join(compare(*args.compare)))
+        return 0
+
+    if args.module:
+        # Appel interne de run_subprocess : résultats dans un fichier, stdout restant libre pour les logs
+        results = run_benchmarks([args.module], args.filter, args.min_time, args.repeat,
+                                 log=lambda line: print(line, file=sys.stderr))
+        with open(args.json, "w") as f:
+            json.dump(results, f)
+        # Sortie immédiate : la finalisation de PySide6 peut planter une fois les widgets détruits
+        sys.stderr.flush()
+        os._exit(0)
+
+    results = run_benchmarks(MODULES, args.filter, args.min_time, args.repeat)
+    if not args.no_gui:
+        results.update(run_subprocess(GUI_MODULE, args.filter, args.min_time, args.repeat,
+                                      env={"QT_QPA_PLATFORM": "offscreen"}))
+    if not args.no_native:
+        results.update({case: result for case, result in run_native(min_time=args.min_time).items()
+                        if not args.filter or args.filter in case})
+    if not args.no_save:
+        print(f"Results written to {save_results(results)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
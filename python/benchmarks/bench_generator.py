@@ -0,0 +1,16 @@
+"""Throughput of the synthetic profile generator."""
+from data_generator import generate_24h_simulation, generate_profiles
+from benchmarks.runner import benchmark
+
+
+@benchmark()
+def generate_24h():
+    """Legacy 24 h list-of-dicts profile."""
+    return (lambda: generate_24h_simulation(seed=1)), 1
+
+
+@benchmark(params=(60, 1), unit="step")
+def generate_year(resolution_minutes):
+    """One year of profiles at the given resolution."""
+    n_steps = 365 * 24 * 60 // resolution_minutes
+    return (lambda: generate_profiles(days=365, resolution_minutes=resolution_minutes, seed=1)), n_steps
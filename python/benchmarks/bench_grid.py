@@ -0,0 +1,133 @@
+"""Native step, state readout and ctypes boundary costs of GridSimulator."""
+import numpy as np
+from grid_simulator import GridNetwork, GridSimulator, lib
+from benchmarks.runner import benchmark
+
+ASSET_COUNTS = (10, 1_000, 100_000)
+
+
+def build_grid(n_assets, seed=1):
+    """Grid with `n_assets` producers and consumers spread over every type, plus a main grid
+    large enough that nothing is purchased (update() logs every purchase)."""
+    simulator = GridSimulator(battery_capacity=1000.0, charge_rate=100.0, seed=seed)
+    ids = np.arange(n_assets)
+    simulator.add_producers(ids, ids % 3, np.full(n_assets, 5.0))
+    simulator.add_consumers(ids, ids % 2, np.full(n_assets, 3.0))
+    simulator.add_producer(n_assets, "grid", 1e9)
+    simulator.run(1)
+    return simulator
+
+
+@benchmark(params=ASSET_COUNTS, unit="step")
+def run_steps(n_assets):
+    """Steps simulated natively, 100 per call to GridSimulator.run."""
+    simulator = build_grid(n_assets)
+    return (lambda: simulator.run(100)), 100
+
+
+@benchmark(params=ASSET_COUNTS, unit="step")
+def update(n_assets):
+    """One ctypes call per step (SmartGrid::update)."""
+    simulator = build_grid(n_assets)
+    return simulator.update, 1
+
+
+@benchmark(params=ASSET_COUNTS)
+def get_state_json(n_assets):
+    """get_grid_state + json.loads + free_state."""
+    simulator = build_grid(n_assets)
+    return simulator.get_state, 1
+
+
+@benchmark(params=ASSET_COUNTS)
+def get_state_array(n_assets):
+    simulator = build_grid(n_assets)
+    return simulator.get_state_array, 1
+
+
+@benchmark()
+def get_state_delta():
+    simulator = build_grid(10)
+    version, _ = simulator.get_state_delta()
+    return (lambda: simulator.get_state_delta(version)), 1
+
+
+@benchmark()
+def ctypes_call():
+    """Smallest call through the ctypes boundary."""
+    simulator = build_grid(10)
+    grid_ptr = simulator.grid_ptr
+    return (lambda: lib.grid_time_step(grid_ptr)), 1
+
+
+@benchmark(params=(10, 100_000))
+def add_remove_producer(n_assets):
+    """Connect then disconnect one producer (2 calls)."""
+    simulator = build_grid(n_assets)
+    id = n_assets + 1
+
+    def operation():
+        simulator.add_producer(id, "solar", 5.0)
+        simulator.remove_producer(id)
+    return operation, 1
+
+
+@benchmark(params=(100, 10_000), unit="asset")
+def query_producers(n_ids):
+    """Per-asset readout of an id range of a 100k-asset grid."""
+    simulator = build_grid(100_000)
+    return (lambda: simulator.query_producers(ids=(0, n_ids))), n_ids
+
+
+@benchmark(params=ASSET_COUNTS)
+def fork(n_assets):
+    """Native copy of a grid (the fork is freed by the next call)."""
+    simulator = build_grid(n_assets)
+    return simulator.fork, 1
+
+
+@benchmark(params=ASSET_COUNTS)
+def snapshot_restore(n_assets):
+    simulator = build_grid(n_assets)
+    return (lambda: simulator.restore(simulator.snapshot())), 1
+
+
+@benchmark(params=(10, 100, 300), unit="step")
+def network_run(n_grids):
+    """Ring of 15-minute microgrids (50 producers and households each) exchanging over 20 kW lines."""
+    network = GridNetwork()
+    ids = np.arange(50)
+    for g in range(n_grids):
+        simulator = GridSimulator(battery_capacity=50.0, charge_rate=5.0, seed=g, time_step=900.0)
+        simulator.add_producers(ids, ids % 2, np.full(50, 2.0 + 8.0 * (g % 3)))
+        simulator.add_consumers(ids, np.zeros(50, dtype=np.int32), np.full(50, 3.0))
+        network.add_grid(simulator)
+    for g in range(n_grids):
+        network.add_link(g, (g + 1) % n_grids, 20.0)
+    return (lambda: network.run(96)), 96
+
+
+@benchmark(params=("proportional", "priority", "soc_balancing"), unit="step")
+def fleet_step(policy):
+    """1000 producers and 1000 households with 500 distributed batteries, charged and discharged daily."""
+    simulator = GridSimulator(battery_capacity=10.0, charge_rate=1.0, seed=1)
+    ids = np.arange(1000)
+    simulator.add_producers(ids, ids % 3, np.full(1000, 5.0))
+    simulator.add_consumers(ids, np.zeros(1000, dtype=np.int32), np.full(1000, 3.0))
+    n = 500
+    rng = np.random.default_rng(0)
+    simulator.add_batteries(np.arange(n), rng.uniform(5.0, 20.0, n), rng.uniform(2.0, 7.0, n),
+                            efficiencies=0.9, priorities=rng.integers(0, 10, n))
+    simulator.set_fleet_policy(policy)
+    return (lambda: simulator.run(100)), 100
+
+
+@benchmark(params=(24, 48, 96), unit="step")
+def lookahead_step(horizon):
+    """Main battery dispatched by the look-ahead optimizer (101 levels) with an hourly tariff and grid charging."""
+    simulator = GridSimulator(battery_capacity=200.0, charge_rate=25.0, seed=1)
+    ids = np.arange(100)
+    simulator.add_producers(ids, ids % 3, np.full(100, 5.0))
+    simulator.add_consumers(ids, np.zeros(100, dtype=np.int32), np.full(100, 3.0))
+    simulator.set_dispatch("lookahead", horizon=horizon, grid_charging=True, tariff=[0.1] * 7 + [0.3] * 17)
+    return (lambda: simulator.run(100)), 100
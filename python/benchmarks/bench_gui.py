@@ -0,0 +1,48 @@
+"""
+Offscreen cost of a Results tab refresh (ResultsWidget.update_results) vs. plotted history.
+Run in its own interpreter by the benchmark runner, with QT_QPA_PLATFORM=offscreen.
+"""
+import numpy as np
+from benchmarks.runner import benchmark
+from benchmarks.bench_grid import build_grid
+
+HISTORY_LENGTHS = (1_000, 10_000, 20_000)
+
+# Avec Python < 3.12, PySide6 6.12 perd une référence à True/None à chaque émission de signal
+# (plusieurs par setData de pyqtgraph) : ces références supplémentaires évitent que les milliers
+# d'images d'un benchmark n'amènent leur compteur à zéro
+_REFERENCES = [True, False, None] * 1_000_000
+
+
+def results_widget(history_length):
+    """Results tab of a full GUI whose plots already hold `history_length` steps."""
+    from PySide6.QtWidgets import QApplication
+    from simulator_gui import Widgets
+
+    app = QApplication.instance() or QApplication([])
+    widgets = Widgets()
+    results = widgets.tabs.widget(2)
+    # Les graphiques sont créés au premier affichage de l'onglet
+    widgets.tabs.setCurrentWidget(results)
+    widgets.show()
+    history = build_grid(100).run(history_length + 1)
+    batches = iter([{name: column[:history_length] for name, column in history.items()}])
+    step = {name: column[history_length:] for name, column in history.items()}
+    # Le worker n'est pas démarré : la GUI reçoit un lot préparé à chaque image
+    results.worker.take = lambda: next(batches, step)
+    results.update_results()
+    return app, widgets, results
+
+
+@benchmark(params=HISTORY_LENGTHS, unit="frame")
+def update_results(history_length):
+    """Data path of one frame: take a batch, update the gauge and the curves."""
+    app, widgets, results = results_widget(history_length)
+    return (lambda: (app, widgets) and results.update_results()), 1
+
+
+@benchmark(params=HISTORY_LENGTHS, unit="frame")
+def update_and_render(history_length):
+    """One frame including rendering the Results tab."""
+    app, widgets, results = results_widget(history_length)
+    return (lambda: (app, widgets) and (results.update_results(), results.grab())), 1
@@ -0,0 +1,22 @@
+"""
+Wall time of a cold import in a fresh interpreter (interpreter startup included).
+See `python -m benchmarks.importtime` for the breakdown per imported module.
+"""
+import subprocess
+import sys
+from benchmarks.importtime import PYTHON_DIR, STARTUP_MODULES
+from benchmarks.runner import benchmark
+
+
+@benchmark(params=STARTUP_MODULES, unit="import")
+def cold_import(module):
+    """`python -c "import module"`: what a script or the GUI pays before its first line runs."""
+    command = [sys.executable, "-c", f"import {module}"]
+    return (lambda: subprocess.run(command, cwd=PYTHON_DIR, check=True)), 1
+
+
+@benchmark(unit="call")
+def first_grid():
+    """Import grid_simulator and create a first grid, which loads the native library."""
+    command = [sys.executable, "-c", "from grid_simulator import GridSimulator; GridSimulator(200.0, 20.0)"]
+    return (lambda: subprocess.run(command, cwd=PYTHON_DIR, check=True)), 1
@@ -0,0 +1,61 @@
+"""
+Cold-start import time, measured with `python -X importtime` in a fresh interpreter.
+
+    python -m benchmarks.importtime [module ...] [--top N]
+
+prints the cumulative import time of each module (grid_simulator and simulator_gui by default)
+and the slowest imports it pulls in, so the startup of the GUI and of the scripts can be tracked.
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+PYTHON_DIR = Path(__file__).parent.parent
+STARTUP_MODULES = ("grid_simulator", "simulator_gui")
+
+
+def measure(module, python=sys.executable):
+    """
+    Imports triggered by a cold `import module`, in import order: list of
+    (name, depth, self_us, cumulative_us), depth 0 being imported by the statement itself.
+    """
+    stderr = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], cwd=PYTHON_DIR,
+                            check=True, capture_output=True, text=True).stderr
+    return parse_importtime(stderr)
+
+
+def parse_importtime(text):
+    """Entries of `-X importtime` output (see measure); other lines are ignored."""
+    entries = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Deux espaces d'indentation par niveau d'import imbriqué
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def total_us(entries, module):
+    """Cumulative import time of `module` itself, 0 if it was already imported."""
+    return next((cumulative for name, depth, _, cumulative in entries if name == module and depth == 0), 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.importtime", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("modules", nargs="*", default=STARTUP_MODULES, help="modules to import")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports listed per module")
+    args = parser.parse_args(argv)
+    for module in args.modules:
+        entries = measure(module)
+        print(f"{module}: {total_us(entries, module) / 1e3:.1f} ms")
+        slowest = sorted((entry for entry in entries if entry[0] != module), key=lambda entry: -entry[3])
+        for name, _, _, cumulative in slowest[:args.top]:
+            print(f"  {name:<40} {cumulative / 1e3:>8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
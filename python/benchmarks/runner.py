@@ -0,0 +1,170 @@
+"""
+Benchmark registry, timing and JSON result files.
+
+A benchmark is a function decorated with `benchmark`, called once per parameter to set up the
+case. It returns `(operation, units)`: `operation` is the callable timed, and `units` the
+number of units (steps, calls, rows...) it processes, so results are reported per unit.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+NATIVE_BENCHMARK = Path(__file__).parent.parent.parent / "build" / "microbench"
+
+# Nom complet "module.fonction" -> (fonction, paramètres, unité)
+BENCHMARKS = {}
+
+
+def benchmark(params=(None,), unit="call"):
+    """Register a benchmark run once per value of `params`; `unit` names what is counted."""
+    def register(function):
+        name = f"{function.__module__.rsplit('.', 1)[-1]}.{function.__name__}"
+        BENCHMARKS[name] = (function, tuple(params), unit)
+        return function
+    return register
+
+
+def case_name(name, param):
+    return name if param is None else f"{name}[{param}]"
+
+
+def time_case(operation, units, min_time=0.2, repeat=5):
+    """
+    Time `operation` like timeit.autorange: each sample repeats it until `min_time / repeat`
+    has elapsed. Returns per-unit statistics in seconds.
+    """
+    operation()  # Échauffement
+    sample_time = min_time / repeat
+    samples = []
+    for _ in range(repeat):
+        number = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < sample_time or number == 0:
+            operation()
+            number += 1
+            elapsed = time.perf_counter() - start
+        samples.append(elapsed / (number * units))
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(modules, pattern=None, min_time=0.2, repeat=5, log=print):
+    """Import `modules`, then time each of their cases whose name contains `pattern`."""
+    import importlib
+
+    for module in modules:
+        importlib.import_module(module)
+    # Un module peut en importer un autre (bench_gui -> bench_grid) : seuls ceux demandés sont lancés
+    prefixes = tuple(f"{module.rsplit('.', 1)[-1]}." for module in modules)
+    results = {}
+    for name, (function, params, unit) in BENCHMARKS.items():
+        if not name.startswith(prefixes):
+            continue
+        for param in params:
+            case = case_name(name, param)
+            if pattern and pattern not in case:
+                continue
+            operation, units = function() if param is None else function(param)
+            results[case] = {**time_case(operation, units, min_time, repeat), "unit": f"s/{unit}"}
+            log(f"{case:<50} {format_seconds(results[case]['median']):>12}/{unit}")
+    return results
+
+
+def run_native(path=NATIVE_BENCHMARK, min_time=0.2):
+    """Results of the C++ microbench target, or {} if it has not been built."""
+    if not Path(path).exists():
+        return {}
+    output = subprocess.run([str(path), str(min_time)], check=True, capture_output=True, text=True).stdout
+    return {f"native.{case}": {"median": seconds, "unit": "s/op"} for case, seconds in json.loads(output).items()}
+
+
+def run_subprocess(module, pattern=None, min_time=0.2, repeat=5, env=None):
+    """Run the benchmarks of `module` in a separate interpreter (e.g. to isolate Qt)."""
+    with tempfile.TemporaryDirectory() as directory:
+        output = Path(directory) / "results.json"
+        command = [sys.executable, "-m", "benchmarks", "--module", module, "--min-time", str(min_time),
+                   "--repeat", str(repeat), "--json", str(output)]
+        if pattern:
+            command += ["--filter", pattern]
+        # La progression passe par stderr ; stdout (logs du simulateur) est ignoré
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, cwd=Path(__file__).parent.parent,
+                       env={**os.environ, **(env or {})})
+        with open(output, "r") as f:
+            return json.load(f)
+
+
+def git_revision():
+    """(commit, dirty) of the working tree, or ("unknown", False) outside git."""
+    root = Path(__file__).parent
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                                check=True, capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, bool(status.strip())
+
+
+def save_results(results, directory=RESULTS_DIR):
+    """Write results with the commit and machine they come from; returns the file path."""
+    commit, dirty = git_revision()
+    document = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{commit}{'-dirty' if dirty else ''}.json"
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+    return path
+
+
+def compare(old_path, new_path, threshold=0.1):
+    """Lines comparing the medians of two result files; changes above `threshold` are flagged."""
+    with open(old_path, "r") as f:
+        old = json.load(f)
+    with open(new_path, "r") as f:
+        new = json.load(f)
+    lines = [f"{'benchmark':<50} {old['commit']:>12} {new['commit']:>12} {'ratio':>8}"]
+    for case in sorted(set(old["results"]) | set(new["results"])):
+        before = old["results"].get(case, {}).get("median")
+        after = new["results"].get(case, {}).get("median")
+        if before is None or after is None:
+            ratio, flag = "", "  (missing)"
+        else:
+            ratio = f"{after / before:8.2f}"
+            flag = "  slower" if after > before * (1 + threshold) else "  faster" if after < before * (1 - threshold) else ""
+        lines.append(f"{case:<50} {format_seconds(before):>12} {format_seconds(after):>12} {ratio:>8}{flag}")
+    return lines
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
@@ -1,69 +1,178 @@
-import numpy as np
-import pandas as pd
 import json
-import matplotlib.pyplot as plt
+from itertools import islice
+import numpy as np
 
-def generate_24h_simulation() -> list:
+# Colonnes produites par generate_profiles / iter_profiles
+PROFILE_COLUMNS = (
+    "hour",
+    "household_demand",
+    "industry_demand",
+    "solar_production",
+    "wind_production",
+    "solar_factor",
+    "wind_factor",
+)
+
+def _profile_chunk(start_step, n_steps, step_hours, solar_capacity, wind_capacity, rng) -> dict:
+    """Profils des pas [start_step, start_step + n_steps), calculés en une passe NumPy."""
+    hour = (start_step + np.arange(n_steps)) * step_hours
+    time = hour % 24.0  # Heure de la journée
+
+    # 1. Consommation (kW)
+    # - Ménages : pic le matin (7h-9h) et le soir (18h-22h)
+    household_demand = 2.0 + 5.0 * (
+        np.exp(-0.5 * ((time - 8) / 2)**2) +  # Pic le matin
+        np.exp(-0.5 * ((time - 20) / 2)**2)   # Pic le soir
+    )
+    # - Industries : demande constante avec un léger pic en journée
+    industry_demand = 50.0 + 30.0 * np.exp(-0.5 * ((time - 12) / 6)**2)
+
+    # Un tirage (solaire, éolien) par pas : les morceaux successifs suivent la même séquence
+    noise = rng.random((n_steps, 2))
+
+    # 2. Production solaire (kW) - dépend de l'heure (0 = nuit, 12 = midi)
+    solar_factor = np.maximum(0.0, 1.0 - np.abs((time - 12.0) / 6.0))  # Pic à midi
+    solar_production = solar_capacity * solar_factor * (0.8 + 0.2 * noise[:, 0])  # Variation aléatoire légère
+
+    # 3. Production éolienne (kW) - variations aléatoires réalistes
+    wind_factor = 0.3 + 0.7 * noise[:, 1]  # Vent entre 30% et 100% de sa capacité
+    wind_production = wind_capacity * wind_factor
+
+    return {
+        "hour": hour,
+        "household_demand": household_demand,
+        "industry_demand": industry_demand,
+        "solar_production": solar_production,
+        "wind_production": wind_production,
+        "solar_factor": solar_factor,
+        "wind_factor": wind_factor,
+    }
+
+def iter_profiles(days=1.0, resolution_minutes=60, chunk_steps=100_000, solar_capacity=50.0,
+                  wind_capacity=30.0, seed=None):
+    """
+    Yield the profiles of generate_profiles in chunks of at most `chunk_steps` steps, for
+    horizons that do not fit in memory. Concatenating the chunks gives the same arrays as
+    generate_profiles with the same arguments.
+    """
+    n_steps = int(round(days * 24 * 60 / resolution_minutes))
+    step_hours = resolution_minutes / 60.0
+    rng = np.random.default_rng(seed)
+    for start_step in range(0, n_steps, chunk_steps):
+        yield _profile_chunk(start_step, min(chunk_steps, n_steps - start_step), step_hours,
+                             solar_capacity, wind_capacity, rng)
+
+def generate_profiles(days=1.0, resolution_minutes=60, solar_capacity=50.0, wind_capacity=30.0,
+                      seed=None) -> dict:
     """
-    Génère des données simulées pour 24 heures :
-    - Consommation (ménages + industries)
-    - Production solaire (basée sur l'heure de la journée)
-    - Production éolienne (variations aléatoires réalistes)
+    Génère des profils simulés sur `days` jours avec un pas de `resolution_minutes` minutes :
+    - Consommation d'un ménage et d'une industrie (kW)
+    - Production solaire (basée sur l'heure de la journée) et éolienne (variations aléatoires)
+    - Facteurs météo solaire et éolien (0 à 1)
+    Returns a dict mapping each name of PROFILE_COLUMNS to a NumPy array, `hour` being the
+    elapsed time in hours since the start.
     """
-    hours = list(range(24))
-    data = []
-
-    for hour in hours:
-        # Heure en format décimal (ex: 7.5 pour 7h30)
-        time = hour
-
-        # 1. Consommation (kW)
-        # - Ménages : pic le matin (7h-9h) et le soir (18h-22h)
-        household_demand = 2.0 + 5.0 * (
-            np.exp(-0.5 * ((time - 8) / 2)**2) +  # Pic le matin
-            np.exp(-0.5 * ((time - 20) / 2)**2)   # Pic le soir
-        )
-        # - Industries : demande constante avec un léger pic en journée
-        industry_demand = 50.0 + 30.0 * np.exp(-0.5 * ((time - 12) / 6)**2)
-
-        # 2. Production solaire (kW) - dépend de l'heure (0 = nuit, 12 = midi)
-        solar_factor = max(0.0, 1.0 - abs((time - 12.0) / 6.0))  # Pic à midi
-        solar_production = 50.0 * solar_factor * (0.8 + 0.2 * np.random.random())  # Variation aléatoire légère
-
-        # 3. Production éolienne (kW) - variations aléatoires réalistes
-        wind_factor = 0.3 + 0.7 * np.random.random()  # Vent entre 30% et 100% de sa capacité
-        wind_production = 30.0 * wind_factor
-
-        data.append({
-            "hour": hour,
-            "time": f"{hour:02d}:00",
-            "household_demand": max(0.0, household_demand),
-            "industry_demand": max(0.0, industry_demand),
-            "solar_production": max(0.0, solar_production),
-            "wind_production": max(0.0, wind_production),
+    n_steps = int(round(days * 24 * 60 / resolution_minutes))
+    rng = np.random.default_rng(seed)
+    return _profile_chunk(0, n_steps, resolution_minutes / 60.0, solar_capacity, wind_capacity, rng)
+
+def _records(chunk):
+    """Morceau de profils -> enregistrements au format historique de generate_24h_simulation, un par pas."""
+    columns = {name: np.asarray(chunk[name]).tolist() for name in PROFILE_COLUMNS}
+    for index, hour in enumerate(columns["hour"]):
+        minutes = int(round(hour * 60)) % (24 * 60)
+        yield {
+            # Heure entière comme dans l'ancien format quand le pas est horaire
+            "hour": int(hour) if float(hour).is_integer() else hour,
+            "time": f"{minutes // 60:02d}:{minutes % 60:02d}",
+            "household_demand": columns["household_demand"][index],
+            "industry_demand": columns["industry_demand"][index],
+            "solar_production": columns["solar_production"][index],
+            "wind_production": columns["wind_production"][index],
             "weather_factor": {
-                "solar": solar_factor,
-                "wind": wind_factor
+                "solar": columns["solar_factor"][index],
+                "wind": columns["wind_factor"][index]
             }
-        })
+        }
+
+def generate_24h_simulation(seed=None) -> list:
+    """
+    Génère des données simulées pour 24 heures, une entrée par heure (format historique).
+    Utiliser generate_profiles pour d'autres horizons ou résolutions.
+    """
+    return list(_records(generate_profiles(days=1, resolution_minutes=60, seed=seed)))
 
-    return data
+def _as_chunks(profiles):
+    """Un dict de profils ou un itérable de morceaux (iter_profiles) -> itérable de morceaux."""
+    return [profiles] if isinstance(profiles, dict) else profiles
 
-def save_to_json(data, filename="simulation_24h.json"):
-    """Sauvegarde les données générées dans un fichier JSON."""
+def save_to_json(profiles, filename="simulation_24h.json"):
+    """
+    Sauvegarde les données générées dans un fichier JSON : une liste d'enregistrements, un par pas,
+    au format de generate_24h_simulation (indentation de 4).
+    Accepte generate_24h_simulation, generate_profiles ou iter_profiles ; les profils sont écrits
+    morceau par morceau, la mémoire reste bornée par la taille d'un morceau.
+    """
+    encoder = json.JSONEncoder(indent=4)
+    if isinstance(profiles, list):
+        records = iter(profiles)
+    else:
+        records = (record for chunk in _as_chunks(profiles) for record in _records(chunk))
     with open(filename, "w") as f:
-        json.dump(data, f, indent=4)
+        f.write("[")
+        separator = "\n"
+        # Encodés par lots de 1000 : contenu de la liste indentée sans ses crochets, les lots se raboutent
+        for batch in iter(lambda: list(islice(records, 1000)), []):
+            f.write(separator + encoder.encode(batch)[2:-2])
+            separator = ",\n"
+        f.write("]" if separator == "\n" else "\n]")
     print(f"Données sauvegardées dans {filename}")
 
-def save_to_csv(data, filename="simulation_24h.csv"):
-    """Sauvegarde les données générées dans un fichier CSV."""
-    df = pd.DataFrame(data)
-    df.to_csv(filename, index=False)
+def save_to_csv(profiles, filename="simulation_24h.csv"):
+    """
+    Sauvegarde les profils (generate_profiles ou iter_profiles) dans un fichier CSV,
+    morceau par morceau.
+    """
+    import pandas as pd
+
+    with open(filename, "w", newline="") as f:
+        for index, chunk in enumerate(_as_chunks(profiles)):
+            pd.DataFrame(chunk, columns=PROFILE_COLUMNS).to_csv(f, index=False, header=(index == 0))
     print(f"Données sauvegardées dans {filename}")
 
-def plot_simulation(data):
-    """Affiche un graphique des données générées."""
-    df = pd.DataFrame(data)
+def save_to_npy(profiles, directory="simulation_profiles"):
+    """
+    Sauvegarde les profils (generate_profiles ou iter_profiles) en colonnes .npy dans `directory`,
+    morceau par morceau. Relire avec results_store.open_results.
+    """
+    from results_store import ResultsWriter
+
+    with ResultsWriter(directory, PROFILE_COLUMNS) as writer:
+        for chunk in _as_chunks(profiles):
+            writer.append(chunk)
+    print(f"Données sauvegardées dans {directory}")
+
+def _time_ticks(hours):
+    """Graduations de l'axe du temps (heures écoulées) : au plus 24, libellées en heure du jour ou en jours."""
+    step = hours[1] - hours[0] if len(hours) > 1 else 1.0
+    span = hours[-1] - hours[0] + step
+    if span <= 24:
+        ticks = np.arange(np.floor(hours[0]), hours[-1] + step, 1.0)
+        return ticks, [f"{int(tick) % 24:02d}:00" for tick in ticks]
+    interval = next((n for n in (2, 3, 6, 12) if span / n <= 24), 24 * np.ceil(span / (24 * 24)))
+    ticks = np.arange(np.floor(hours[0] / interval) * interval, hours[-1] + step, interval)
+    return ticks, [f"J{int(tick // 24) + 1} {int(tick) % 24:02d}:00" for tick in ticks]
+
+def plot_simulation(profiles):
+    """Affiche un graphique des profils générés, sur l'horizon qu'ils couvrent."""
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    df = pd.DataFrame(profiles, columns=PROFILE_COLUMNS)
+    hours = df["hour"].to_numpy()
+    step = hours[1] - hours[0] if len(hours) > 1 else 1.0
+    span = len(hours) * step
+    horizon = f"{span:g}h" if span <= 48 else f"{span / 24:g} jours"
 
     plt.figure(figsize=(12, 6))
 
@@ -75,49 +184,56 @@ def plot_simulation(data):
     plt.plot(df["hour"], df["solar_production"], label="Solaire", color="orange")
     plt.plot(df["hour"], df["wind_production"], label="Éolien", color="blue")
 
-    plt.xlabel("Heure de la journée")
+    plt.xlabel("Heure de la journée" if span <= 24 else "Temps")
     plt.ylabel("Puissance (kW)")
-    plt.title("Simulation de la Consommation et Production sur 24h")
+    plt.title(f"Simulation de la Consommation et Production sur {horizon}")
     plt.legend()
     plt.grid(True)
-    plt.xticks(range(24), [f"{h:02d}:00" for h in range(24)], rotation=45)
+    plt.xticks(*_time_ticks(hours), rotation=45)
     plt.tight_layout()
-    plt.savefig("simulation_24h.png")
+    plt.savefig(f"simulation_{horizon.replace(' ', '_')}.png")
     plt.show()
 
-def run_simulation_with_data(data, grid_simulator):
+def run_simulation_with_data(profiles, grid_simulator, solar_capacity=50.0, wind_capacity=30.0):
     """
-    Lance une simulation avec les données générées.
+    Lance une simulation avec les profils générés (generate_profiles), rejoués en un seul appel natif.
     `grid_simulator` doit être une instance de ton simulateur (ex: GridSimulator).
+    `solar_capacity` et `wind_capacity` sont celles utilisées pour générer les profils : la production
+    rejouée est exprimée en fraction de capacité pour chaque producteur de la grille.
     """
-    for hour_data in data:
-        weather_factor = (hour_data["weather_factor"]["solar"] + hour_data["weather_factor"]["wind"]) / 2.0
-        grid_simulator.update(weather_factor)
-
-        # Récupérer et afficher l'état du réseau
-        state = grid_simulator.get_state()
-        print(f"Heure {hour_data['time']}:")
-        print(f"  Consommation: {hour_data['household_demand'] + hour_data['industry_demand']:.1f} kW")
-        print(f"  Production: Solaire={hour_data['solar_production']:.1f}kW, Éolien={hour_data['wind_production']:.1f}kW")
-        print(f"  Batterie: {state['battery']['stored_energy']:.1f}/{state['battery']['capacity']:.1f} kWh")
-        print("---")
+    results = grid_simulator.replay(
+        producer_factors={
+            "solar": profiles["solar_production"] / solar_capacity,
+            "wind": profiles["wind_production"] / wind_capacity,
+        },
+        consumer_demand={
+            "household": profiles["household_demand"],
+            "industry": profiles["industry_demand"],
+        },
+    )
+
+    # Afficher un résumé de la simulation
+    print(f"Pas simulés : {len(results['time'])}")
+    print(f"  Énergie achetée : {results['purchase_energy'].sum():.1f} kWh (pic {results['purchase_energy'].max():.1f} kWh)")
+    print(f"  Batterie en fin de simulation : {results['stored_energy'][-1]:.1f} kWh")
+    return results
 
 if __name__ == "__main__":
     # Générer les données
-    simulation_data = generate_24h_simulation()
+    simulation_profiles = generate_profiles(days=1, resolution_minutes=60)
 
     # Sauvegarder les données
-    save_to_json(simulation_data)
-    save_to_csv(simulation_data)
+    save_to_json(simulation_profiles)
+    save_to_csv(simulation_profiles)
 
     # Afficher un graphique
-    plot_simulation(simulation_data)
-
-    # Exemple d'utilisation avec ton simulateur (à décommenter une fois intégré)
-    # from grid_simulator import GridSimulator
-    # simulator = GridSimulator(battery_capacity=200.0, charge_rate=20.0)
-    # simulator.add_producer(b"solar", 50.0)
-    # simulator.add_producer(b"wind", 30.0)
-    # simulator.add_consumer(b"household", 5.0)
-    # simulator.add_consumer(b"industry", 100.0)
-    # run_simulation_with_data(simulation_data, simulator)
+    plot_simulation(simulation_profiles)
+
+    # Rejouer les profils dans le simulateur
+    from grid_simulator import GridSimulator
+    simulator = GridSimulator(battery_capacity=200.0, charge_rate=20.0)
+    simulator.add_producer(1, "solar", 50.0)
+    simulator.add_producer(2, "wind", 30.0)
+    simulator.add_consumer(1, "household", 5.0)
+    simulator.add_consumer(2, "industry", 100.0)
+    run_simulation_with_data(simulation_profiles, simulator)
@@ -1,76 +1,678 @@
 # python/grid_simulator.py
 import ctypes
 import json
+import os
+import random
 from pathlib import Path
+import numpy as np
 # Définir la structure JsonString
 class JsonString(ctypes.Structure):
     _fields_ = [("data", ctypes.c_char_p)] 
 
-# Charger la librairie C++
-lib_file = Path(__file__).parent.parent / "build"
-lib_files = lib_file.rglob("libsmart_grid.*")
-filename = str(lib_files.__next__())
-lib = ctypes.CDLL(filename)
+# Définir la structure GridState (même disposition que dans smart_grid.h)
+class GridState(ctypes.Structure):
+    _fields_ = [
+        ("time", ctypes.c_double),
+        ("stored_energy", ctypes.c_double),
+        ("battery_capacity", ctypes.c_double),
+        ("solar", ctypes.c_double),
+        ("wind", ctypes.c_double),
+        ("grid", ctypes.c_double),
+        ("household", ctypes.c_double),
+        ("industry", ctypes.c_double),
+        ("purchase_energy", ctypes.c_double),
+        ("n_producers", ctypes.c_int),
+        ("n_consumers", ctypes.c_int),
+        ("day", ctypes.c_int),
+        ("fleet_stored_energy", ctypes.c_double),
+        ("fleet_capacity", ctypes.c_double),
+        ("n_batteries", ctypes.c_int),
+    ]
 
-# Définir les types de retour et arguments
-lib.create_grid.argtypes = [ctypes.c_double, ctypes.c_double]
-lib.create_grid.restype = ctypes.c_void_p
+# Phases chronométrées par l'instrumentation (même ordre que l'enum StatPhase)
+STAT_PHASES = ("producers", "consumers", "aggregation", "battery", "log", "state_json")
 
-lib.add_producer.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_double]
+# Définir la structure GridStats (même disposition que dans smart_grid.h)
+class GridStats(ctypes.Structure):
+    _fields_ = [
+        ("steps", ctypes.c_uint64),
+        ("phase_ns", ctypes.c_uint64 * len(STAT_PHASES)),
+        ("state_json_calls", ctypes.c_uint64),
+        ("state_json_allocations", ctypes.c_uint64),
+        ("state_json_bytes", ctypes.c_uint64),
+    ]
 
-lib.remove_producer.argtypes = [ctypes.c_void_p, ctypes.c_int]
+# Librairie C++ : chemin donné par SMARTGRID_LIB, sinon cherché dans build/
+LIBRARY_ENV = "SMARTGRID_LIB"
+BUILD_DIR = Path(__file__).parent.parent / "build"
+# Emplacements produits par CMake (Makefile, puis générateurs multi-configuration)
+LIBRARY_NAMES = ("libsmart_grid.so", "libsmart_grid.dylib", "smart_grid.dll",
+                 "Release/libsmart_grid.dylib", "Release/smart_grid.dll", "Debug/smart_grid.dll")
 
-lib.add_consumer.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_double]
 
-lib.remove_consumer.argtypes = [ctypes.c_void_p, ctypes.c_int]
+def library_path():
+    """
+    Path of the native library: SMARTGRID_LIB if set, else the usual CMake outputs in build/,
+    else any libsmart_grid.* below build/. Raises FileNotFoundError with build instructions.
+    """
+    configured = os.environ.get(LIBRARY_ENV)
+    if configured:
+        if not Path(configured).is_file():
+            raise FileNotFoundError(f"{LIBRARY_ENV}={configured} does not point to the smart grid library")
+        return Path(configured)
+    for name in LIBRARY_NAMES:
+        if (BUILD_DIR / name).is_file():
+            return BUILD_DIR / name
+    found = next(BUILD_DIR.rglob("libsmart_grid.*"), None) if BUILD_DIR.is_dir() else None
+    if found is None:
+        raise FileNotFoundError(
+            f"Smart grid library not found in {BUILD_DIR}. Build it first (mkdir build && cd build && "
+            f"cmake .. && make) or set {LIBRARY_ENV} to the path of libsmart_grid")
+    return found
 
-lib.update_grid.argtypes = [ctypes.c_void_p]
 
-lib.update_battery.argtypes = [ctypes.c_void_p, ctypes.c_double, ctypes.c_double]
+_library = None
+# Chemin de la librairie chargée ; les processus enfants le retrouvent eux-mêmes avec library_path()
+_library_path = None
 
-lib.reset.argtypes = [ctypes.c_void_p]
 
-lib.get_grid_state.argtypes = [ctypes.c_void_p]
-lib.get_grid_state.restype = ctypes.POINTER(JsonString)
+def load_library():
+    """Load the native library and declare its functions, once per process."""
+    global _library, _library_path
+    if _library is not None:
+        return _library
+    path = library_path()
+    lib = ctypes.CDLL(str(path))
+    _declare_functions(lib)
+    _library, _library_path = lib, path
+    return lib
 
-lib.free_state.argtypes = [ctypes.POINTER(JsonString)]
 
-lib.delete_grid.argtypes = [ctypes.c_void_p]
+class _LazyLibrary:
+    """Stand-in for the ctypes library: loaded on first use, e.g. by the first GridSimulator."""
+
+    def __getattr__(self, name):
+        function = getattr(load_library(), name)
+        # Mis en cache sur l'instance : les appels suivants ne passent plus par __getattr__
+        setattr(self, name, function)
+        return function
+
+
+lib = _LazyLibrary()
+
+
+def _declare_functions(lib):
+    # Définir les types de retour et arguments
+    lib.create_grid.argtypes = [ctypes.c_double, ctypes.c_double, ctypes.c_uint64, ctypes.c_double]
+    lib.create_grid.restype = ctypes.c_void_p
+
+    lib.create_grid_from_config.argtypes = [ctypes.c_char_p, ctypes.c_uint64]
+    lib.create_grid_from_config.restype = ctypes.c_void_p
+
+    lib.load_grid_config.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    lib.load_grid_config.restype = ctypes.c_int
+
+    lib.grid_last_error.restype = ctypes.c_char_p
+
+    lib.fork_grid.argtypes = [ctypes.c_void_p]
+    lib.fork_grid.restype = ctypes.c_void_p
+
+    lib.grid_snapshot_size.argtypes = [ctypes.c_void_p]
+    lib.grid_snapshot_size.restype = ctypes.c_size_t
+
+    lib.grid_snapshot.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+
+    lib.grid_restore.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t]
+    lib.grid_restore.restype = ctypes.c_int
+
+    lib.grid_time_step.argtypes = [ctypes.c_void_p]
+    lib.grid_time_step.restype = ctypes.c_double
+
+    lib.grid_seed.argtypes = [ctypes.c_void_p]
+    lib.grid_seed.restype = ctypes.c_uint64
+
+    lib.set_solar_seasonality.argtypes = [ctypes.c_void_p, ctypes.c_double]
+
+    lib.add_producer.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_double]
+    lib.add_producer.restype = ctypes.c_int
+
+    lib.remove_producer.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.remove_producer.restype = ctypes.c_int
+
+    lib.add_producers.argtypes = [ctypes.c_void_p, ctypes.c_int, np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS")]
+    lib.add_producers.restype = ctypes.c_int
+
+    lib.list_producers.argtypes = [ctypes.c_void_p, np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS")]
+
+    lib.add_consumer.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_double]
+    lib.add_consumer.restype = ctypes.c_int
+
+    lib.remove_consumer.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.remove_consumer.restype = ctypes.c_int
+
+    lib.add_consumers.argtypes = [ctypes.c_void_p, ctypes.c_int, np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS")]
+    lib.add_consumers.restype = ctypes.c_int
+
+    lib.list_consumers.argtypes = [ctypes.c_void_p, np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS")]
+
+    lib.add_batteries.argtypes = [ctypes.c_void_p, ctypes.c_int, np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS")]
+    lib.add_batteries.restype = ctypes.c_int
+
+    lib.remove_battery.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.remove_battery.restype = ctypes.c_int
+
+    lib.list_batteries.argtypes = [ctypes.c_void_p, np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS")]
+
+    lib.set_fleet_policy.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.set_fleet_policy.restype = ctypes.c_int
+
+    lib.set_dispatch_mode.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+    lib.set_dispatch_mode.restype = ctypes.c_int
+
+    lib.set_dispatch_tariff.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int]
+    lib.set_dispatch_tariff.restype = ctypes.c_int
+
+    lib.query_producers.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS"), ctypes.c_int]
+    lib.query_producers.restype = ctypes.c_int
+
+    lib.query_consumers.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.int32, ndim=1, flags="C_CONTIGUOUS"), np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS"), ctypes.c_int]
+    lib.query_consumers.restype = ctypes.c_int
+
+    lib.update_grid.argtypes = [ctypes.c_void_p]
+
+    lib.run_grid.argtypes = [ctypes.c_void_p, ctypes.c_int, np.ctypeslib.ndpointer(dtype=np.float64, ndim=2, flags="C_CONTIGUOUS")]
+
+    lib.replay_grid.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, np.ctypeslib.ndpointer(dtype=np.float64, ndim=2, flags="C_CONTIGUOUS")]
+
+    lib.run_grid_ensemble.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_uint64, ctypes.c_int, np.ctypeslib.ndpointer(dtype=np.float64, ndim=2, flags="C_CONTIGUOUS")]
+
+    lib.update_battery.argtypes = [ctypes.c_void_p, ctypes.c_double, ctypes.c_double]
+
+    lib.reset.argtypes = [ctypes.c_void_p]
+
+    lib.get_grid_state.argtypes = [ctypes.c_void_p]
+    lib.get_grid_state.restype = ctypes.POINTER(JsonString)
+
+    lib.get_grid_state_into.argtypes = [ctypes.c_void_p, ctypes.POINTER(GridState)]
+
+    lib.get_grid_state_delta.argtypes = [ctypes.c_void_p, ctypes.c_uint64, ctypes.POINTER(GridState), ctypes.POINTER(ctypes.c_uint32)]
+    lib.get_grid_state_delta.restype = ctypes.c_uint64
+
+    lib.free_state.argtypes = [ctypes.POINTER(JsonString)]
+
+    lib.create_network.argtypes = [ctypes.c_int]
+    lib.create_network.restype = ctypes.c_void_p
+
+    lib.network_add_grid.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+    lib.network_add_grid.restype = ctypes.c_int
+
+    lib.network_add_link.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_double]
+    lib.network_add_link.restype = ctypes.c_int
+
+    lib.network_get_grid.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.network_get_grid.restype = ctypes.c_void_p
+
+    lib.network_size.argtypes = [ctypes.c_void_p]
+    lib.network_size.restype = ctypes.c_int
+
+    lib.network_n_links.argtypes = [ctypes.c_void_p]
+    lib.network_n_links.restype = ctypes.c_int
+
+    lib.run_network.argtypes = [ctypes.c_void_p, ctypes.c_int, np.ctypeslib.ndpointer(dtype=np.float64, ndim=2, flags="C_CONTIGUOUS"), ctypes.c_void_p, ctypes.c_void_p]
+
+    lib.delete_network.argtypes = [ctypes.c_void_p]
+
+    lib.enable_grid_stats.argtypes = [ctypes.c_void_p, ctypes.c_int]
+
+    lib.get_grid_stats.argtypes = [ctypes.c_void_p, ctypes.POINTER(GridStats)]
+
+    lib.reset_grid_stats.argtypes = [ctypes.c_void_p]
+
+    lib.delete_grid.argtypes = [ctypes.c_void_p]
+
+# Types d'actifs, dans l'ordre des enums ProducerKind / ConsumerKind
+PRODUCER_TYPES = ("solar", "wind", "grid")
+CONSUMER_TYPES = ("household", "industry")
+
+# Politiques de répartition de la flotte de batteries (même ordre que l'enum FleetPolicy)
+FLEET_POLICIES = ("proportional", "priority", "soc_balancing")
+
+# Modes de pilotage de la batterie principale (même ordre que l'enum DispatchMode)
+DISPATCH_MODES = ("greedy", "lookahead")
+
+# Colonnes remplies par SmartGrid::run (même ordre que l'enum RunColumn)
+RUN_COLUMNS = (
+    "time",
+    "day",
+    "stored_energy",
+    "solar",
+    "wind",
+    "grid",
+    "household",
+    "industry",
+    "purchase_energy",
+    "fleet_stored_energy",
+)
+
+# Colonnes remplies par run_ensemble (même ordre que l'enum EnsembleColumn)
+ENSEMBLE_COLUMNS = (
+    "stored_energy_p5",
+    "stored_energy_p50",
+    "stored_energy_p95",
+    "purchase_energy_p5",
+    "purchase_energy_p50",
+    "purchase_energy_p95",
+)
+
+# Colonnes remplies par GridNetwork::run (même ordre que l'enum NetworkColumn)
+NETWORK_COLUMNS = (
+    "time",
+    "stored_energy",
+    "production",
+    "demand",
+    "exchanged",
+    "purchase_energy",
+    "surplus_energy",
+)
+
+# Codes d'erreur du registre d'actifs (même valeurs que l'enum GridError)
+GRID_OK = 0
+GRID_UNKNOWN_ID = -1
+GRID_DUPLICATE_ID = -2
+GRID_INVALID_KIND = -3
+GRID_CONFIG_ERROR = -4
+GRID_SNAPSHOT_ERROR = -5
+GRID_TIME_STEP_MISMATCH = -6
+GRID_INVALID_VALUE = -7
+
+def _check_asset(code, asset, id):
+    """Code GridError => exception : KeyError pour un id inconnu, ValueError pour un id déjà utilisé."""
+    if code == GRID_UNKNOWN_ID:
+        raise KeyError(f"No {asset} with id {id}")
+    if code == GRID_DUPLICATE_ID:
+        raise ValueError(f"A {asset} with id {id} already exists")
+
+def _asset_arrays(ids, types, values, names):
+    """Colonnes d'actifs => tableaux contigus (ids int32, indices de type int32, valeurs float64)."""
+    ids = np.ascontiguousarray(ids, dtype=np.int32)
+    types = np.asarray(types)
+    if types.dtype.kind in "iu":
+        kinds = np.ascontiguousarray(types, dtype=np.int32)
+    else:
+        # Noms de types => indices, un dictionnaire par nom distinct et non par actif
+        unique, inverse = np.unique(types, return_inverse=True)
+        unknown = set(unique.tolist()) - set(names)
+        if unknown:
+            raise ValueError(f"Unknown types: {sorted(unknown)}")
+        kinds = np.array([names.index(name) for name in unique.tolist()], dtype=np.int32)[inverse]
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if not len(ids) == len(kinds) == len(values):
+        raise ValueError("ids, types and values must have the same length")
+    return ids, kinds.reshape(-1), values
+
+_INT32_MAX = 2**31 - 1
+
+def _query_filters(asset_type, ids, names):
+    """(type, plage d'ids) => (indice de type ou -1, id_min, id_max exclu) pour les requêtes natives."""
+    if asset_type is None:
+        kind = -1
+    elif isinstance(asset_type, str):
+        if asset_type not in names:
+            raise ValueError(f"Unknown type: {asset_type}")
+        kind = names.index(asset_type)
+    else:
+        kind = int(asset_type)
+    if ids is None:
+        return kind, -_INT32_MAX - 1, _INT32_MAX
+    if isinstance(ids, range):
+        if ids.step != 1:
+            raise ValueError("ids must be a contiguous range")
+        ids = (ids.start, ids.stop)
+    start, stop = ids
+    return kind, max(int(start), -_INT32_MAX - 1), min(int(stop), _INT32_MAX)
+
+def _run_query(query, grid_ptr, kind, id_min, id_max, value_key, size_hint=4096):
+    """Appel natif de requête, relancé avec des tampons plus grands si le premier ne suffit pas."""
+    n = min(size_hint, max(id_max - id_min, 0))
+    while True:
+        ids = np.empty(n, dtype=np.int32)
+        kinds = np.empty(n, dtype=np.int32)
+        values = np.empty(n, dtype=np.float64)
+        count = query(grid_ptr, kind, id_min, id_max, ids, kinds, values, n)
+        if count <= n:
+            return {"id": ids[:count], "kind": kinds[:count], value_key: values[:count]}
+        n = count
+
+def _trace_matrix(columns, types):
+    """dict type -> série temporelle => matrice (n_steps, len(types)) contiguë, NaN pour les types absents."""
+    if not columns:
+        return None
+    unknown = set(columns) - set(types)
+    if unknown:
+        raise ValueError(f"Unknown types in trace: {sorted(unknown)}")
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) != 1:
+        raise ValueError("Every trace must have the same length")
+    trace = np.full((lengths.pop(), len(types)), np.nan, dtype=np.float64)
+    for index, kind in enumerate(types):
+        if kind in columns:
+            trace[:, index] = columns[kind]
+    return trace
 
 class GridSimulator:
-    def __init__(self, battery_capacity=100.0, charge_rate=10.0):
-        self.grid_ptr = lib.create_grid(battery_capacity, charge_rate)
+    def __init__(self, battery_capacity=100.0, charge_rate=10.0, seed=None, time_step=3600.0):
+        """
+        `time_step` is the simulated duration of one step in seconds (e.g. 60 for 1-minute resolution).
+        """
+        if time_step <= 0:
+            raise ValueError("time_step must be positive")
+        # Sans graine, en tirer une : deux grilles de même graine donnent exactement les mêmes résultats
+        seed = random.getrandbits(64) if seed is None else seed
+        self._attach(lib.create_grid(battery_capacity, charge_rate, ctypes.c_uint64(seed), ctypes.c_double(time_step)))
+
+    @classmethod
+    def from_config(cls, path, seed=None):
+        """
+        Build a grid from a JSON scenario file (see include/scenario.h for the format), parsed
+        natively in a single call. `seed` is used when the file does not set one.
+        Raises FileNotFoundError or ValueError if the file cannot be loaded.
+        """
+        path = Path(path)
+        if not path.is_file():
+            raise FileNotFoundError(f"Scenario file not found: {path}")
+        seed = random.getrandbits(64) if seed is None else seed
+        grid_ptr = lib.create_grid_from_config(str(path).encode('utf-8'), ctypes.c_uint64(seed))
+        if not grid_ptr:
+            raise ValueError(lib.grid_last_error().decode('utf-8'))
+        simulator = cls.__new__(cls)
+        simulator._attach(grid_ptr)
+        return simulator
+
+    def _attach(self, grid_ptr):
+        self.grid_ptr = grid_ptr
+        self.seed = lib.grid_seed(grid_ptr)
+        self.time_step = lib.grid_time_step(grid_ptr)
+        # Buffer réutilisé par get_state_array, vu par NumPy sans copie
+        self._state = GridState()
+        self._state_view = np.frombuffer(self._state, dtype=np.dtype(GridState), count=1)[0]
+
+    def load_config(self, path):
+        """
+        Reset the grid and configure it from a JSON scenario file, like `from_config`.
+        Settings left out of the file are kept; the assets are always replaced.
+        """
+        path = Path(path)
+        if not path.is_file():
+            raise FileNotFoundError(f"Scenario file not found: {path}")
+        code = lib.load_grid_config(self.grid_ptr, str(path).encode('utf-8'))
+        self.seed = lib.grid_seed(self.grid_ptr)
+        self.time_step = lib.grid_time_step(self.grid_ptr)
+        if code == GRID_CONFIG_ERROR:
+            raise ValueError(lib.grid_last_error().decode('utf-8'))
+
+    def snapshot(self):
+        """
+        Save the whole simulation state (assets, battery, clock, random generator) as a compact
+        binary blob, to pass to `restore`. The blob is meant for the same build and machine.
+        """
+        blob = ctypes.create_string_buffer(lib.grid_snapshot_size(self.grid_ptr))
+        lib.grid_snapshot(self.grid_ptr, blob)
+        return blob.raw
+
+    def restore(self, blob):
+        """
+        Put the grid back in the state saved by `snapshot`; the run then continues exactly as it
+        did from that point. Raises ValueError (grid unchanged) if the blob is not a valid snapshot.
+        """
+        blob = bytes(blob)
+        if lib.grid_restore(self.grid_ptr, blob, ctypes.c_size_t(len(blob))) == GRID_SNAPSHOT_ERROR:
+            raise ValueError("Invalid grid snapshot")
+        self.seed = lib.grid_seed(self.grid_ptr)
+        self.time_step = lib.grid_time_step(self.grid_ptr)
+
+    def fork(self):
+        """
+        Native copy of the grid in its current state, e.g. to compare what-if branches. The fork
+        and the original continue identically until one of them is changed. Native calls release
+        the GIL, so forks can be simulated in parallel from threads.
+        """
+        simulator = GridSimulator.__new__(GridSimulator)
+        simulator._attach(lib.fork_grid(self.grid_ptr))
+        return simulator
 
     def add_producer(self, id, producer_type, capacity):
-        lib.add_producer(
+        """Add a producer; `id` must be unique among producers (ValueError otherwise)."""
+        code = lib.add_producer(
             self.grid_ptr,
             ctypes.c_int(id),
             producer_type.encode('utf-8'),
             ctypes.c_double(capacity)
         )
+        _check_asset(code, "producer", id)
     
+    def add_producers(self, ids, types, capacities):
+        """
+        Add many producers in a single native call. `types` holds type names (see PRODUCER_TYPES) or
+        their indices. Either every producer is added or, if an id is already used (ValueError),
+        none of them.
+        """
+        ids, kinds, capacities = _asset_arrays(ids, types, capacities, PRODUCER_TYPES)
+        code = lib.add_producers(self.grid_ptr, ctypes.c_int(len(ids)), ids, kinds, capacities)
+        if code == GRID_INVALID_KIND:
+            raise ValueError(f"Producer types must be indices of PRODUCER_TYPES")
+        if code == GRID_DUPLICATE_ID:
+            raise ValueError("Duplicate producer id")
+
+    def producers(self):
+        """
+        Identity of every producer, grouped by type: dict with "id", "kind" (index in PRODUCER_TYPES)
+        and "capacity" arrays.
+        """
+        n = int(self.get_state_array()["n_producers"])
+        ids = np.empty(n, dtype=np.int32)
+        kinds = np.empty(n, dtype=np.int32)
+        values = np.empty(n, dtype=np.float64)
+        lib.list_producers(self.grid_ptr, ids, kinds, values)
+        return {"id": ids, "kind": kinds, "capacity": values}
+
+    def query_producers(self, producer_type=None, ids=None):
+        """
+        Current output of a subset of producers, read natively without JSON.
+        `producer_type` selects one type (name or index in PRODUCER_TYPES) and `ids` a range of ids,
+        given as a `range` or a (start, stop) pair with stop excluded; None selects everything.
+        Returns a dict with "id", "kind" and "output" (kW) arrays, in no particular order.
+        """
+        kind, id_min, id_max = _query_filters(producer_type, ids, PRODUCER_TYPES)
+        return _run_query(lib.query_producers, self.grid_ptr, kind, id_min, id_max, "output")
+
     def remove_producer(self, id):
-        lib.remove_producer(
+        """Remove the producer with this id in constant time; KeyError if there is none."""
+        code = lib.remove_producer(
             self.grid_ptr,
             ctypes.c_int(id)
         )
+        _check_asset(code, "producer", id)
 
     def add_consumer(self, id, consumer_type, base_demand):
-        lib.add_consumer(
+        """Add a consumer; `id` must be unique among consumers (ValueError otherwise)."""
+        code = lib.add_consumer(
             self.grid_ptr,
             ctypes.c_int(id),
             consumer_type.encode('utf-8'),
             ctypes.c_double(base_demand)
         )
+        _check_asset(code, "consumer", id)
     
+    def add_consumers(self, ids, types, base_demands):
+        """
+        Add many consumers in a single native call. `types` holds type names (see CONSUMER_TYPES) or
+        their indices. Either every consumer is added or, if an id is already used (ValueError),
+        none of them.
+        """
+        ids, kinds, base_demands = _asset_arrays(ids, types, base_demands, CONSUMER_TYPES)
+        code = lib.add_consumers(self.grid_ptr, ctypes.c_int(len(ids)), ids, kinds, base_demands)
+        if code == GRID_INVALID_KIND:
+            raise ValueError(f"Consumer types must be indices of CONSUMER_TYPES")
+        if code == GRID_DUPLICATE_ID:
+            raise ValueError("Duplicate consumer id")
+
+    def consumers(self):
+        """
+        Identity of every consumer, grouped by type: dict with "id", "kind" (index in CONSUMER_TYPES)
+        and "base_demand" arrays.
+        """
+        n = int(self.get_state_array()["n_consumers"])
+        ids = np.empty(n, dtype=np.int32)
+        kinds = np.empty(n, dtype=np.int32)
+        values = np.empty(n, dtype=np.float64)
+        lib.list_consumers(self.grid_ptr, ids, kinds, values)
+        return {"id": ids, "kind": kinds, "base_demand": values}
+
+    def query_consumers(self, consumer_type=None, ids=None):
+        """
+        Current demand of a subset of consumers, read natively without JSON.
+        `consumer_type` selects one type (name or index in CONSUMER_TYPES) and `ids` a range of ids,
+        given as a `range` or a (start, stop) pair with stop excluded; None selects everything.
+        Returns a dict with "id", "kind" and "demand" (kW) arrays, in no particular order.
+        """
+        kind, id_min, id_max = _query_filters(consumer_type, ids, CONSUMER_TYPES)
+        return _run_query(lib.query_consumers, self.grid_ptr, kind, id_min, id_max, "demand")
+
     def remove_consumer(self, id):
-        lib.remove_consumer(
+        """Remove the consumer with this id in constant time; KeyError if there is none."""
+        code = lib.remove_consumer(
             self.grid_ptr,
             ctypes.c_int(id)
         )
+        _check_asset(code, "consumer", id)
+
+    def add_batteries(self, ids, capacities, charge_rates, discharge_rates=None, efficiencies=1.0, priorities=0):
+        """
+        Add distributed batteries to the fleet in a single native call, half charged. They are
+        dispatched after the main battery, following the fleet policy (see `set_fleet_policy`).
+        Rates are in kW (`discharge_rates` defaults to `charge_rates`), `efficiencies` are
+        round-trip efficiencies and `priorities` the order used by the "priority" policy, lowest
+        first; scalars apply to every battery. Either every battery is added or, if an id is
+        already used or a value is out of range (ValueError), none of them.
+        """
+        ids = np.ascontiguousarray(ids, dtype=np.int32).reshape(-1)
+        n = len(ids)
+        column = lambda values, dtype: np.ascontiguousarray(np.broadcast_to(np.asarray(values, dtype=dtype), (n,)))
+        capacities = column(capacities, np.float64)
+        charge_rates = column(charge_rates, np.float64)
+        discharge_rates = charge_rates if discharge_rates is None else column(discharge_rates, np.float64)
+        code = lib.add_batteries(self.grid_ptr, ctypes.c_int(n), ids, capacities, charge_rates, discharge_rates,
+                                 column(efficiencies, np.float64), column(priorities, np.int32))
+        if code == GRID_INVALID_VALUE:
+            raise ValueError("Battery capacities and rates must be >= 0 and efficiencies in (0, 1]")
+        if code == GRID_DUPLICATE_ID:
+            raise ValueError("Duplicate battery id")
+
+    def remove_battery(self, id):
+        """Remove the battery with this id from the fleet in constant time; KeyError if there is none."""
+        _check_asset(lib.remove_battery(self.grid_ptr, ctypes.c_int(id)), "battery", id)
+
+    def batteries(self):
+        """State of every battery of the fleet: dict with "id", "capacity" and "stored_energy" (kWh) arrays."""
+        n = int(self.get_state_array()["n_batteries"])
+        ids = np.empty(n, dtype=np.int32)
+        capacities = np.empty(n, dtype=np.float64)
+        stored = np.empty(n, dtype=np.float64)
+        lib.list_batteries(self.grid_ptr, ids, capacities, stored)
+        return {"id": ids, "capacity": capacities, "stored_energy": stored}
+
+    def set_fleet_policy(self, policy):
+        """Share surpluses and deficits between the fleet batteries by one of FLEET_POLICIES."""
+        if policy not in FLEET_POLICIES:
+            raise ValueError(f"Unknown fleet policy: {policy}")
+        lib.set_fleet_policy(self.grid_ptr, ctypes.c_int(FLEET_POLICIES.index(policy)))
+
+    def set_dispatch(self, mode="greedy", horizon=48, levels=101, grid_charging=False, tariff=None):
+        """
+        Choose how the main battery is dispatched, one of DISPATCH_MODES.
+        "greedy" charges on surplus, discharges on deficit and buys the rest. "lookahead" solves,
+        at every step, the schedule minimising the cost of the energy bought over the next
+        `horizon` steps, by dynamic programming over `levels` states of charge, and applies its
+        first move. The forecast is the expectation of the built-in models. `tariff` gives the
+        price of the energy bought at each hour of the day (24 values); without it the purchased
+        energy is minimised. `grid_charging` lets the battery be charged from the main grid.
+        """
+        if mode not in DISPATCH_MODES:
+            raise ValueError(f"Unknown dispatch mode: {mode}")
+        if horizon < 1 or levels < 2:
+            raise ValueError("horizon must be at least 1 and levels at least 2")
+        prices = None
+        if tariff is not None:
+            prices = np.ascontiguousarray(tariff, dtype=np.float64).reshape(-1)
+            if len(prices) != 24:
+                raise ValueError("tariff must give 24 hourly prices")
+        lib.set_dispatch_mode(self.grid_ptr, ctypes.c_int(DISPATCH_MODES.index(mode)), ctypes.c_int(horizon),
+                              ctypes.c_int(levels), ctypes.c_int(bool(grid_charging)))
+        lib.set_dispatch_tariff(self.grid_ptr, None if prices is None else prices.ctypes.data,
+                                ctypes.c_int(0 if prices is None else len(prices)))
 
     def update(self):
         lib.update_grid(self.grid_ptr)
+
+    def run(self, n_steps):
+        """
+        Simulate `n_steps` time steps in a single native call.
+        Returns a dict mapping each name of RUN_COLUMNS to a NumPy array of length `n_steps`.
+        """
+        out = np.empty((len(RUN_COLUMNS), n_steps), dtype=np.float64)
+        lib.run_grid(self.grid_ptr, ctypes.c_int(n_steps), out)
+        return dict(zip(RUN_COLUMNS, out))
+
+    def replay(self, producer_factors=None, consumer_demand=None):
+        """
+        Step the grid through exogenous time series in a single native call.
+        - producer_factors : dict producer type -> array of the fraction of capacity produced at each step
+        - consumer_demand : dict consumer type -> array of the demand of one consumer at each step (kW)
+        Every array must have the same length, which is the number of steps simulated. Types left
+        out (or NaN values) follow the built-in model. Returns the same columns as `run`.
+        """
+        producer_trace = _trace_matrix(producer_factors, PRODUCER_TYPES)
+        consumer_trace = _trace_matrix(consumer_demand, CONSUMER_TYPES)
+        lengths = {len(trace) for trace in (producer_trace, consumer_trace) if trace is not None}
+        if len(lengths) != 1:
+            raise ValueError("replay needs at least one trace, and every trace must have the same length")
+        n_steps = lengths.pop()
+        out = np.empty((len(RUN_COLUMNS), n_steps), dtype=np.float64)
+        lib.replay_grid(
+            self.grid_ptr,
+            ctypes.c_int(n_steps),
+            None if producer_trace is None else producer_trace.ctypes.data,
+            None if consumer_trace is None else consumer_trace.ctypes.data,
+            out
+        )
+        return dict(zip(RUN_COLUMNS, out))
+
+    def run_ensemble(self, n_members, n_steps, seed=None, n_threads=0):
+        """
+        Monte Carlo ensemble: clone the configured grid into `n_members` members with independent
+        random sequences and simulate them for `n_steps` on native threads (the GIL is released
+        during the call). The grid itself is not advanced.
+        Returns a dict mapping each name of ENSEMBLE_COLUMNS to a NumPy array of length `n_steps`.
+        `n_threads=0` uses every hardware thread; results do not depend on the thread count.
+        """
+        if n_members < 1:
+            raise ValueError("n_members must be at least 1")
+        if n_steps < 0:
+            raise ValueError("n_steps must be non-negative")
+        if n_threads < 0:
+            raise ValueError("n_threads must be non-negative")
+        if seed is None:
+            seed = random.getrandbits(64)
+        out = np.empty((len(ENSEMBLE_COLUMNS), n_steps), dtype=np.float64)
+        lib.run_grid_ensemble(
+            self.grid_ptr,
+            ctypes.c_int(n_members),
+            ctypes.c_int(n_steps),
+            ctypes.c_uint64(seed),
+            ctypes.c_int(n_threads),
+            out
+        )
+        return dict(zip(ENSEMBLE_COLUMNS, out))
         
     def update_battery(self, capacity, charge_rate):
         lib.update_battery(
@@ -79,10 +681,37 @@ class GridSimulator:
             ctypes.c_double(charge_rate)
             )
         
+    def set_solar_seasonality(self, amplitude):
+        """Modulate solar production over the year by +/- `amplitude` (peak at the summer solstice, 0 disables it)."""
+        lib.set_solar_seasonality(self.grid_ptr, ctypes.c_double(amplitude))
+
     def reset(self):
         lib.reset(self.grid_ptr)
 
+    def get_state_array(self):
+        """
+        Return the current state as a NumPy structured record with the fields of GridState.
+        The record is a view on a buffer owned by the simulator and is overwritten by the next call.
+        """
+        lib.get_grid_state_into(self.grid_ptr, ctypes.byref(self._state))
+        return self._state_view
+
+    def get_state_delta(self, since_version=0):
+        """
+        Return `(version, changes)`: `changes` maps the GridState fields that changed after
+        `since_version` to their current value. Pass the returned version to the next call;
+        0 returns every field.
+        """
+        mask = ctypes.c_uint32()
+        version = lib.get_grid_state_delta(self.grid_ptr, ctypes.c_uint64(since_version), ctypes.byref(self._state), ctypes.byref(mask))
+        return version, {
+            name: getattr(self._state, name)
+            for index, (name, _) in enumerate(GridState._fields_)
+            if mask.value >> index & 1
+        }
+
     def get_state(self):
+        """Return the current state as a dict parsed from JSON (slower, for debugging)."""
         state_ptr = lib.get_grid_state(self.grid_ptr)
         state_str = state_ptr.contents.data.decode('utf-8')
         state = json.loads(state_str)
@@ -91,5 +720,111 @@ class GridSimulator:
         
         return state
 
+    def enable_stats(self, enabled=True):
+        """
+        Turn the native phase timers and counters on or off (off by default). Counters are kept
+        when disabled; see `stats` and `reset_stats`.
+        """
+        lib.enable_grid_stats(self.grid_ptr, ctypes.c_int(bool(enabled)))
+
+    def stats(self):
+        """
+        Counters accumulated while the stats were enabled: "steps", cumulative nanoseconds per
+        phase ("<phase>_ns" for each name of STAT_PHASES), and the number of calls, heap
+        allocations and bytes of the JSON states returned by `get_state`.
+        """
+        stats = GridStats()
+        lib.get_grid_stats(self.grid_ptr, ctypes.byref(stats))
+        return {
+            "steps": stats.steps,
+            **{f"{phase}_ns": stats.phase_ns[index] for index, phase in enumerate(STAT_PHASES)},
+            "state_json_calls": stats.state_json_calls,
+            "state_json_allocations": stats.state_json_allocations,
+            "state_json_bytes": stats.state_json_bytes,
+        }
+
+    def reset_stats(self):
+        lib.reset_grid_stats(self.grid_ptr)
+
+    def __del__(self):
+        # Absent si le constructeur a échoué avant de créer la grille
+        grid_ptr = getattr(self, "grid_ptr", None)
+        if grid_ptr:
+            lib.delete_grid(grid_ptr)
+
+
+class GridNetwork:
+    """
+    Microgrids exchanging energy over capacity-limited tie-lines, simulated natively.
+    Each step, every grid balances itself in parallel on native threads, then the surpluses
+    its battery could not store are routed to grids in deficit (possibly through other grids),
+    up to the capacity of the lines, so that as little energy as possible is purchased.
+    """
+
+    def __init__(self, n_threads=0):
+        """`n_threads=0` uses every hardware thread."""
+        self.network_ptr = lib.create_network(ctypes.c_int(n_threads))
+
+    def __len__(self):
+        return lib.network_size(self.network_ptr)
+
+    @property
+    def n_links(self):
+        return lib.network_n_links(self.network_ptr)
+
+    def add_grid(self, simulator):
+        """
+        Add a copy of `simulator` in its current state and return its index in the network.
+        Every grid must have the same time step (ValueError otherwise).
+        """
+        index = lib.network_add_grid(self.network_ptr, simulator.grid_ptr)
+        if index == GRID_TIME_STEP_MISMATCH:
+            raise ValueError("Every grid of a network must have the same time step")
+        return index
+
+    def add_link(self, grid_a, grid_b, capacity):
+        """Connect two grids (indices returned by `add_grid`) by a line of `capacity` kW; returns its index."""
+        if capacity < 0:
+            raise ValueError("capacity must be positive")
+        index = lib.network_add_link(self.network_ptr, ctypes.c_int(grid_a), ctypes.c_int(grid_b), ctypes.c_double(capacity))
+        if index == GRID_UNKNOWN_ID:
+            raise KeyError(f"Cannot link grid {grid_a} to grid {grid_b}")
+        return index
+
+    def grid(self, index):
+        """Copy of grid `index` in its current state, as a GridSimulator (changes to it do not affect the network)."""
+        grid_ptr = lib.network_get_grid(self.network_ptr, ctypes.c_int(index))
+        if not grid_ptr:
+            raise KeyError(f"No grid with index {index}")
+        simulator = GridSimulator.__new__(GridSimulator)
+        simulator._attach(grid_ptr)
+        return simulator
+
+    def run(self, n_steps, details=False):
+        """
+        Simulate `n_steps` time steps of every grid in a single native call (the GIL is released).
+        Returns a dict mapping each name of NETWORK_COLUMNS to a NumPy array of length `n_steps`.
+        With `details=True`, it also holds "grid_purchase" (one row per grid, kWh) and "link_flow"
+        (one row per link, kWh, positive from the first grid to the second).
+        """
+        out = np.empty((len(NETWORK_COLUMNS), n_steps), dtype=np.float64)
+        grid_purchase = np.empty((len(self), n_steps), dtype=np.float64) if details else None
+        link_flow = np.empty((self.n_links, n_steps), dtype=np.float64) if details else None
+        lib.run_network(
+            self.network_ptr,
+            ctypes.c_int(n_steps),
+            out,
+            None if grid_purchase is None else grid_purchase.ctypes.data,
+            None if link_flow is None else link_flow.ctypes.data
+        )
+        results = dict(zip(NETWORK_COLUMNS, out))
+        if details:
+            results["grid_purchase"] = grid_purchase
+            results["link_flow"] = link_flow
+        return results
+
     def __del__(self):
-        lib.delete_grid(self.grid_ptr)
+        # Absent si le constructeur a échoué avant de créer le réseau
+        network_ptr = getattr(self, "network_ptr", None)
+        if network_ptr:
+            lib.delete_network(network_ptr)
@@ -0,0 +1,109 @@
+"""
+Columnar on-disk storage for long simulation runs.
+
+A results directory holds one raw `.npy` file per column plus a small `columns.json`.
+ResultsWriter appends chunks straight to the column files, so a run of any length is
+written at disk speed with bounded memory; open_results memory-maps the columns back.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+COLUMNS_FILE = "columns.json"
+# Taille fixe de l'en-tête .npy, réécrit avec la longueur finale à la fermeture
+_HEADER_SIZE = 128
+
+
+def _npy_header(dtype, length) -> bytes:
+    """En-tête .npy version 1.0 d'un vecteur de `length` éléments, complété à _HEADER_SIZE octets."""
+    header = f"{{'descr': '{np.dtype(dtype).str}', 'fortran_order': False, 'shape': ({length},), }}"
+    header = header.ljust(_HEADER_SIZE - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+
+class ResultsWriter:
+    """
+    Stream columns of simulation output to `directory`.
+    Use `append` for chunks of arrays (e.g. GridSimulator.run output) or `append_row` for one
+    value per column at a time (e.g. GUI ticks), which is buffered into chunks of `chunk_size`.
+    Files are complete once `close` has been called (or the `with` block exits).
+    """
+
+    def __init__(self, directory, columns, dtype=np.float64, chunk_size=4096):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.columns = list(columns)
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self._files = {}
+        for name in self.columns:
+            f = open(self.directory / f"{name}.npy", "wb")
+            f.write(_npy_header(self.dtype, 0))
+            self._files[name] = f
+        self._rows = np.empty((chunk_size, len(self.columns)), dtype=self.dtype)
+        self._n_rows = 0
+
+    def append(self, chunk):
+        """Append a dict mapping every column to an array; all arrays must have the same length."""
+        self._flush_rows()
+        lengths = {len(chunk[name]) for name in self.columns}
+        if len(lengths) != 1:
+            raise ValueError("Every column of a chunk must have the same length")
+        for name in self.columns:
+            np.ascontiguousarray(chunk[name], dtype=self.dtype).tofile(self._files[name])
+        self.length += lengths.pop()
+
+    def append_row(self, row):
+        """Append one value per column, given as a dict."""
+        self._rows[self._n_rows] = [row[name] for name in self.columns]
+        self._n_rows += 1
+        if self._n_rows == len(self._rows):
+            self._flush_rows()
+
+    def close(self):
+        """Flush the buffered rows, write the final headers and close the files."""
+        if not self._files:
+            return
+        self._flush_rows()
+        for f in self._files.values():
+            f.seek(0)
+            f.write(_npy_header(self.dtype, self.length))
+            f.close()
+        self._files = {}
+        with open(self.directory / COLUMNS_FILE, "w") as f:
+            json.dump({"columns": self.columns, "length": self.length}, f)
+
+    def _flush_rows(self):
+        if self._n_rows:
+            for index, name in enumerate(self.columns):
+                self._rows[:self._n_rows, index].tofile(self._files[name])
+            self.length += self._n_rows
+            self._n_rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_results(directory) -> dict:
+    """Memory-map the columns of a results directory, in the order they were written."""
+    directory = Path(directory)
+    with open(directory / COLUMNS_FILE, "r") as f:
+        columns = json.load(f)["columns"]
+    return {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in columns}
+
+
+def run_to_disk(simulator, n_steps, directory, chunk_steps=100_000) -> int:
+    """
+    Simulate `n_steps` with `simulator.run`, `chunk_steps` at a time, streaming every run
+    column to `directory`. Returns the number of steps written.
+    """
+    from grid_simulator import RUN_COLUMNS
+
+    with ResultsWriter(directory, RUN_COLUMNS) as writer:
+        for start in range(0, n_steps, chunk_steps):
+            writer.append(simulator.run(min(chunk_steps, n_steps - start)))
+    return writer.length
@@ -1,11 +1,16 @@
+import threading
 from PySide6.QtCore import (Qt, QTimer)
 from PySide6.QtGui import (QCursor, QDoubleValidator)
 from PySide6.QtWidgets import (QDialog, QWidget, QLabel, QVBoxLayout, QGroupBox, QGridLayout, QPushButton, QTabWidget, QLineEdit, QTableWidget)
-from grid_simulator import GridSimulator
+from grid_simulator import GridSimulator, PRODUCER_TYPES, CONSUMER_TYPES
 from simulator_ui.setup_ui import SetupWidget
 from simulator_ui.setting_ui import SettingWidget
 from simulator_ui.results_ui import ResultsWidget
 from simulator_ui.generator_ui import GeneratorUI
+from simulator_ui.simulation_worker import SimulationWorker
+from simulator_ui.plot_history import PlotHistory, PLOT_COLUMNS, HISTORY_STEPS
+from simulator_ui.asset_model import AssetTableModel
+from simulator_ui.profiling import SectionTimer
 
 
 MENU_ITEMS = [
@@ -21,8 +26,16 @@ class Widgets(QDialog):
         self.setWindowTitle("Smart Grid Simulator")
         self.setMinimumSize(800, 700)
         self.layout = QVBoxLayout(self)
+        grid_simulator = GridSimulator(battery_capacity=200.0, charge_rate=20.0)
+        grid_lock = threading.Lock()
+        # SMARTGRID_PROFILE=1 : chronomètres de l'interface et compteurs natifs, affichés à la fermeture
+        profiler = SectionTimer()
+        if profiler.enabled:
+            grid_simulator.enable_stats()
         self.simulator = {
-            "object": GridSimulator(battery_capacity=200.0, charge_rate=20.0), 
+            "object": grid_simulator,
+            "lock": grid_lock,
+            "worker": SimulationWorker(grid_simulator, grid_lock),
             "state": {
                 'battery': {
                     'capacity': 'N/A', 
@@ -39,21 +52,12 @@ class Widgets(QDialog):
                     },
                 'purchase_energy': 'N/A'
                 },
-            "plot_linear_data": {
-                "time": [],
-                "battery": [],
-                "solar": [],
-                "wind": [],
-                "demand": [],
-                "industry": [],
-                "household": [],
-                "total_production": [],
-                "purchase": []
-            },
+            "plot_linear_data": PlotHistory(PLOT_COLUMNS, HISTORY_STEPS),
             "timer": QTimer(),
+            "profiler": profiler,
             "table": {
-                "producer": QTableWidget(),
-                "consumer": QTableWidget()
+                "producer": AssetTableModel(PRODUCER_TYPES, ["Type", "Capacity (kW)", "Action"]),
+                "consumer": AssetTableModel(CONSUMER_TYPES, ["Type", "Base Demand (kW)", "Action"])
             }
         }
         
@@ -64,6 +68,15 @@ class Widgets(QDialog):
                 self.addTab(self.simulator, self.tabs, item["label"], item["class"])
               
         self.layout.addWidget(self.tabs)
+
+    #Override
+    def done(self, result):
+        self.simulator["timer"].stop()
+        self.simulator["worker"].stop()
+        profiler = self.simulator["profiler"]
+        if profiler.enabled:
+            profiler.print_report(self.simulator["object"].stats())
+        super().done(result)
         
     def addTab(self, simulator: dict[str, any], tabs: QTabWidget, label: str, Widget: QWidget) -> None:
         widget = Widget(simulator)
@@ -0,0 +1,86 @@
+import numpy as np
+from PySide6.QtCore import (Qt, QAbstractTableModel, QModelIndex)
+
+# Colonnes affichées : type, valeur (capacité ou demande), action
+TYPE_COLUMN = 0
+VALUE_COLUMN = 1
+ACTION_COLUMN = 2
+
+
+class AssetTableModel(QAbstractTableModel):
+    """
+    Table model over the assets of one family (producers or consumers), stored as NumPy columns.
+    The view only asks for the visible cells, so a grid of any size is displayed without
+    creating one item or widget per asset. Each row carries the asset id in Qt.UserRole.
+    """
+
+    def __init__(self, type_names, header):
+        super().__init__()
+        self.type_names = tuple(type_names)
+        self.header = list(header)
+        self.ids = np.empty(0, dtype=np.int32)
+        self.kinds = np.empty(0, dtype=np.int32)
+        self.values = np.empty(0, dtype=np.float64)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.header)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.header[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.UserRole:
+            return int(self.ids[row])
+        if role == Qt.DisplayRole:
+            column = index.column()
+            if column == TYPE_COLUMN:
+                return self.type_names[self.kinds[row]]
+            if column == VALUE_COLUMN:
+                return str(float(self.values[row]))
+            if column == ACTION_COLUMN:
+                return "Delete"
+        return None
+
+    def set_assets(self, ids, kinds, values):
+        """Replace every row, e.g. with the output of GridSimulator.producers()."""
+        self.beginResetModel()
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.kinds = np.asarray(kinds, dtype=np.int32)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.endResetModel()
+
+    def append(self, id, type_name, value):
+        row = len(self.ids)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.ids = np.append(self.ids, np.int32(id))
+        self.kinds = np.append(self.kinds, np.int32(self.type_names.index(type_name)))
+        self.values = np.append(self.values, value)
+        self.endInsertRows()
+
+    def remove_id(self, id):
+        """Remove the row of asset `id`; returns False if there is none."""
+        rows = np.flatnonzero(self.ids == id)
+        if rows.size == 0:
+            return False
+        row = int(rows[0])
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.ids = np.delete(self.ids, row)
+        self.kinds = np.delete(self.kinds, row)
+        self.values = np.delete(self.values, row)
+        self.endRemoveRows()
+        return True
+
+    def next_id(self):
+        """Smallest id greater than every id in the table."""
+        return int(self.ids.max()) + 1 if len(self.ids) else 0
+
+    def clear(self):
+        self.set_assets([], [], [])
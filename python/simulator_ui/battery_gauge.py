@@ -0,0 +1,79 @@
+import os
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import (Qt, QRectF, QSize)
+from PySide6.QtGui import (QColor, QPainter, QPen, QPixmap)
+
+BATTERY_IMAGE_PATH = os.path.join(os.path.dirname(__file__), 'images', 'Battery.png')
+CHARGE_COLOR = '#2ABf9E'
+DISCHARGE_COLOR = '#9e9d9d'
+
+
+class BatteryGauge(QWidget):
+    """
+    Battery state-of-charge donut drawn with QPainter.
+    The battery image is loaded once and rescaled only when the widget is resized; setting
+    the charge repaints the widget only when the displayed (rounded) percentage changes.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._image = QPixmap(BATTERY_IMAGE_PATH)
+        self._scaled_image = None
+        self._percent = 50
+        self.setMinimumSize(150, 150)
+
+    def sizeHint(self):
+        return QSize(300, 300)
+
+    def charge(self):
+        return self._percent
+
+    def set_charge(self, percent):
+        """Display `percent` (0-100) of stored energy; values outside the range are clamped."""
+        percent = round(min(max(percent, 0.0), 100.0))
+        if percent != self._percent:
+            self._percent = percent
+            self.update()
+
+    #Override
+    def resizeEvent(self, event):
+        # Image redimensionnée à la prochaine peinture seulement
+        self._scaled_image = None
+        super().resizeEvent(event)
+
+    #Override
+    def paintEvent(self, event):
+        side = min(self.width(), self.height())
+        ring_width = side * 0.15
+        # Anneau inscrit dans le widget, centré
+        rect = QRectF((self.width() - side) / 2, (self.height() - side) / 2, side, side)
+        rect.adjust(ring_width / 2, ring_width / 2, -ring_width / 2, -ring_width / 2)
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        pen = QPen(QColor(DISCHARGE_COLOR), ring_width, Qt.SolidLine, Qt.FlatCap)
+        painter.setPen(pen)
+        painter.drawEllipse(rect)
+        if self._percent > 0:
+            pen.setColor(QColor(CHARGE_COLOR))
+            painter.setPen(pen)
+            # Angles en 1/16e de degré, depuis midi dans le sens horaire
+            painter.drawArc(rect, 90 * 16, -round(self._percent * 360 * 16 / 100))
+
+        if self._scaled_image is None:
+            image_side = round(side * 0.3)
+            self._scaled_image = self._image.scaled(image_side, image_side, Qt.KeepAspectRatio,
+                                                    Qt.SmoothTransformation)
+        image_rect = QRectF(self._scaled_image.rect())
+        image_rect.moveCenter(rect.center())
+        image_rect.moveTop(image_rect.top() - side * 0.08)
+        painter.drawPixmap(image_rect.topLeft(), self._scaled_image)
+
+        painter.setPen(QColor(Qt.black))
+        font = painter.font()
+        font.setPixelSize(max(round(side * 0.08), 8))
+        font.setBold(True)
+        painter.setFont(font)
+        text_rect = QRectF(rect.left(), image_rect.bottom(), rect.width(), side * 0.12)
+        painter.drawText(text_rect, Qt.AlignCenter, f"{self._percent}%")
+        painter.end()
@@ -0,0 +1,58 @@
+import numpy as np
+
+# Séries tracées dans l'onglet Results
+PLOT_COLUMNS = (
+    "time",
+    "battery",
+    "solar",
+    "wind",
+    "demand",
+    "industry",
+    "household",
+    "total_production",
+    "purchase",
+)
+# Fenêtre d'historique par défaut (pas simulés conservés pour l'affichage)
+HISTORY_STEPS = 20_000
+
+
+class PlotHistory:
+    """
+    Preallocated ring buffers holding the last `capacity` values of every plotted series.
+    Each value is stored twice, at i and i + capacity, so the current window is always one
+    contiguous NumPy view: memory is constant and curves can be updated without copies.
+    """
+
+    def __init__(self, columns=PLOT_COLUMNS, capacity=HISTORY_STEPS):
+        self.columns = tuple(columns)
+        self.capacity = capacity
+        self._index = {name: row for row, name in enumerate(self.columns)}
+        self._buffer = np.zeros((len(self.columns), 2 * capacity), dtype=np.float64)
+        self._head = 0  # Prochaine position d'écriture
+        self._length = 0
+        self.total = 0  # Nombre de valeurs ajoutées depuis le dernier clear
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        """Contiguous view of the current window of a series, oldest value first."""
+        start = self._head - self._length + self.capacity
+        return self._buffer[self._index[name], start:start + self._length]
+
+    def extend(self, values):
+        """Append a dict mapping every column to an array; only the last `capacity` values are kept."""
+        block = np.array([values[name] for name in self.columns], dtype=np.float64)[:, -self.capacity:]
+        n = block.shape[1]
+        first = min(n, self.capacity - self._head)
+        for offset in (0, self.capacity):
+            self._buffer[:, offset + self._head:offset + self._head + first] = block[:, :first]
+            self._buffer[:, offset:offset + n - first] = block[:, first:]
+        self._head = (self._head + n) % self.capacity
+        self._length = min(self._length + n, self.capacity)
+        self.total += len(values[self.columns[0]])
+
+    def clear(self):
+        self._head = 0
+        self._length = 0
+        self.total = 0
@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+
+# Variable d'environnement activant les chronomètres de l'interface (SMARTGRID_PROFILE=1)
+PROFILE_ENV = "SMARTGRID_PROFILE"
+
+
+class _Section:
+    """Context manager adding the time spent in a `with` block to one section."""
+
+    __slots__ = ("totals", "start")
+
+    def __init__(self, totals):
+        self.totals = totals
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.totals[0] += 1
+        self.totals[1] += time.perf_counter_ns() - self.start
+        return False
+
+
+class _NoSection:
+    """Shared no-op context manager returned while profiling is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SECTION = _NoSection()
+
+
+class SectionTimer:
+    """
+    Cumulative wall time of named GUI sections, e.g. `with profiler.section("curves"): ...`.
+    Disabled unless SMARTGRID_PROFILE is set: `section` then returns a shared no-op object.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = bool(os.environ.get(PROFILE_ENV)) if enabled is None else enabled
+        self._sections = {}  # nom -> _Section (appels, nanosecondes)
+
+    def section(self, name):
+        if not self.enabled:
+            return _NO_SECTION
+        section = self._sections.get(name)
+        if section is None:
+            section = self._sections[name] = _Section([0, 0])
+        return section
+
+    def report(self):
+        """dict section -> {"calls", "total_ns"}, in first-use order."""
+        return {name: {"calls": section.totals[0], "total_ns": section.totals[1]}
+                for name, section in self._sections.items()}
+
+    def reset(self):
+        self._sections.clear()
+
+    def print_report(self, native_stats=None, file=sys.stderr):
+        """Print the GUI sections, and the counters of GridSimulator.stats() if given."""
+        print("GUI sections (calls, total, mean):", file=file)
+        for name, section in self.report().items():
+            calls, total_ns = section["calls"], section["total_ns"]
+            print(f"  {name:<20} {calls:>8} {total_ns / 1e6:>10.1f} ms {total_ns / max(calls, 1) / 1e3:>10.1f} us", file=file)
+        if native_stats:
+            print("Native stats:", file=file)
+            for name, value in native_stats.items():
+                print(f"  {name:<24} {value / 1e6:>10.1f} ms" if name.endswith("_ns") else f"  {name:<24} {value:>10}", file=file)
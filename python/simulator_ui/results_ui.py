@@ -1,15 +1,10 @@
-import random
 from enum import Enum
-from PySide6.QtWidgets import (QWidget, QFrame, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QPushButton)
+from PySide6.QtWidgets import (QWidget, QFrame, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QPushButton, QComboBox)
 from PySide6.QtCore import (Qt)
 from PySide6.QtGui import (QCursor, QPixmap)
-from PySide6 import QtCharts
-import os
-import pyqtgraph as pg
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-
-BATTERY_IMAGE_PATH = os.path.join(os.path.dirname(__file__), 'images', 'Battery.png')
+import numpy as np
+from simulator_ui.simulation_worker import SPEEDS, DEFAULT_SPEED
+from simulator_ui.battery_gauge import BatteryGauge, BATTERY_IMAGE_PATH
 
 class StopButtonLabel(Enum):
     STOP_SIMULATION = "Stop Simulation"
@@ -20,95 +15,96 @@ class ResultsWidget(QWidget):
     def __init__(self, simulator):
         super().__init__()
         self.simulator = simulator["object"]
+        self.lock = simulator['lock']
+        self.worker = simulator['worker']
         self.layout = QVBoxLayout()
         self.state = simulator['state']
         self.timer = simulator['timer']
         self.plot_linear_data = simulator['plot_linear_data']
-        self.plot_graph = pg.PlotWidget(title="Global Energy Production and Consuption over time")
-        self.plot_graph_global = pg.PlotWidget(title="Energy Balance over time")
-        self.plot_graph_purchase = pg.PlotWidget(title="Energy Purchase over time")
+        self.profiler = simulator['profiler']
+        self.state_version = 0
+        self.battery_capacity = 0.0
+        # Graphiques pyqtgraph créés au premier affichage de l'onglet (voir showEvent)
+        self.plots_ready = False
         self.table_producer = simulator['table']['producer']
         self.table_consumer = simulator['table']['consumer']
         self.donut_chart = QWidget()
         self.init_ui()
     
-    #Override    
-    def resizeEvent(self, event):
-        self.draw_donut_battery()
-        
     def update_results(self):
-        #def fetch_and_update():
-        if 'producers' in self.state:
-            weather_factor = random.uniform(0.0, 1.0)
-            self.simulator.update()
-            #TODO: If energy_update < 0, enregistrer le montant d'énergie manquante et le temps pour en faire un graphique
-            self.state = self.simulator.get_state()
-            
-            #Update Donut Data
-            self.ax.clear()
-            charge = (self.state["battery"]["stored_energy"] / self.state["battery"]["capacity"]) * 100
-            self.sizes = [round(charge), round(100 - charge)]
-            
-            self.draw_donut_battery()
-            self.plot_linear_data['time'].append(len(self.plot_linear_data['time']))
-            print("Energy update : ", self.state['purchase_energy'])
-            if self.plot_linear_data['purchase']:
-                self.plot_linear_data['purchase'].append(self.state['purchase_energy'])
-            else:
-                self.plot_linear_data['purchase'].append(0)
-            self.plot_linear_data['battery'].append(self.state['battery']['stored_energy'])
-            total_production = 0
-            if 'solar' not in self.state['producers']:
-                self.state['producers']['solar'] = 0
-            total_production += self.state['producers']['solar']
-            self.plot_linear_data['solar'].append(self.state['producers']['solar'])
-            if 'wind' not in self.state['producers']:
-                self.state['producers']['wind'] = 0
-            total_production += self.state['producers']['wind']
-            self.plot_linear_data['total_production'].append(total_production)
-            self.plot_linear_data['wind'].append(self.state['producers']['wind'])
-            total_demand = 0
-            if 'industry' in self.state['consumers']:
-                total_demand += self.state['consumers']['industry']
-            else:
-                self.state['consumers']['industry'] = 0
-            self.plot_linear_data['industry'].append(self.state['consumers']['industry'])
-            if 'household' in self.state['consumers']:
-                total_demand += self.state['consumers']['household']
-            else:
-                self.state['consumers']['household'] = 0
-            self.plot_linear_data['household'].append(self.state['consumers']['household'])
-            self.plot_linear_data['demand'].append(total_demand)
-            self.industry_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['industry'])
-            self.household_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['household'])
-            self.solar_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['solar'])
-            self.wind_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['wind'])
-            #self.demand_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['demand'])
-            self.battery_level_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['battery'])
+        profiler = self.profiler
+        # Récupérer les pas simulés par le worker depuis la dernière image
+        with profiler.section("take"):
+            batch = self.worker.take()
+        if batch is None:
+            return
+        #TODO: If energy_update < 0, enregistrer le montant d'énergie manquante et le temps pour en faire un graphique
+        with profiler.section("state"), self.lock:
+            # Seuls les champs modifiés depuis la dernière image sont renvoyés
+            self.state_version, changes = self.simulator.get_state_delta(self.state_version)
+        self.battery_capacity = changes.get("battery_capacity", self.battery_capacity)
 
-            self.production_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['total_production'])
-            self.consuption_curve.setData(self.plot_linear_data["time"], self.plot_linear_data['demand'])
-            self.battery_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['battery'])        
-        
-            self.purchase_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['purchase'])
-        #return fetch_and_update
+        #Update Donut Data (repeint seulement si le pourcentage affiché change)
+        with profiler.section("gauge"):
+            if self.battery_capacity > 0:
+                self.battery_gauge.set_charge(batch["stored_energy"][-1] / self.battery_capacity * 100)
+        with profiler.section("log"):
+            print("Energy update : ", batch['purchase_energy'][-1])
+        with profiler.section("history"):
+            start = self.plot_linear_data.total
+            self.plot_linear_data.extend({
+                'time': np.arange(start, start + len(batch['time'])),
+                'purchase': batch['purchase_energy'],
+                'battery': batch['stored_energy'],
+                'solar': batch['solar'],
+                'wind': batch['wind'],
+                'total_production': batch['solar'] + batch['wind'],
+                'industry': batch['industry'],
+                'household': batch['household'],
+                'demand': batch['industry'] + batch['household'],
+            })
+        with profiler.section("curves"):
+            self.update_curves()
+
+    #Override
+    def showEvent(self, event):
+        if not self.plots_ready:
+            self.init_plots()
+            # Tracer l'historique accumulé tant que l'onglet était caché
+            self.update_curves()
+        super().showEvent(event)
+
+    def update_curves(self):
+        if not self.plots_ready:
+            return
+        # Vues contiguës sur les tampons circulaires : aucune copie
+        data = self.plot_linear_data
+        time = data['time']
+        self.industry_curve.setData(time, data['industry'], skipFiniteCheck=True)
+        self.household_curve.setData(time, data['household'], skipFiniteCheck=True)
+        self.solar_curve.setData(time, data['solar'], skipFiniteCheck=True)
+        self.wind_curve.setData(time, data['wind'], skipFiniteCheck=True)
+        #self.demand_curve.setData(time, data['demand'], skipFiniteCheck=True)
+        self.battery_level_curve.setData(time, data['battery'], skipFiniteCheck=True)
+
+        self.production_curve.setData(time, data['total_production'], skipFiniteCheck=True)
+        self.consuption_curve.setData(time, data['demand'], skipFiniteCheck=True)
+        self.battery_curve.setData(time, data['battery'], skipFiniteCheck=True)
+
+        self.purchase_curve.setData(time, data['purchase'], skipFiniteCheck=True)
         
     def stop_reset(self):
-        if self.stop_button.text() == StopButtonLabel.STOP_SIMULATION.value and self.timer.isActive():
+        if self.stop_button.text() == StopButtonLabel.STOP_SIMULATION.value and not self.worker.is_paused():
+            self.worker.pause()
             self.timer.stop()
+            self.update_results()
             self.stop_button.setText(StopButtonLabel.RESET_SIMULATION.value)
             print(StopButtonLabel.STOP_SIMULATION.value)
         elif self.stop_button.text() == StopButtonLabel.RESET_SIMULATION.value:
-            self.simulator.reset()
-            self.plot_linear_data['time'].clear()
-            self.plot_linear_data['battery'].clear()
-            self.plot_linear_data['solar'].clear()
-            self.plot_linear_data['wind'].clear()
-            self.plot_linear_data['industry'].clear()
-            self.plot_linear_data['household'].clear()
-            self.plot_linear_data['total_production'].clear()
-            self.plot_linear_data['demand'].clear()
-            self.plot_linear_data['purchase'].clear()
+            with self.lock:
+                self.simulator.reset()
+            self.worker.clear()
+            self.plot_linear_data.clear()
             self.state = {
                 'battery': {
                     'capacity': 'N/A', 
@@ -126,22 +122,8 @@ class ResultsWidget(QWidget):
                 'purchase_energy': 'N/A'
                 }
             self.table_producer.clear()
-            self.table_producer.setRowCount(0)
             self.table_consumer.clear()
-            self.table_consumer.setRowCount(0)
-            self.solar_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['solar'])
-            self.wind_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['wind'])
-            self.industry_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['industry'])
-            self.household_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['household'])
-            #self.demand_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['demand'])
-            self.battery_level_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['battery'])
-            
-            self.production_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['total_production'])
-            self.consuption_curve.setData(self.plot_linear_data["time"], self.plot_linear_data['demand'])
-            self.battery_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['battery'])
-            
-            self.purchase_curve.setData(self.plot_linear_data['time'], self.plot_linear_data['purchase'])
-            self.draw_donut_battery()
+            self.update_curves()
             self.stop_button.setText(StopButtonLabel.STOP_SIMULATION.value)
     
     def add_image_overlay(self, layout):
@@ -151,24 +133,57 @@ class ResultsWidget(QWidget):
         image_label.setPixmap(pixmap.scaled(100, 100, Qt.KeepAspectRatio))
         layout.addWidget(image_label, 1, 2, 1, 1)
      
-    def draw_donut_battery(self):
-        def value(val):
-            return f'{round(val)}%'
-        print("SIZES : ", self.sizes)
-        
-        self.ax.pie(self.sizes, colors=self.colors, wedgeprops=dict(width=0.3), autopct=value)
-        
-        img = plt.imread(BATTERY_IMAGE_PATH)
-        self.ax.imshow(img, extent=(-0.3, 0.3, -0.3, 0.3), aspect='auto', zorder=10)
-        self.ax.set_aspect('equal')
-        
-        self.canvas.draw()
-        
     def init_ui(self):
         result = QGroupBox("Simulation Results")
         infoText = QLabel("<h2>Visualization<h2>")
         infoText.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         
+        #Button to stop simulation
+        self.stop_button = QPushButton(StopButtonLabel.STOP_SIMULATION.value, self)
+        self.stop_button.setCursor(QCursor(Qt.PointingHandCursor))
+
+        #Simulation speed
+        speed_label = QLabel("Simulation speed:")
+        self.speed_box = QComboBox()
+        self.speed_box.addItems(list(SPEEDS))
+        self.speed_box.setCurrentText(DEFAULT_SPEED)
+        self.speed_box.currentTextChanged.connect(lambda text: self.worker.set_speed(SPEEDS[text]))
+        
+        #Donut Chart
+        self.battery_gauge = BatteryGauge(self)
+        
+        layout = QVBoxLayout(result)
+        h_frame = QFrame(self)
+        h_layout = QHBoxLayout(h_frame)
+        h_layout.addWidget(self.battery_gauge)
+        layout.addWidget(infoText)
+        layout.addWidget(h_frame)
+        # Emplacements des graphiques, remplis par init_plots
+        self.result_layout = layout
+        self.balance_layout = h_layout
+        control_frame = QFrame(self)
+        control_layout = QHBoxLayout(control_frame)
+        control_layout.addWidget(speed_label)
+        control_layout.addWidget(self.speed_box)
+        control_layout.addWidget(self.stop_button)
+        layout.addWidget(control_frame)
+        
+        
+        self.layout.addWidget(result)
+        self.setLayout(layout)
+        
+        # Afficher les derniers résultats du worker à chaque image
+        self.timer.timeout.connect(lambda : self.update_results())
+        self.stop_button.clicked.connect(self.stop_reset)
+
+    def init_plots(self):
+        """Create the pyqtgraph plots; pyqtgraph is only imported the first time the tab is shown."""
+        import pyqtgraph as pg
+
+        self.plot_graph = pg.PlotWidget(title="Global Energy Production and Consuption over time")
+        self.plot_graph_global = pg.PlotWidget(title="Energy Balance over time")
+        self.plot_graph_purchase = pg.PlotWidget(title="Energy Purchase over time")
+
         self.plot_graph.setLabel('left', 'Power (kW)')
         self.plot_graph.setLabel('bottom', 'Time (h)')
         self.plot_graph.addLegend()
@@ -193,34 +208,13 @@ class ResultsWidget(QWidget):
         self.battery_curve = self.plot_graph_global.plot(pen='g', name="Battery Level")
         
         self.purchase_curve = self.plot_graph_purchase.plot(pen='r', name="Energy Purchased from Grid")
-        
-        #Button to stop simulation
-        self.stop_button = QPushButton(StopButtonLabel.STOP_SIMULATION.value, self)
-        self.stop_button.setCursor(QCursor(Qt.PointingHandCursor))
-        
-        #Donut Chart
-        self.figure, self.ax = plt.subplots()
-        self.canvas = FigureCanvas(self.figure)
-        self.labels = ["Charge", "Discharge"]
-        self.sizes = [50, 50]
-        self.colors = ['#2ABf9E', '#9e9d9dff']
-        self.draw_donut_battery()
-        
-        layout = QVBoxLayout(result)
-        h_frame = QFrame(self)
-        h_layout = QHBoxLayout(h_frame)
-        h_layout.addWidget(self.plot_graph_global)
-        h_layout.addWidget(self.canvas)
-        h_layout.addWidget(self.plot_graph_purchase)
-        layout.addWidget(infoText)
-        layout.addWidget(self.plot_graph)
-        layout.addWidget(h_frame)
-        layout.addWidget(self.stop_button)
-        
-        
-        self.layout.addWidget(result)
-        self.setLayout(layout)
-        
-        # Mettre à jour les résultats toutes les secondes
-        self.timer.timeout.connect(lambda : self.update_results())
-        self.stop_button.clicked.connect(self.stop_reset)
\ No newline at end of file
+
+        # Ne tracer que la partie visible, sous-échantillonnée à la résolution de l'écran
+        for plot_widget in (self.plot_graph, self.plot_graph_global, self.plot_graph_purchase):
+            plot_widget.setDownsampling(auto=True, mode='peak')
+            plot_widget.setClipToView(True)
+
+        self.result_layout.insertWidget(1, self.plot_graph)
+        self.balance_layout.insertWidget(0, self.plot_graph_global)
+        self.balance_layout.addWidget(self.plot_graph_purchase)
+        self.plots_ready = True
@@ -1,17 +1,24 @@
-import random
 from PySide6.QtCore import Qt
 from PySide6.QtGui import (QCursor)
-from PySide6.QtWidgets import (QVBoxLayout, QWidget, QGroupBox, QLabel, QGridLayout, QComboBox, QSpinBox, QPushButton, QTableWidget, QTableWidgetItem, QHBoxLayout)
+from PySide6.QtWidgets import (QVBoxLayout, QWidget, QGroupBox, QLabel, QGridLayout, QComboBox, QSpinBox, QPushButton, QTableView, QHeaderView, QHBoxLayout, QFileDialog, QMessageBox)
+from grid_simulator import PRODUCER_TYPES, CONSUMER_TYPES
+from simulator_ui.simulation_worker import DISPLAY_INTERVAL_MS
+from simulator_ui.asset_model import ACTION_COLUMN
 
 
 class SettingWidget(QWidget):
     def __init__(self, simulator):
         self.simulator = simulator
         super().__init__()
-        self.producer_table = simulator['table']['producer']
-        self.consumer_table = simulator['table']['consumer']
+        self.producer_model = simulator['table']['producer']
+        self.consumer_model = simulator['table']['consumer']
+        # Vues virtualisées : seules les lignes visibles sont dessinées
+        self.producer_table = self.asset_view(self.producer_model)
+        self.consumer_table = self.asset_view(self.consumer_model)
         self.simulator = simulator['object']
         self.timer = simulator['timer']
+        self.lock = simulator['lock']
+        self.worker = simulator['worker']
         self.state = simulator['state']
         self.layout = QVBoxLayout()
         self.init_ui()
@@ -25,7 +32,7 @@ class SettingWidget(QWidget):
         add_producer_box = QGroupBox()
         add_producer_box.setTitle("Add Producer")
         producer_type = QComboBox()
-        producer_type.addItems(["solar", "wind", "grid"])
+        producer_type.addItems(PRODUCER_TYPES)
         capacity_input = QSpinBox()
         capacity_input.setMaximum(1000.0)
         capacity_input.setValue(50.0)
@@ -37,19 +44,13 @@ class SettingWidget(QWidget):
         h_p_layout.addWidget(add_producer_button)
         add_producer_box.setLayout(h_p_layout)
         
-        header = ["Type", "Capacity (kW)", "Action"]
-        self.producer_table.setColumnCount(len(header))
-        self.producer_table.setHorizontalHeaderLabels(header)
-        self.producer_table.setRowCount(0)
-        self.producer_table.setColumnCount(len(header))
-       
         add_producer_button.clicked.connect(lambda: self.add_producer_row(producer_type.currentText(), capacity_input.value()))
         
         #Consumer Section 
         add_consumer_box = QGroupBox()
         add_consumer_box.setTitle("Add Consumer")
         consumer_type = QComboBox()
-        consumer_type.addItems(["household", "industry"])
+        consumer_type.addItems(CONSUMER_TYPES)
         demand_input = QSpinBox()
         demand_input.setMaximum(1000.0)
         demand_input.setValue(50.0)
@@ -61,14 +62,15 @@ class SettingWidget(QWidget):
         h_c_layout.addWidget(add_consumer_button)
         add_consumer_box.setLayout(h_c_layout)
         
-        header_consumer = ["Type", "Base Demand (kW)", "Action"]
-        self.consumer_table.setColumnCount(len(header_consumer))
-        self.consumer_table.setHorizontalHeaderLabels(header_consumer)
-        self.consumer_table.setRowCount(0)
-        self.consumer_table.setColumnCount(len(header_consumer))
-        
         add_consumer_button.clicked.connect(lambda: self.add_consumer_row(consumer_type.currentText(), demand_input.value()))
+
+        self.producer_table.clicked.connect(lambda index: self.asset_clicked(index, self.producer_model, self.simulator.remove_producer))
+        self.consumer_table.clicked.connect(lambda index: self.asset_clicked(index, self.consumer_model, self.simulator.remove_consumer))
         
+        load_button = QPushButton("Load Scenario...", self)
+        load_button.setCursor(QCursor(Qt.PointingHandCursor))
+        load_button.clicked.connect(self.load_scenario)
+
         confirm_button = QPushButton("Confirm Settings", self)
         confirm_button.setCursor(QCursor(Qt.PointingHandCursor))
         confirm_button.clicked.connect(self.get_simulator_state)
@@ -79,58 +81,69 @@ class SettingWidget(QWidget):
         layout.addWidget(self.producer_table, 2, 0 )
         layout.addWidget(add_consumer_box, 1, 1)
         layout.addWidget(self.consumer_table, 2, 1)
-        layout.addWidget(confirm_button, 3, 0, 1, 2)
+        layout.addWidget(load_button, 3, 0, 1, 2)
+        layout.addWidget(confirm_button, 4, 0, 1, 2)
         self.layout.addWidget(result)
         self.setLayout(layout)
         
-    def delete_producer_row(self):
-        button = self.delete_producer_button.sender()
-        if button:
-            row = self.producer_table.indexAt(button.pos()).row()
-            self.simulator.remove_producer(row)
-            self.producer_table.removeRow(row)
-    
-    def delete_consumer_row(self):
-        button = self.delete_consumer_button.sender()
-        if button:
-            row = self.consumer_table.indexAt(button.pos()).row()
-            self.simulator.remove_consumer(row)
-            self.consumer_table.removeRow(row)
-        
+    @staticmethod
+    def asset_view(model):
+        view = QTableView()
+        view.setModel(model)
+        # Hauteur de ligne fixe : pas de mesure du contenu de chaque ligne
+        view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        view.verticalHeader().hide()
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        view.setCursor(QCursor(Qt.PointingHandCursor))
+        return view
+
+    def asset_clicked(self, index, model, remove):
+        # Colonne "Action" : supprimer l'actif de la ligne cliquée
+        if index.column() == ACTION_COLUMN:
+            id = model.data(index, Qt.UserRole)
+            with self.lock:
+                remove(id)
+            model.remove_id(id)
+
     def add_producer_row(self, producer_type, capacity):
-        row = self.producer_table.rowCount()
-        self.producer_table.setRowCount(row + 1)
-        print("Adding producer:", row, producer_type, capacity)
-        self.producer_table.setItem(row, 0, QTableWidgetItem(producer_type))
-        self.producer_table.setItem(row, 1, QTableWidgetItem(str(capacity)))
-        self.simulator.add_producer(row, producer_type, capacity)
-        self.delete_producer_button = QPushButton("Delete")
-        self.delete_producer_button.clicked.connect(lambda: self.delete_producer_row())
-        self.delete_producer_button.setCursor(QCursor(Qt.PointingHandCursor))
-        self.delete_producer_button.setProperty("class", "small_button")
-        #delete_button.setDisabled(True)
-        self.producer_table.setCellWidget(row, 2, self.delete_producer_button)
+        id = self.producer_model.next_id()
+        print("Adding producer:", id, producer_type, capacity)
+        with self.lock:
+            self.simulator.add_producer(id, producer_type, capacity)
+        self.producer_model.append(id, producer_type, capacity)
         
     def add_consumer_row(self, consumer_type, capacity):
-        row = self.consumer_table.rowCount()
-        self.consumer_table.setRowCount(row + 1)
-        print("Adding consumer:", row, consumer_type, capacity)
-        self.consumer_table.setItem(row, 0, QTableWidgetItem(consumer_type))
-        self.consumer_table.setItem(row, 1, QTableWidgetItem(str(capacity)))
-        self.simulator.add_consumer(row, consumer_type, capacity)
-        self.delete_consumer_button = QPushButton("Delete")
-        self.delete_consumer_button.clicked.connect(lambda: self.delete_consumer_row())
-        self.delete_consumer_button.setCursor(QCursor(Qt.PointingHandCursor))
-        self.delete_consumer_button.setProperty("class", "small_button")
-        #delete_consumer_button.setDisabled(True)
-        self.consumer_table.setCellWidget(row, 2, self.delete_consumer_button)
+        id = self.consumer_model.next_id()
+        print("Adding consumer:", id, consumer_type, capacity)
+        with self.lock:
+            self.simulator.add_consumer(id, consumer_type, capacity)
+        self.consumer_model.append(id, consumer_type, capacity)
+
+    def load_scenario(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Load Scenario", "", "Scenario (*.json)")
+        if path:
+            self.load_scenario_file(path)
+
+    def load_scenario_file(self, path):
+        """Replace the grid configuration with a scenario file and display its assets."""
+        try:
+            with self.lock:
+                self.simulator.load_config(path)
+                producers = self.simulator.producers()
+                consumers = self.simulator.consumers()
+        except (OSError, ValueError) as error:
+            QMessageBox.warning(self, "Load Scenario", str(error))
+            return
+        self.worker.clear()
+        self.producer_model.set_assets(producers["id"], producers["kind"], producers["capacity"])
+        self.consumer_model.set_assets(consumers["id"], consumers["kind"], consumers["base_demand"])
         
     def get_simulator_state(self):
-        self.state = self.simulator.get_state()
-        if self.state['producers'] and self.state['consumers']:
-            weather_factor = random.uniform(0.0, 1.0)
-            self.simulator.update()
-            self.state = self.simulator.get_state()
-            self.timer.start(1000)
+        with self.lock:
+            self.state = self.simulator.get_state_array()
+        if self.state['n_producers'] and self.state['n_consumers']:
+            # Le worker simule, le timer ne fait qu'afficher
+            self.worker.resume()
+            self.timer.start(DISPLAY_INTERVAL_MS)
         print(self.state)
         #print("Current Simulator State:", self.simulator["state"]) 
\ No newline at end of file
@@ -12,9 +12,10 @@ class SetupWidget(QWidget):
         self.init_ui()
     
     def validate_edition(self):
-        self.simulator["object"].update_battery(self.capacity.value(), self.charge_box.value())
+        with self.simulator["lock"]:
+            self.simulator["object"].update_battery(self.capacity.value(), self.charge_box.value())
+            print(self.simulator["object"].get_state())
         self.edit_button.toggle()
-        print(self.simulator["object"].get_state())
         
     def init_ui(self):
         result = QGroupBox("Setup Simulator")
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+from PySide6.QtCore import QThread
+
+# Vitesses proposées : secondes simulées par seconde réelle (None = aussi vite que possible)
+SPEEDS = {
+    "Real time": 1.0,
+    "1 hour / s": 3600.0,
+    "1 day / s": 86400.0,
+    "Flat out": None,
+}
+DEFAULT_SPEED = "1 hour / s"
+# Intervalle de rafraîchissement de l'affichage (~30 images par seconde)
+DISPLAY_INTERVAL_MS = 33
+
+
+class SimulationWorker(QThread):
+    """
+    Steps the grid on its own thread, decoupled from the Qt event loop.
+    Batches of `GridSimulator.run` output are queued in a thread-safe buffer that the GUI
+    drains with `take` at display rate. Every access to the grid, from this thread or the
+    GUI, must hold `lock`.
+    """
+
+    def __init__(self, simulator, lock, max_batch_steps=1000, max_pending_batches=64):
+        super().__init__()
+        self.simulator = simulator
+        self.lock = lock
+        self.max_batch_steps = max_batch_steps
+        self._speed = SPEEDS[DEFAULT_SPEED]
+        self._paused = True
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._batches = deque()
+        self._max_pending_batches = max_pending_batches
+
+    def set_speed(self, speed):
+        """Simulated seconds per wall-clock second, or None to step as fast as possible."""
+        with self._condition:
+            self._speed = speed
+
+    def resume(self):
+        """Start stepping (and the thread itself on first call)."""
+        with self._condition:
+            self._paused = False
+            self._condition.notify_all()
+        if not self.isRunning():
+            self.start()
+
+    def pause(self):
+        with self._condition:
+            self._paused = True
+
+    def is_paused(self):
+        with self._condition:
+            return self._paused
+
+    def stop(self):
+        """Stop the thread and wait for it to finish."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self.wait()
+
+    def clear(self):
+        """Drop the batches not yet taken by the GUI."""
+        with self._condition:
+            self._batches.clear()
+            self._condition.notify_all()
+
+    def take(self):
+        """Return every pending step as one dict of arrays (see RUN_COLUMNS), or None if there is none."""
+        with self._condition:
+            batches = list(self._batches)
+            self._batches.clear()
+            self._condition.notify_all()
+        if not batches:
+            return None
+        if len(batches) == 1:
+            return batches[0]
+        return {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]}
+
+    def run(self):
+        last = time.perf_counter()
+        due_steps = 0.0
+        while True:
+            with self._condition:
+                # Attendre la reprise, ou que la GUI ait vidé le tampon
+                while not self._stopped and (self._paused or len(self._batches) >= self._max_pending_batches):
+                    self._condition.wait()
+                    last = time.perf_counter()
+                if self._stopped:
+                    return
+                speed = self._speed
+
+            if speed is None:
+                n_steps = self.max_batch_steps
+            else:
+                now = time.perf_counter()
+                due_steps += (now - last) * speed / self.simulator.time_step
+                last = now
+                n_steps = min(int(due_steps), self.max_batch_steps)
+                if n_steps == 0:
+                    # Dormir jusqu'au prochain pas, sans dépasser une image (~60 Hz)
+                    time.sleep(min((1.0 - due_steps) * self.simulator.time_step / speed, 1 / 60))
+                    continue
+                # Si la simulation prend du retard, abandonner l'arriéré plutôt que de l'accumuler
+                due_steps = min(due_steps - n_steps, self.max_batch_steps)
+
+            with self.lock:
+                batch = self.simulator.run(n_steps)
+            with self._condition:
+                self._batches.append(batch)
@@ -0,0 +1,11 @@
+"""
+Headless command line of the simulator, for batch studies on servers without a display.
+
+Run from the `python` directory:
+
+    python -m smartgrid run ../scenarios/*.json --workers 8 --steps 8760 --out results/
+
+Each scenario file (see include/scenario.h) runs on its own GridSimulator in a pool of worker
+processes; its run columns are streamed to `<out>/<scenario name>/` (see results_store), and a
+summary of every run is written to `<out>/summary.json`. Nothing here imports Qt.
+"""
@@ -0,0 +1,42 @@
+import argparse
+import glob
+import os
+import sys
+
+from smartgrid.batch import run_batch, throughput_summary
+
+
+def expand(patterns):
+    """Scenario paths, expanding the patterns the shell left as they were (e.g. on Windows)."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(matches or [pattern])
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m smartgrid", description="Run the simulator without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="simulate scenario files in parallel and stream the results to disk")
+    run.add_argument("scenarios", nargs="+", help="scenario JSON files (see include/scenario.h)")
+    run.add_argument("--steps", type=int, default=8760, help="time steps simulated per scenario")
+    run.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    run.add_argument("--out", default="results", help="directory receiving one results directory per scenario")
+    run.add_argument("--seed", type=int, default=0, help="seed of the scenarios that do not set one")
+    run.add_argument("--chunk-steps", type=int, default=100_000, help="steps simulated between two writes")
+    args = parser.parse_args(argv)
+
+    if args.steps < 1 or args.workers < 1 or args.chunk_steps < 1:
+        parser.error("--steps, --workers and --chunk-steps must be at least 1")
+    paths = expand(args.scenarios)
+    try:
+        summaries, failures, wall = run_batch(paths, args.steps, args.out, args.workers, args.seed, args.chunk_steps)
+    except ValueError as error:
+        parser.error(str(error))
+    print(throughput_summary(summaries, wall, min(args.workers, len(paths))))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Parallel execution of scenario files, each streamed to its own results directory.
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+SUMMARY_FILE = "summary.json"
+
+
+def run_scenario(path, n_steps, directory, seed=0, chunk_steps=100_000):
+    """
+    Simulate `n_steps` of one scenario file, streaming the run columns to `directory`.
+    Returns a summary dict: scenario, directory, steps, seconds and total_purchase (kWh).
+    """
+    # Import dans le worker : chaque processus charge sa propre librairie
+    from grid_simulator import GridSimulator
+    from results_store import open_results, run_to_disk
+
+    start = time.perf_counter()
+    simulator = GridSimulator.from_config(path, seed=seed)
+    steps = run_to_disk(simulator, n_steps, directory, chunk_steps)
+    seconds = time.perf_counter() - start
+    return {
+        "scenario": str(path),
+        "directory": str(directory),
+        "steps": steps,
+        "seconds": seconds,
+        "total_purchase": float(open_results(directory)["purchase_energy"].sum()),
+    }
+
+
+def run_batch(paths, n_steps, out, workers=None, seed=0, chunk_steps=100_000, log=print):
+    """
+    Run every scenario of `paths` in `workers` processes (None uses every CPU), writing the
+    results of scenario `name.json` to `out/name/` and a summary of every run to
+    `out/summary.json`. A scenario that fails is reported and skipped.
+    Returns (summaries, failures, wall seconds); failures maps scenario path to error message.
+    """
+    paths = [Path(path) for path in paths]
+    names = [path.stem for path in paths]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Several scenarios would write to the same directory: {', '.join(duplicates)}")
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, len(paths)) or 1
+
+    summaries, failures = [], {}
+
+    def report(path, job):
+        try:
+            summary = job()
+        except (OSError, ValueError) as error:
+            failures[str(path)] = str(error)
+            log(f"{path.stem:<30} failed: {error}")
+            return
+        summaries.append(summary)
+        log(f"{path.stem:<30} {summary['steps']:>10} steps {summary['seconds']:>8.2f} s "
+            f"{summary['steps'] / summary['seconds']:>12,.0f} steps/s")
+
+    start = time.perf_counter()
+    if workers == 1:
+        # Un seul worker : dans ce processus, sans pool
+        for path in paths:
+            report(path, lambda: run_scenario(path, n_steps, out / path.stem, seed, chunk_steps))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_scenario, path, n_steps, out / path.stem, seed, chunk_steps): path
+                       for path in paths}
+            for future in as_completed(futures):
+                report(futures[future], future.result)
+    wall = time.perf_counter() - start
+
+    summaries.sort(key=lambda summary: summary["scenario"])
+    with open(out / SUMMARY_FILE, "w") as f:
+        json.dump({"steps_per_scenario": n_steps, "workers": workers, "seconds": wall,
+                   "runs": summaries, "failures": failures}, f, indent=2)
+    return summaries, failures, wall
+
+
+def throughput_summary(summaries, wall, workers):
+    """One line of totals: scenarios, steps, wall time and steps per second."""
+    steps = sum(summary["steps"] for summary in summaries)
+    busy = sum(summary["seconds"] for summary in summaries)
+    return (f"{len(summaries)} scenarios, {steps:,} steps in {wall:.2f} s: {steps / max(wall, 1e-9):,.0f} steps/s "
+            f"({steps / max(busy, 1e-9):,.0f} steps/s per worker, {workers} workers)")
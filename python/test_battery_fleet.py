@@ -0,0 +1,108 @@
+import unittest
+import numpy as np
+from grid_simulator import GridSimulator
+
+class TestBatteryFleet(unittest.TestCase):
+    def setUp(self):
+        # Sans batterie principale : tout l'excédent ou le déficit passe par la flotte
+        self.simulator = GridSimulator(battery_capacity=0.0, charge_rate=0.0, seed=1)
+        self.simulator.add_producer(1, "grid", 10.0)
+        self.simulator.add_consumer(1, "household", 0.0)
+
+    def step(self, demand, n_steps=1):
+        """Steps with 10 kW produced and `demand` kW consumed."""
+        return self.simulator.replay(producer_factors={"grid": [1.0] * n_steps},
+                                     consumer_demand={"household": [demand] * n_steps})
+
+    def stored(self):
+        return self.simulator.batteries()["stored_energy"].tolist()
+
+    def test_proportional(self):
+        self.simulator.add_batteries([1, 2, 3], [10.0, 10.0, 10.0], [2.0, 1.0, 2.0])
+        self.step(demand=7.0)
+        np.testing.assert_allclose(self.stored(), [6.2, 5.6, 6.2])
+        # Surplus au-delà de ce que la flotte peut prendre : perdu, rien n'est acheté
+        results = self.step(demand=0.0)
+        np.testing.assert_allclose(self.stored(), [8.2, 6.6, 8.2])
+        self.assertEqual(results["purchase_energy"][0], 0.0)
+        self.assertAlmostEqual(results["fleet_stored_energy"][0], 23.0)
+
+    def test_priority(self):
+        self.simulator.add_batteries([1, 2, 3], [10.0, 10.0, 10.0], 2.0, priorities=[2, 0, 1])
+        self.simulator.set_fleet_policy("priority")
+        self.step(demand=7.0)
+        np.testing.assert_allclose(self.stored(), [5.0, 7.0, 6.0])
+        results = self.step(demand=13.0)
+        np.testing.assert_allclose(self.stored(), [5.0, 5.0, 5.0])
+        self.assertEqual(results["purchase_energy"][0], 0.0)
+
+    def test_soc_balancing(self):
+        self.simulator.add_batteries([1, 2], [10.0, 40.0], [5.0, 5.0])
+        self.simulator.set_fleet_policy("priority")
+        self.simulator.add_batteries([3], [10.0], [5.0], priorities=[-1])
+        self.step(demand=6.0)  # Batterie 3 : 5 -> 9 kWh
+        self.simulator.set_fleet_policy("soc_balancing")
+        self.step(demand=7.0)
+        # 3 kWh vont aux batteries les moins chargées, vers un état de charge commun
+        capacities = np.array([10.0, 40.0, 10.0])
+        stored = np.array(self.stored())
+        self.assertAlmostEqual(stored.sum(), 5 + 20 + 9 + 3)
+        np.testing.assert_allclose(stored[:2] / capacities[:2], 28 / 50)
+        self.assertEqual(stored[2], 9.0)
+        # Décharge : la plus chargée d'abord
+        self.step(demand=12.0)
+        stored = np.array(self.stored())
+        self.assertAlmostEqual(stored[2], 7.0, places=6)
+
+    def test_efficiency_and_deficit(self):
+        self.simulator.add_batteries([1], [10.0], [4.0], efficiencies=0.81)
+        self.step(demand=8.0)
+        self.assertAlmostEqual(self.stored()[0], 5.0 + 2.0 * 0.9)
+        # 3 kWh livrés en prélèvent 3 / 0.9, le reste est acheté
+        results = self.step(demand=15.0)
+        self.assertAlmostEqual(self.stored()[0], 6.8 - 4.0 / 0.9)
+        self.assertAlmostEqual(results["purchase_energy"][0], 1.0)
+
+    def test_main_battery_first(self):
+        simulator = GridSimulator(battery_capacity=100.0, charge_rate=10.0, seed=1)
+        simulator.add_producer(1, "grid", 10.0)
+        simulator.add_consumer(1, "household", 0.0)
+        simulator.add_batteries([1], [10.0], [5.0])
+        simulator.replay(producer_factors={"grid": [1.0]}, consumer_demand={"household": [5.0]})
+        self.assertEqual(simulator.batteries()["stored_energy"].tolist(), [5.0])
+        # 20 kWh d'excédent : 10 dans la batterie principale (sa puissance max), 5 dans la flotte
+        simulator.replay(producer_factors={"grid": [2.5]}, consumer_demand={"household": [5.0]})
+        self.assertEqual(simulator.batteries()["stored_energy"].tolist(), [10.0])
+
+    def test_registry_and_snapshot(self):
+        self.simulator.add_batteries([1, 2], [10.0, 20.0], 2.0)
+        with self.assertRaises(ValueError):
+            self.simulator.add_batteries([3, 1], [10.0, 10.0], 2.0)
+        self.assertEqual(self.simulator.batteries()["id"].tolist(), [1, 2])
+        state = self.simulator.get_state_array()
+        self.assertEqual((int(state["n_batteries"]), float(state["fleet_capacity"])), (2, 30.0))
+        blob = self.simulator.snapshot()
+        self.simulator.remove_battery(1)
+        with self.assertRaises(KeyError):
+            self.simulator.remove_battery(1)
+        self.assertEqual(self.simulator.batteries()["id"].tolist(), [2])
+        self.simulator.restore(blob)
+        self.assertEqual(self.simulator.batteries()["id"].tolist(), [1, 2])
+        with self.assertRaises(ValueError):
+            self.simulator.set_fleet_policy("random")
+
+    def test_invalid_values(self):
+        # Lot refusé en entier par la librairie : aucun id enregistré, la flotte est inchangée
+        self.simulator.add_batteries([1], [10.0], 2.0)
+        for values in ({"efficiencies": [1.0, 0.0]}, {"efficiencies": [1.0, 1.5]}, {"capacities": [10.0, -1.0]},
+                       {"charge_rates": [2.0, -2.0]}, {"discharge_rates": [2.0, np.nan]}):
+            with self.subTest(**values):
+                arguments = {"capacities": [10.0, 10.0], "charge_rates": 2.0, **values}
+                with self.assertRaises(ValueError):
+                    self.simulator.add_batteries([2, 3], **arguments)
+                self.assertEqual(self.simulator.batteries()["id"].tolist(), [1])
+        self.simulator.add_batteries([2, 3], [10.0, 10.0], 2.0)
+        self.assertEqual(self.simulator.batteries()["id"].tolist(), [1, 2, 3])
+
+if __name__ == '__main__':
+    unittest.main()
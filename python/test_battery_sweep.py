@@ -0,0 +1,37 @@
+import tempfile
+import unittest
+from battery_sweep import sweep, SWEEP_COLUMNS
+
+PRODUCERS = [(1, "solar", 50.0), (2, "wind", 30.0)]
+CONSUMERS = [(1, "household", 20.0), (2, "industry", 50.0)]
+
+class TestBatterySweep(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_sweep(self):
+        table = sweep([100.0, 200.0], [10.0, 20.0], PRODUCERS, CONSUMERS,
+                      n_steps=96, seed=1, workers=2, cache_dir=self.cache_dir.name)
+        self.assertEqual(list(table.columns), SWEEP_COLUMNS)
+        self.assertEqual(len(table), 4)
+        self.assertFalse(table["cached"].any())
+        self.assertTrue((table["total_purchase"] >= table["peak_purchase"]).all())
+        # Même graine : une batterie plus grande n'achète pas plus
+        small = table[(table.battery_capacity == 100.0) & (table.charge_rate == 20.0)].total_purchase.iloc[0]
+        large = table[(table.battery_capacity == 200.0) & (table.charge_rate == 20.0)].total_purchase.iloc[0]
+        self.assertLessEqual(large, small)
+
+    def test_sweep_cache(self):
+        first = sweep([100.0, 200.0], [10.0], PRODUCERS, CONSUMERS,
+                      n_steps=48, seed=1, workers=1, cache_dir=self.cache_dir.name)
+        second = sweep([100.0, 200.0, 300.0], [10.0], PRODUCERS, CONSUMERS,
+                       n_steps=48, seed=1, workers=1, cache_dir=self.cache_dir.name)
+        self.assertEqual(second["cached"].tolist(), [True, True, False])
+        self.assertEqual(first["total_purchase"].tolist(), second["total_purchase"].tolist()[:2])
+
+
+if __name__ == '__main__':
+    unittest.main()
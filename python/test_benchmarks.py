@@ -0,0 +1,38 @@
+import json
+import os
+import tempfile
+import unittest
+from benchmarks.importtime import measure, parse_importtime, total_us
+from benchmarks.runner import compare, run_benchmarks, save_results
+
+class TestBenchmarks(unittest.TestCase):
+    def test_run_benchmarks(self):
+        results = run_benchmarks(["benchmarks.bench_grid"], "ctypes_call", min_time=0.01, repeat=2, log=lambda line: None)
+        self.assertEqual(list(results), ["bench_grid.ctypes_call"])
+        self.assertGreater(results["bench_grid.ctypes_call"]["median"], 0)
+        self.assertEqual(results["bench_grid.ctypes_call"]["unit"], "s/call")
+
+    def test_save_and_compare(self):
+        with tempfile.TemporaryDirectory() as directory:
+            old = save_results({"a": {"median": 1e-3}, "b": {"median": 1e-3}}, os.path.join(directory, "old"))
+            new = save_results({"a": {"median": 2e-3}, "c": {"median": 1e-3}}, os.path.join(directory, "new"))
+            with open(new, "r") as f:
+                self.assertIn("machine", json.load(f))
+            lines = compare(old, new)
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith("a") and lines[1].endswith("slower"))
+        self.assertTrue(lines[2].endswith("(missing)"))
+
+    def test_importtime(self):
+        entries = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   numpy._core\n"
+            "import time:        30 |        150 | numpy\n"
+            "unrelated line\n")
+        self.assertEqual(entries, [("numpy._core", 1, 120, 120), ("numpy", 0, 30, 150)])
+        self.assertEqual(total_us(entries, "numpy"), 150)
+        # Interpréteur neuf : la librairie native n'est pas chargée à l'import
+        self.assertGreater(total_us(measure("grid_simulator"), "grid_simulator"), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from data_generator import (generate_profiles, iter_profiles, generate_24h_simulation, save_to_csv,
+                            save_to_json, PROFILE_COLUMNS)
+
+class TestDataGenerator(unittest.TestCase):
+    def test_generate_profiles(self):
+        profiles = generate_profiles(days=2, resolution_minutes=5, seed=1)
+        self.assertEqual(set(profiles), set(PROFILE_COLUMNS))
+        for column in profiles.values():
+            self.assertEqual(column.shape, (2 * 24 * 12,))
+        self.assertAlmostEqual(profiles["hour"][12], 1.0)
+        self.assertTrue((profiles["solar_production"] <= 50.0).all())
+        self.assertTrue((profiles["wind_factor"] >= 0.3).all())
+        again = generate_profiles(days=2, resolution_minutes=5, seed=1)
+        self.assertTrue(np.array_equal(profiles["wind_production"], again["wind_production"]))
+
+    def test_iter_profiles_matches_generate_profiles(self):
+        profiles = generate_profiles(days=3, resolution_minutes=15, seed=2)
+        chunks = list(iter_profiles(days=3, resolution_minutes=15, chunk_steps=50, seed=2))
+        self.assertEqual(len(chunks), 6)
+        for name in PROFILE_COLUMNS:
+            self.assertTrue(np.array_equal(np.concatenate([chunk[name] for chunk in chunks]), profiles[name]))
+
+    def test_generate_24h_simulation(self):
+        data = generate_24h_simulation(seed=3)
+        self.assertEqual(len(data), 24)
+        self.assertEqual(data[8]["time"], "08:00")
+        self.assertIn("solar", data[8]["weather_factor"])
+
+    def test_save_to_csv_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "profiles.csv")
+            save_to_csv(iter_profiles(days=1, resolution_minutes=10, chunk_steps=40, seed=4), filename)
+            table = pd.read_csv(filename)
+        self.assertEqual(list(table.columns), list(PROFILE_COLUMNS))
+        self.assertEqual(len(table), 144)
+
+    def test_save_to_json_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "profiles.json")
+            save_to_json(iter_profiles(days=7, resolution_minutes=10, chunk_steps=400, seed=4), filename)
+            with open(filename, "r") as f:
+                chunked = f.read()
+            # Un seul morceau en mémoire : même fichier (plus de 1000 enregistrements, donc plusieurs lots)
+            save_to_json(generate_profiles(days=7, resolution_minutes=10, seed=4), filename)
+            with open(filename, "r") as f:
+                self.assertEqual(f.read(), chunked)
+            # Format historique : fichier identique à json.dump(generate_24h_simulation(), indent=4)
+            save_to_json(iter_profiles(days=1, resolution_minutes=60, chunk_steps=5, seed=4), filename)
+            with open(filename, "r") as f:
+                self.assertEqual(f.read(), json.dumps(generate_24h_simulation(seed=4), indent=4))
+            save_to_json(generate_24h_simulation(seed=4), filename)
+            with open(filename, "r") as f:
+                self.assertEqual(json.load(f), generate_24h_simulation(seed=4))
+        expected = generate_profiles(days=7, resolution_minutes=10, seed=4)
+        records = json.loads(chunked)
+        self.assertEqual(len(records), 7 * 144)
+        self.assertEqual((records[1]["hour"], records[1]["time"], records[6]["hour"]), (1 / 6, "00:10", 1))
+        np.testing.assert_array_equal([record["weather_factor"]["wind"] for record in records], expected["wind_factor"])
+        np.testing.assert_array_equal([record["solar_production"] for record in records], expected["solar_production"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+from grid_simulator import GridSimulator
+
+# Nuit bon marché, pointe du soir chère
+TARIFF = [0.1] * 7 + [0.3] * 10 + [0.5] * 5 + [0.1] * 2
+
+
+def cost(results, tariff=TARIFF):
+    """Cost of the energy bought, at the price of the hour of each step."""
+    return float(np.sum(np.asarray(tariff)[results["time"].astype(int) % 24] * results["purchase_energy"]))
+
+
+class TestDispatchOptimizer(unittest.TestCase):
+    def build(self, mode="greedy", **options):
+        simulator = GridSimulator(battery_capacity=200.0, charge_rate=25.0, seed=3)
+        simulator.add_producer(1, "solar", 150.0)
+        simulator.add_producer(2, "wind", 20.0)
+        for i in range(20):
+            simulator.add_consumer(i, "household", 0.0)
+        simulator.set_dispatch(mode, **options)
+        return simulator
+
+    def test_flat_price_matches_greedy(self):
+        greedy = self.build().run(24 * 20)
+        lookahead = self.build("lookahead").run(24 * 20)
+        # Batterie sans pertes ni recharge sur le réseau : le glouton est déjà optimal en énergie
+        self.assertLessEqual(lookahead["purchase_energy"].sum(), greedy["purchase_energy"].sum() * (1 + 1e-9))
+
+    def test_tariff_lowers_cost(self):
+        greedy = cost(self.build(tariff=TARIFF).run(24 * 20))
+        lookahead = cost(self.build("lookahead", tariff=TARIFF).run(24 * 20))
+        grid_charging = cost(self.build("lookahead", tariff=TARIFF, grid_charging=True).run(24 * 20))
+        self.assertLess(lookahead, greedy)
+        self.assertLess(grid_charging, lookahead)
+
+    def test_charges_ahead_of_peak(self):
+        tariff = [0.1] * 6 + [1.0] * 18
+        costs = {}
+        for mode in ("greedy", "lookahead"):
+            simulator = GridSimulator(battery_capacity=10.0, charge_rate=10.0, seed=1)
+            simulator.add_consumer(1, "household", 0.0)
+            simulator.set_dispatch(mode, horizon=24, levels=11, grid_charging=True, tariff=tariff)
+            results = simulator.run(24)
+            costs[mode] = cost(results, tariff)
+        # Batterie remplie à la dernière heure bon marché (5h), puis vidée sur les heures chères
+        self.assertEqual(results["stored_energy"][4], 10.0)
+        self.assertAlmostEqual(costs["greedy"] - costs["lookahead"], 10.0 * (1.0 - 0.1))
+
+    def test_fork_and_snapshot_keep_dispatch(self):
+        simulator = self.build("lookahead", horizon=24, tariff=TARIFF, grid_charging=True)
+        simulator.run(10)
+        fork = simulator.fork()
+        blob = simulator.snapshot()
+        expected = simulator.run(48)
+        np.testing.assert_array_equal(fork.run(48)["stored_energy"], expected["stored_energy"])
+        restored = self.build()
+        restored.restore(blob)
+        np.testing.assert_array_equal(restored.run(48)["stored_energy"], expected["stored_energy"])
+
+    def test_invalid_settings(self):
+        simulator = self.build()
+        with self.assertRaises(ValueError):
+            simulator.set_dispatch("random")
+        with self.assertRaises(ValueError):
+            simulator.set_dispatch("lookahead", horizon=0)
+        with self.assertRaises(ValueError):
+            simulator.set_dispatch("lookahead", tariff=[1.0] * 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
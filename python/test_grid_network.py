@@ -0,0 +1,82 @@
+import gc
+import sys
+import unittest
+import numpy as np
+from grid_simulator import GridSimulator, GridNetwork, NETWORK_COLUMNS
+
+def microgrid(producer_type, capacity, demand, seed):
+    simulator = GridSimulator(battery_capacity=20.0, charge_rate=2.0, seed=seed)
+    simulator.add_producer(1, producer_type, capacity)
+    simulator.add_consumer(1, "household", demand)
+    return simulator
+
+def build_network(n_threads=0, links=((0, 1, 5.0), (1, 2, 50.0), (2, 3, 2.0))):
+    network = GridNetwork(n_threads)
+    for index, (producer_type, capacity) in enumerate([("wind", 80.0), ("solar", 5.0), ("wind", 30.0), ("solar", 2.0)]):
+        network.add_grid(microgrid(producer_type, capacity, 6.0, seed=index))
+    for grid_a, grid_b, capacity in links:
+        network.add_link(grid_a, grid_b, capacity)
+    return network
+
+class TestGridNetwork(unittest.TestCase):
+    def test_exchange_balance(self):
+        isolated = build_network(links=()).run(96)
+        linked = build_network().run(96, details=True)
+        # Les échanges ne touchent pas aux batteries : chaque kWh échangé est un kWh de moins acheté et perdu
+        np.testing.assert_allclose(linked["stored_energy"], isolated["stored_energy"])
+        np.testing.assert_allclose(linked["purchase_energy"] + linked["exchanged"], isolated["purchase_energy"])
+        np.testing.assert_allclose(linked["surplus_energy"] + linked["exchanged"], isolated["surplus_energy"])
+        self.assertGreater(linked["exchanged"].sum(), 0)
+        np.testing.assert_allclose(linked["grid_purchase"].sum(axis=0), linked["purchase_energy"])
+
+    def test_link_capacity(self):
+        results = build_network().run(96, details=True)
+        capacities = np.array([5.0, 50.0, 2.0])[:, None]
+        self.assertTrue(np.all(np.abs(results["link_flow"]) <= capacities + 1e-9))
+        # Grille 3 : tout ce qu'elle reçoit passe par la ligne 2 -> 3
+        self.assertTrue(np.any(results["link_flow"][2] > 0))
+
+    def test_threads_and_isolation(self):
+        single = build_network(n_threads=1).run(48)
+        several = build_network(n_threads=4).run(48)
+        for name in NETWORK_COLUMNS:
+            np.testing.assert_array_equal(single[name], several[name])
+        # Sans ligne : somme des grilles simulées seules
+        network = build_network(links=())
+        alone = [microgrid(t, c, 6.0, seed=i).run(48) for i, (t, c) in enumerate([("wind", 80.0), ("solar", 5.0), ("wind", 30.0), ("solar", 2.0)])]
+        results = network.run(48)
+        np.testing.assert_allclose(results["purchase_energy"], sum(run["purchase_energy"] for run in alone))
+
+    def test_grid_copy(self):
+        network = build_network()
+        network.run(10)
+        grid = network.grid(0)
+        self.assertEqual(grid.get_state_array()["n_producers"], 1)
+        self.assertEqual(float(grid.get_state_array()["time"]), 10.0)
+        with self.assertRaises(KeyError):
+            network.grid(4)
+
+    def test_errors(self):
+        network = build_network()
+        self.assertEqual((len(network), network.n_links), (4, 3))
+        with self.assertRaises(ValueError):
+            network.add_grid(GridSimulator(time_step=60.0))
+        with self.assertRaises(KeyError):
+            network.add_link(0, 7, 1.0)
+        with self.assertRaises(ValueError):
+            network.add_link(0, 1, -1.0)
+
+    def test_failed_constructor(self):
+        unraisable = []
+        hook, sys.unraisablehook = sys.unraisablehook, unraisable.append
+        try:
+            with self.assertRaises(TypeError):
+                GridNetwork(n_threads="four")
+            gc.collect()
+        finally:
+            sys.unraisablehook = hook
+        # Seule la TypeError remonte : rien d'ignoré dans __del__
+        self.assertEqual(unraisable, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,13 @@
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
-from grid_simulator import GridSimulator
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from grid_simulator import GridSimulator, GridState, RUN_COLUMNS, ENSEMBLE_COLUMNS, lib
 
 class TestGridSimulator(unittest.TestCase):
     def setUp(self):
@@ -11,21 +19,383 @@ class TestGridSimulator(unittest.TestCase):
         # Here you would normally check the internal state, but since it's C++ based,
         # we assume if no exception is raised, it works.
         self.simulator.remove_producer(1)
-        self.simulator.remove_producer(0)
+        # Ids inconnus ou déjà utilisés : erreur explicite
+        with self.assertRaises(KeyError):
+            self.simulator.remove_producer(1)
+        with self.assertRaises(ValueError):
+            self.simulator.add_producer(2, "solar", 10.0)
+        self.simulator.remove_producer(2)
+        self.assertEqual(int(self.simulator.get_state_array()["n_producers"]), 0)
 
     def test_add_and_remove_consumer(self):
         self.simulator.add_consumer(1, "household", 20.0)
         self.simulator.add_consumer(2, "industry", 50.0)
         # Same as above regarding state checking.
         self.simulator.remove_consumer(1)
-        self.simulator.remove_consumer(0)
+        # Ids inconnus ou déjà utilisés : erreur explicite
+        with self.assertRaises(KeyError):
+            self.simulator.remove_consumer(1)
+        with self.assertRaises(ValueError):
+            self.simulator.add_consumer(2, "household", 10.0)
+        self.simulator.remove_consumer(2)
+        self.assertEqual(int(self.simulator.get_state_array()["n_consumers"]), 0)
+
+    def test_remove_keeps_other_assets(self):
+        for id in range(10):
+            self.simulator.add_producer(id, "grid", 1.0)
+        # Retrait au milieu : le dernier producteur prend sa place, les ids restent valides
+        for id in (3, 0, 9, 5):
+            self.simulator.remove_producer(id)
+        self.simulator.update()
+        state = self.simulator.get_state_array()
+        self.assertEqual(int(state["n_producers"]), 6)
+        self.assertAlmostEqual(float(state["grid"]), 6.0)
+        for id in (1, 2, 4, 6, 7, 8):
+            self.simulator.remove_producer(id)
+        self.assertEqual(int(self.simulator.get_state_array()["n_producers"]), 0)
 
     def test_update_grid(self):
         self.simulator.add_producer(1, "solar", 50.0)
         self.simulator.add_consumer(1, "household", 20.0)
         self.simulator.update()
-        
+
+    def test_run(self):
+        self.simulator.add_producer(1, "solar", 50.0)
+        self.simulator.add_producer(2, "wind", 30.0)
+        self.simulator.add_consumer(1, "household", 20.0)
+        self.simulator.add_consumer(2, "industry", 50.0)
+        results = self.simulator.run(48)
+        self.assertEqual(set(results), set(RUN_COLUMNS))
+        for column in results.values():
+            self.assertEqual(column.shape, (48,))
+        self.assertAlmostEqual(results["time"][0], 1.0)
+        self.assertAlmostEqual(results["time"][23], 0.0)
+        self.assertTrue((results["stored_energy"] >= 0.0).all())
+        self.assertTrue((results["stored_energy"] <= 100.0).all())
+        self.assertTrue((results["grid"] == 0.0).all())
+        self.assertTrue((results["purchase_energy"] >= 0.0).all())
+        self.assertEqual(self.simulator.get_state()["battery"]["stored_energy"], results["stored_energy"][-1])
+
+    def test_get_state_array(self):
+        self.simulator.add_producer(1, "solar", 50.0)
+        self.simulator.add_producer(2, "solar", 50.0)
+        self.simulator.add_consumer(1, "household", 20.0)
+        state = self.simulator.get_state_array()
+        self.assertEqual(state["n_producers"], 2)
+        self.assertEqual(state["n_consumers"], 1)
+        self.assertEqual(state["battery_capacity"], 100.0)
+        self.simulator.update()
+        state = self.simulator.get_state_array()
+        json_state = self.simulator.get_state()
+        self.assertEqual(state["time"], json_state["time"])
+        self.assertEqual(state["stored_energy"], json_state["battery"]["stored_energy"])
+        self.assertEqual(state["household"], json_state["consumers"]["household"])
+        self.assertEqual(state["purchase_energy"], json_state["purchase_energy"])
+
+    def test_seed_reproducibility(self):
+        runs = []
+        for seed in (7, 7, 8):
+            simulator = GridSimulator(battery_capacity=100.0, charge_rate=10.0, seed=seed)
+            simulator.add_producer(1, "solar", 50.0)
+            simulator.add_producer(2, "wind", 30.0)
+            simulator.add_consumer(1, "household", 20.0)
+            runs.append(simulator.run(48))
+        for column in RUN_COLUMNS:
+            self.assertTrue((runs[0][column] == runs[1][column]).all())
+        self.assertFalse((runs[0]["wind"] == runs[2]["wind"]).all())
+        self.assertTrue((runs[0]["wind"] >= 0.3 * 30.0).all())
+        self.assertTrue((runs[0]["wind"] < 30.0).all())
+
+    def test_run_ensemble(self):
+        self.simulator.add_producer(1, "solar", 50.0)
+        self.simulator.add_producer(2, "wind", 30.0)
+        self.simulator.add_consumer(1, "household", 20.0)
+        self.simulator.add_consumer(2, "industry", 50.0)
+        bands = self.simulator.run_ensemble(50, 300, seed=3, n_threads=1)
+        self.assertEqual(set(bands), set(ENSEMBLE_COLUMNS))
+        for column in bands.values():
+            self.assertEqual(column.shape, (300,))
+        for quantity in ("stored_energy", "purchase_energy"):
+            self.assertTrue((bands[quantity + "_p5"] <= bands[quantity + "_p50"]).all())
+            self.assertTrue((bands[quantity + "_p50"] <= bands[quantity + "_p95"]).all())
+        threaded = self.simulator.run_ensemble(50, 300, seed=3, n_threads=4)
+        for column in ENSEMBLE_COLUMNS:
+            self.assertTrue((bands[column] == threaded[column]).all())
+        # L'ensemble ne fait pas avancer la grille
+        self.assertEqual(self.simulator.get_state_array()["time"], 0.0)
+
+    def test_run_ensemble_invalid(self):
+        self.simulator.add_consumer(1, "household", 20.0)
+        for arguments in ((0, 10), (10, -1), (10, 10, None, -1)):
+            with self.assertRaises(ValueError):
+                self.simulator.run_ensemble(*arguments)
+        self.assertEqual(self.simulator.run_ensemble(10, 0, seed=1)["stored_energy_p50"].shape, (0,))
+        # Appel direct de la librairie : un ensemble vide laisse le tampon intact au lieu de planter
+        out = np.full((len(ENSEMBLE_COLUMNS), 5), -1.0)
+        lib.run_grid_ensemble(self.simulator.grid_ptr, 0, 5, 1, 1, out)
+        self.assertTrue((out == -1.0).all())
+
+    def test_replay(self):
+        self.simulator.add_producer(1, "solar", 50.0)
+        self.simulator.add_producer(2, "wind", 30.0)
+        self.simulator.add_producer(3, "wind", 10.0)
+        self.simulator.add_consumer(1, "household", 20.0)
+        self.simulator.add_consumer(2, "household", 20.0)
+        n_steps = 10
+        solar = np.linspace(0.0, 1.0, n_steps)
+        household = np.full(n_steps, 4.0)
+        household[3] = np.nan
+        results = self.simulator.replay(producer_factors={"solar": solar, "wind": np.full(n_steps, 0.5)},
+                                        consumer_demand={"household": household})
+        self.assertTrue(np.allclose(results["solar"], 50.0 * solar))
+        self.assertTrue(np.allclose(results["wind"], 20.0))
+        self.assertEqual(results["household"][0], 8.0)
+        # NaN : modèle intégré pour ce pas (ménage à 4h)
+        self.assertNotEqual(results["household"][3], 8.0)
+        self.assertEqual(results["industry"].sum(), 0.0)
+        with self.assertRaises(ValueError):
+            self.simulator.replay(producer_factors={"solar": solar}, consumer_demand={"household": household[:5]})
+        with self.assertRaises(ValueError):
+            self.simulator.replay(producer_factors={"nuclear": solar})
+
+    def test_invalid_time_step(self):
+        unraisable = []
+        hook, sys.unraisablehook = sys.unraisablehook, unraisable.append
+        try:
+            with self.assertRaises(ValueError):
+                GridSimulator(time_step=0)
+            gc.collect()
+        finally:
+            sys.unraisablehook = hook
+        # Seule la ValueError remonte : rien d'ignoré dans __del__
+        self.assertEqual(unraisable, [])
+
+    def test_time_step_and_calendar(self):
+        simulator = GridSimulator(battery_capacity=100.0, charge_rate=10.0, seed=1, time_step=60.0)
+        simulator.add_producer(1, "solar", 50.0)
+        simulator.add_consumer(1, "household", 2.0)
+        results = simulator.run(3 * 1440)
+        self.assertAlmostEqual(results["time"][59], 1.0)
+        self.assertEqual(results["time"][1439], 0.0)
+        self.assertEqual(results["day"][1438], 0.0)
+        self.assertEqual(results["day"][1439], 1.0)
+        self.assertEqual(results["day"][-1], 3.0)
+        self.assertEqual(simulator.get_state_array()["day"], 3)
+        # Une charge d'une minute ne peut pas dépasser charge_rate / 60 kWh
+        self.assertLessEqual(np.abs(np.diff(results["stored_energy"])).max(), 10.0 / 60 + 1e-9)
+
+    def test_solar_seasonality(self):
+        simulator = GridSimulator(battery_capacity=100.0, charge_rate=10.0, seed=1)
+        simulator.add_producer(1, "solar", 50.0)
+        simulator.set_solar_seasonality(0.5)
+        results = simulator.run(365 * 24)
+        daily = results["solar"].reshape(365, 24).sum(axis=1)
+        self.assertGreater(daily[172], 2 * daily[355])
+
+
+    def test_get_state_totals(self):
+        self.simulator.add_producer(1, "grid", 10.0)
+        self.simulator.add_producer(2, "grid", 20.0)
+        self.simulator.add_consumer(1, "household", 2.0)
+        self.simulator.update()
+        state = self.simulator.get_state()
+        # Somme par type, et non la valeur du dernier actif
+        self.assertAlmostEqual(state["producers"]["grid"], 30.0)
+        self.assertAlmostEqual(state["producers"]["grid"], float(self.simulator.get_state_array()["grid"]))
+
+    def test_state_delta(self):
+        version, changes = self.simulator.get_state_delta()
+        self.assertEqual(set(changes), {name for name, _ in GridState._fields_})
+        # Rien n'a changé : delta vide, même version
+        same_version, changes = self.simulator.get_state_delta(version)
+        self.assertEqual((same_version, changes), (version, {}))
+        self.simulator.update_battery(300.0, 30.0)
+        version, changes = self.simulator.get_state_delta(version)
+        self.assertEqual(changes, {"battery_capacity": 300.0, "stored_energy": 150.0})
+        self.simulator.add_producer(1, "grid", 10.0)
+        self.simulator.add_consumer(1, "household", 4.0)
+        _, changes = self.simulator.get_state_delta(version)
+        self.assertEqual(changes, {"household": 4.0, "n_producers": 1, "n_consumers": 1})
+        self.simulator.update()
+        _, changes = self.simulator.get_state_delta(version)
+        self.assertEqual(changes["grid"], 10.0)
+        self.assertIn("time", changes)
+        # Totaux incrémentaux cohérents avec les actifs
+        self.simulator.remove_producer(1)
+        state = self.simulator.get_state_array()
+        self.assertEqual(float(state["grid"]), 0.0)
+        self.assertEqual(float(state["household"]), float(self.simulator.query_consumers()["demand"].sum()))
+
+    def test_stats(self):
+        self.simulator.add_producer(1, "solar", 10.0)
+        self.simulator.add_consumer(1, "industry", 50.0)
+        # Désactivées par défaut : rien n'est compté
+        self.simulator.run(10)
+        self.assertTrue(all(value == 0 for value in self.simulator.stats().values()))
+        self.simulator.enable_stats()
+        self.simulator.run(10)
+        self.simulator.get_state()
+        stats = self.simulator.stats()
+        self.assertEqual(stats["steps"], 10)
+        self.assertGreater(stats["producers_ns"], 0)
+        self.assertEqual(stats["state_json_calls"], 1)
+        self.assertGreater(stats["state_json_allocations"], 2)
+        self.assertGreater(stats["state_json_bytes"], 0)
+        self.simulator.enable_stats(False)
+        self.simulator.run(10)
+        self.assertEqual(self.simulator.stats()["steps"], 10)
+        self.simulator.reset_stats()
+        self.assertEqual(self.simulator.stats()["steps"], 0)
+
+    def test_query_assets(self):
+        n = 1000
+        self.simulator.add_producers(np.arange(n), np.arange(n) % 3, np.arange(n, dtype=float))
+        self.simulator.add_consumers(np.arange(n), np.arange(n) % 2, np.full(n, 5.0))
+        self.simulator.update()
+        grid = self.simulator.query_producers("grid")
+        self.assertEqual(sorted(grid["id"].tolist()), list(range(2, n, 3)))
+        # Production du réseau principal = capacité
+        self.assertTrue(np.array_equal(grid["output"], grid["id"].astype(float)))
+        subset = self.simulator.query_producers(ids=range(10, 20))
+        self.assertEqual(sorted(subset["id"].tolist()), list(range(10, 20)))
+        self.assertEqual(subset["kind"].tolist(), [id % 3 for id in subset["id"]])
+        # Plage large (parcours des tableaux) et type combinés
+        wide = self.simulator.query_producers("solar", (-10**6, 10**6))
+        self.assertEqual(len(wide["id"]), len(range(0, n, 3)))
+        self.assertAlmostEqual(wide["output"].sum(), float(self.simulator.get_state_array()["solar"]))
+        households = self.simulator.query_consumers("household", (0, 4))
+        self.assertEqual(sorted(households["id"].tolist()), [0, 2])
+        self.assertEqual(len(self.simulator.query_consumers(ids=(n, 2 * n))["id"]), 0)
+
+    def test_add_producers_bulk(self):
+        self.simulator.add_producers([1, 2, 3], ["solar", "wind", "solar"], [50.0, 30.0, 10.0])
+        self.simulator.add_consumers(np.arange(4), np.array([0, 1, 0, 1]), np.full(4, 5.0))
+        producers = self.simulator.producers()
+        self.assertEqual(producers["id"].tolist(), [1, 3, 2])
+        self.assertEqual(producers["kind"].tolist(), [0, 0, 1])
+        self.assertEqual(producers["capacity"].tolist(), [50.0, 10.0, 30.0])
+        self.assertEqual(len(self.simulator.consumers()["id"]), 4)
+        # Un id déjà utilisé : aucun producteur du lot n'est ajouté
+        with self.assertRaises(ValueError):
+            self.simulator.add_producers([4, 1], ["wind", "wind"], [1.0, 1.0])
+        self.assertEqual(int(self.simulator.get_state_array()["n_producers"]), 3)
+        self.simulator.add_producer(4, "grid", 1.0)
+        with self.assertRaises(ValueError):
+            self.simulator.add_producers([5], ["nuclear"], [1.0])
+
+    def test_snapshot_restore(self):
+        self.simulator.add_producers([1, 2, 3], ["solar", "wind", "grid"], [50.0, 30.0, 5.0])
+        self.simulator.add_consumers([1, 2], ["household", "industry"], [20.0, 50.0])
+        self.simulator.set_solar_seasonality(0.4)
+        self.simulator.run(30)
+        blob = self.simulator.snapshot()
+        state = self.simulator.get_state()
+        expected = self.simulator.run(50)
+        # Retour au point de sauvegarde : même état, puis même suite de pas
+        self.simulator.remove_producer(2)
+        self.simulator.update_battery(10.0, 1.0)
+        self.simulator.restore(blob)
+        self.assertEqual(self.simulator.get_state(), state)
+        self.assertEqual(self.simulator.producers()["id"].tolist(), [1, 2, 3])
+        replayed = self.simulator.run(50)
+        for name in RUN_COLUMNS:
+            np.testing.assert_array_equal(replayed[name], expected[name])
+        # Le registre est reconstruit : les ids restaurés sont utilisables
+        self.simulator.remove_producer(2)
+        with self.assertRaises(ValueError):
+            self.simulator.add_consumer(1, "household", 1.0)
+
+    def test_restore_invalid(self):
+        self.simulator.add_producer(1, "solar", 50.0)
+        blob = self.simulator.snapshot()
+        for invalid in (b"", blob[:-1], blob + b"\0", b"XXXX" + blob[4:]):
+            with self.assertRaises(ValueError):
+                self.simulator.restore(invalid)
+        self.assertEqual(self.simulator.producers()["id"].tolist(), [1])
+
+    def test_fork(self):
+        self.simulator.add_producers([1, 2], ["solar", "wind"], [50.0, 30.0])
+        self.simulator.add_consumer(1, "household", 20.0)
+        self.simulator.run(10)
+        forks = [self.simulator.fork() for _ in range(4)]
+        # Branche modifiée : indépendante de l'original
+        forks[0].remove_producer(1)
+        self.assertEqual(len(self.simulator.producers()["id"]), 2)
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(lambda fork: fork.run(100), [self.simulator] + forks[1:]))
+        for result in results[1:]:
+            np.testing.assert_array_equal(result["stored_energy"], results[0]["stored_energy"])
+        self.assertEqual(forks[1].seed, self.simulator.seed)
+
+    def test_from_config(self):
+        config = {
+            "battery": {"capacity": 300.0, "charge_rate": 30.0},
+            "time_step": 900,
+            "seed": 7,
+            "producers": [{"id": 1, "type": "solar", "capacity": 50.0}, {"id": 2, "type": "wind", "capacity": 30.0}],
+            "consumers": {"id": [1, 2], "type": ["household", "industry"], "base_demand": [20.0, 50.0]},
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "scenario.json")
+            with open(path, "w") as f:
+                json.dump(config, f)
+            simulator = GridSimulator.from_config(path)
+            self.assertEqual(simulator.seed, 7)
+            self.assertEqual(simulator.time_step, 900.0)
+            state = simulator.get_state_array()
+            self.assertEqual(float(state["battery_capacity"]), 300.0)
+            self.assertEqual((int(state["n_producers"]), int(state["n_consumers"])), (2, 2))
+
+            # Même scénario, même résultat qu'une grille construite à la main
+            manual = GridSimulator(battery_capacity=300.0, charge_rate=30.0, seed=7, time_step=900.0)
+            manual.add_producer(1, "solar", 50.0)
+            manual.add_producer(2, "wind", 30.0)
+            manual.add_consumer(1, "household", 20.0)
+            manual.add_consumer(2, "industry", 50.0)
+            self.assertTrue(np.array_equal(simulator.run(96)["purchase_energy"], manual.run(96)["purchase_energy"]))
+
+            self.simulator.load_config(path)
+            self.assertEqual(self.simulator.seed, 7)
+            config["producers"].append({"id": 1, "type": "grid", "capacity": 1.0})
+            with open(path, "w") as f:
+                json.dump(config, f)
+            with self.assertRaises(ValueError):
+                GridSimulator.from_config(path)
+            with self.assertRaises(FileNotFoundError):
+                GridSimulator.from_config(os.path.join(directory, "missing.json"))
 
     
+class TestLibraryLoading(unittest.TestCase):
+    def run_python(self, code, **env):
+        return subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, env={**os.environ, **env})
+
+    def test_loaded_on_first_grid(self):
+        result = self.run_python(
+            "import grid_simulator\n"
+            "assert grid_simulator._library is None\n"
+            "grid_simulator.GridSimulator(10.0, 1.0)\n"
+            "assert grid_simulator._library is not None\n")
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_environment_untouched(self):
+        # Le chemin résolu reste dans le module : l'environnement hérité par les sous-processus ne change pas
+        env = {key: value for key, value in os.environ.items() if key != "SMARTGRID_LIB"}
+        result = subprocess.run([sys.executable, "-c",
+                                 "import os, grid_simulator\n"
+                                 "grid_simulator.GridSimulator(10.0, 1.0)\n"
+                                 "assert grid_simulator._library_path == grid_simulator.library_path()\n"
+                                 "assert 'SMARTGRID_LIB' not in os.environ\n"],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, env=env)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_missing_library(self):
+        # L'import reste possible, l'erreur vient à la création de la première grille
+        result = self.run_python("import grid_simulator\ngrid_simulator.GridSimulator(10.0, 1.0)",
+                                 SMARTGRID_LIB="/nonexistent/libsmart_grid.so")
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("FileNotFoundError: SMARTGRID_LIB=/nonexistent/libsmart_grid.so", result.stderr)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
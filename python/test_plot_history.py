@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from simulator_ui.plot_history import PlotHistory
+
+class TestPlotHistory(unittest.TestCase):
+    def setUp(self):
+        self.history = PlotHistory(("time", "value"), capacity=5)
+
+    def extend(self, start, stop):
+        values = np.arange(start, stop, dtype=float)
+        self.history.extend({"time": values, "value": 2 * values})
+
+    def test_extend(self):
+        self.extend(0, 3)
+        self.assertEqual(len(self.history), 3)
+        self.assertEqual(self.history["time"].tolist(), [0, 1, 2])
+        self.assertEqual(self.history["value"].tolist(), [0, 2, 4])
+
+    def test_wraparound(self):
+        for start in range(0, 12, 3):
+            self.extend(start, start + 3)
+        self.assertEqual(len(self.history), 5)
+        self.assertEqual(self.history.total, 12)
+        # Fenêtre glissante contiguë, sans copie
+        window = self.history["time"]
+        self.assertEqual(window.tolist(), [7, 8, 9, 10, 11])
+        self.assertTrue(window.flags["C_CONTIGUOUS"])
+        self.assertFalse(window.flags["OWNDATA"])
+
+    def test_batch_larger_than_capacity(self):
+        self.extend(0, 2)
+        self.extend(2, 14)
+        self.assertEqual(self.history["time"].tolist(), [9, 10, 11, 12, 13])
+        self.assertEqual(self.history.total, 14)
+
+    def test_clear(self):
+        self.extend(0, 4)
+        self.history.clear()
+        self.assertEqual(len(self.history), 0)
+        self.assertEqual(self.history["time"].size, 0)
+        self.extend(0, 2)
+        self.assertEqual(self.history["time"].tolist(), [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
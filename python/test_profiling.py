@@ -0,0 +1,26 @@
+import unittest
+from simulator_ui.profiling import SectionTimer
+
+class TestSectionTimer(unittest.TestCase):
+    def test_disabled(self):
+        profiler = SectionTimer(enabled=False)
+        with profiler.section("curves"):
+            pass
+        self.assertEqual(profiler.report(), {})
+
+    def test_sections(self):
+        profiler = SectionTimer(enabled=True)
+        for _ in range(3):
+            with profiler.section("history"):
+                pass
+        with profiler.section("curves"):
+            pass
+        report = profiler.report()
+        self.assertEqual(list(report), ["history", "curves"])
+        self.assertEqual(report["history"]["calls"], 3)
+        self.assertGreaterEqual(report["history"]["total_ns"], 0)
+        profiler.reset()
+        self.assertEqual(profiler.report(), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import tempfile
+import unittest
+import numpy as np
+from grid_simulator import GridSimulator, RUN_COLUMNS
+from results_store import ResultsWriter, open_results, run_to_disk
+
+class TestResultsStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append_chunks_and_rows(self):
+        with ResultsWriter(self.directory.name, ["a", "b"], chunk_size=3) as writer:
+            writer.append({"a": np.arange(5.0), "b": np.ones(5)})
+            for value in range(7):
+                writer.append_row({"a": 5.0 + value, "b": 2.0})
+            writer.append({"a": np.array([12.0]), "b": np.array([3.0])})
+        columns = open_results(self.directory.name)
+        self.assertEqual(list(columns), ["a", "b"])
+        self.assertTrue(np.array_equal(columns["a"], np.arange(13.0)))
+        self.assertEqual(columns["b"].sum(), 5 + 14 + 3)
+        self.assertIsInstance(columns["a"], np.memmap)
+
+    def test_run_to_disk(self):
+        simulators = []
+        for _ in range(2):
+            simulator = GridSimulator(battery_capacity=100.0, charge_rate=10.0, seed=5)
+            simulator.add_producer(1, "solar", 50.0)
+            simulator.add_consumer(1, "household", 20.0)
+            simulators.append(simulator)
+        self.assertEqual(run_to_disk(simulators[0], 1000, self.directory.name, chunk_steps=300), 1000)
+        expected = simulators[1].run(1000)
+        columns = open_results(self.directory.name)
+        for name in RUN_COLUMNS:
+            self.assertTrue(np.array_equal(columns[name], expected[name]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+import numpy as np
+from grid_simulator import GridSimulator
+from simulator_ui.simulation_worker import SPEEDS, SimulationWorker
+
+class TestSimulationWorker(unittest.TestCase):
+    def setUp(self):
+        self.simulator = GridSimulator(battery_capacity=50.0, charge_rate=5.0, seed=1)
+        self.simulator.add_producer(1, "solar", 20.0)
+        self.simulator.add_consumer(1, "household", 3.0)
+        self.worker = SimulationWorker(self.simulator, threading.Lock(), max_batch_steps=10, max_pending_batches=4)
+        self.addCleanup(self.worker.stop)
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.perf_counter() + timeout
+        while not condition():
+            self.assertLess(time.perf_counter(), deadline, "timed out")
+            time.sleep(0.005)
+
+    def pending(self):
+        with self.worker._condition:
+            return len(self.worker._batches)
+
+    def test_flat_out_back_pressure_and_take(self):
+        self.worker.set_speed(SPEEDS["Flat out"])
+        self.worker.resume()
+        # Le tampon plein bloque le worker jusqu'à ce que la GUI le vide
+        self.wait_for(lambda: self.pending() == 4)
+        time.sleep(0.05)
+        self.assertEqual(self.pending(), 4)
+        batch = self.worker.take()
+        self.assertEqual(len(batch["time"]), 40)
+        # Lots fusionnés : une heure d'écart entre deux pas consécutifs, sans trou
+        elapsed = batch["day"] * 24 + batch["time"]
+        np.testing.assert_allclose(np.diff(elapsed), 1.0)
+        self.wait_for(lambda: self.pending() > 0)
+        following = self.worker.take()
+        self.assertEqual(following["day"][0] * 24 + following["time"][0], elapsed[-1] + 1)
+
+    def test_pause_and_clear(self):
+        self.worker.set_speed(SPEEDS["Flat out"])
+        self.worker.resume()
+        self.wait_for(lambda: self.pending() > 0)
+        self.worker.pause()
+        self.worker.clear()
+        time.sleep(0.05)
+        self.worker.clear()  # Un lot en cours au moment de la pause a pu arriver entre-temps
+        time.sleep(0.05)
+        self.assertTrue(self.worker.is_paused())
+        self.assertEqual(self.pending(), 0)
+        self.assertIsNone(self.worker.take())
+
+    def test_speed_pacing(self):
+        # Tampon assez grand pour ne pas freiner le worker : seule la vitesse compte
+        worker = SimulationWorker(self.simulator, threading.Lock(), max_batch_steps=10, max_pending_batches=1000)
+        self.addCleanup(worker.stop)
+        # 100 pas d'une heure par seconde réelle
+        worker.set_speed(100 * 3600.0)
+        worker.resume()
+        time.sleep(0.3)
+        worker.pause()
+        time.sleep(0.05)
+        steps = len(worker.take()["time"])
+        self.assertGreater(steps, 10)
+        self.assertLess(steps, 40)
+
+    def test_stop_joins_thread(self):
+        self.worker.resume()
+        self.wait_for(self.worker.isRunning)
+        self.worker.stop()
+        self.assertTrue(self.worker.isFinished())
+        self.assertFalse(self.worker.isRunning())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from results_store import open_results
+from smartgrid.__main__ import main
+from smartgrid.batch import run_batch
+
+SCENARIO = Path(__file__).parent.parent / "scenarios" / "example.json"
+
+
+class TestSmartGridCli(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.scenarios = []
+        for name in ("north", "south"):
+            path = os.path.join(self.directory, f"{name}.json")
+            shutil.copy(SCENARIO, path)
+            self.scenarios.append(path)
+
+    def test_run_batch(self):
+        broken = os.path.join(self.directory, "broken.json")
+        with open(broken, "w") as f:
+            f.write("{")
+        out = os.path.join(self.directory, "results")
+        summaries, failures, _ = run_batch(self.scenarios + [broken], 100, out, workers=2, chunk_steps=30,
+                                           log=lambda line: None)
+        self.assertEqual([summary["steps"] for summary in summaries], [100, 100])
+        self.assertEqual(list(failures), [broken])
+        north = open_results(os.path.join(out, "north"))
+        self.assertEqual(len(north["purchase_energy"]), 100)
+        # Même fichier, même graine : mêmes résultats
+        self.assertEqual(summaries[0]["total_purchase"], summaries[1]["total_purchase"])
+        with open(os.path.join(out, "summary.json"), "r") as f:
+            self.assertEqual(len(json.load(f)["runs"]), 2)
+
+    def test_duplicate_names(self):
+        with self.assertRaises(ValueError):
+            run_batch([SCENARIO, SCENARIO], 10, self.directory, log=lambda line: None)
+
+    def test_command_line_without_qt(self):
+        out = os.path.join(self.directory, "results")
+        code = ("import sys\n"
+                "from smartgrid.__main__ import main\n"
+                f"code = main(['run', {os.path.join(self.directory, '*.json')!r}, '--steps', '48', '--workers', '2', '--out', {out!r}])\n"
+                "assert not any(name.startswith('PySide6') for name in sys.modules)\n"
+                "sys.exit(code)\n")
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("2 scenarios, 96 steps", result.stdout)
+        self.assertTrue(os.path.isdir(os.path.join(out, "south")))
+
+    def test_steps_boundary(self):
+        out = os.path.join(self.directory, "results")
+        arguments = ["run", self.scenarios[0], "--workers", "1", "--out", out, "--steps"]
+        with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit) as error:
+            main(arguments + ["0"])
+        self.assertEqual(error.exception.code, 2)
+        self.assertIn("--steps, --workers and --chunk-steps must be at least 1", stderr.getvalue())
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(main(arguments + ["1"]), 0)
+        self.assertEqual(len(open_results(os.path.join(out, "north"))["time"]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,37 +5,164 @@
 //  Created by Remi Bhagalou on 18/11/2025.
 //
 #include "../include/smart_grid.h"
+#include "../include/ensemble.h"
+#include "../include/scenario.h"
+#include "../include/network.h"
 #include <iostream>
 #include <fstream>
+#include <memory>
 
 struct JsonString {
     char* data;
 };
 
+// Message de la dernière erreur de chargement de scénario (par thread)
+static thread_local std::string last_error;
+
 
 extern "C" {
-    void* create_grid(double battery_capacity, double charge_rate) {
-        return new SmartGrid(battery_capacity, charge_rate);
+    void* create_grid(double battery_capacity, double charge_rate, uint64_t seed, double time_step) {
+        return new SmartGrid(battery_capacity, charge_rate, time_step, seed);
+    }
+
+    void* create_grid_from_config(const char* path, uint64_t seed) {
+        try {
+            auto grid = std::make_unique<SmartGrid>(100.0, 10.0, 3600.0, seed);
+            load_scenario(*grid, path);
+            return grid.release();
+        } catch (const std::exception& e) {
+            last_error = e.what();
+            return nullptr;
+        }
+    }
+
+    int load_grid_config(void* grid_ptr, const char* path) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        try {
+            load_scenario(*grid, path);
+            return GRID_OK;
+        } catch (const std::exception& e) {
+            last_error = e.what();
+            return GRID_CONFIG_ERROR;
+        }
+    }
+
+    const char* grid_last_error() {
+        return last_error.c_str();
+    }
+
+    void* fork_grid(void* grid_ptr) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return new SmartGrid(grid->fork());
+    }
+
+    size_t grid_snapshot_size(void* grid_ptr) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->snapshot_size();
+    }
+
+    void grid_snapshot(void* grid_ptr, uint8_t* out) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        grid->write_snapshot(out);
+    }
+
+    int grid_restore(void* grid_ptr, const uint8_t* data, size_t size) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->restore(data, size);
+    }
+
+    double grid_time_step(void* grid_ptr) {
+        return static_cast<SmartGrid*>(grid_ptr)->time_step();
+    }
+
+    uint64_t grid_seed(void* grid_ptr) {
+        return static_cast<SmartGrid*>(grid_ptr)->seed();
+    }
+
+    void set_solar_seasonality(void* grid_ptr, double amplitude) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        grid->set_solar_seasonality(amplitude);
+    }
+
+    int add_producer(void* grid_ptr, int id, const char* type, double capacity) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->add_producer(EnergyProducer(id, std::string(type), capacity));
+    }
+
+    int remove_producer(void* grid_ptr, int id) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->remove_producer(id);
+    }
+
+    int add_producers(void* grid_ptr, int n, const int* ids, const int* kinds, const double* capacities) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->add_producers(n, ids, kinds, capacities);
+    }
+
+    void list_producers(void* grid_ptr, int* ids, int* kinds, double* capacities) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        grid->list_producers(ids, kinds, capacities);
+    }
+
+    int add_consumer(void* grid_ptr, int id, const char* type, double base_demand) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->add_consumer(EnergyConsumer(id, std::string(type), base_demand));
+    }
+
+    int remove_consumer(void* grid_ptr, int id) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->remove_consumer(id);
+    }
+
+    int add_consumers(void* grid_ptr, int n, const int* ids, const int* kinds, const double* base_demands) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->add_consumers(n, ids, kinds, base_demands);
+    }
+
+    void list_consumers(void* grid_ptr, int* ids, int* kinds, double* base_demands) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        grid->list_consumers(ids, kinds, base_demands);
     }
 
-    void add_producer(void* grid_ptr, int id, const char* type, double capacity) {
+    int add_batteries(void* grid_ptr, int n, const int* ids, const double* capacities, const double* charge_rates,
+                      const double* discharge_rates, const double* efficiencies, const int* priorities) {
         SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
-        grid->add_producer(EnergyProducer(id, std::string(type), capacity));
+        return grid->add_batteries(n, ids, capacities, charge_rates, discharge_rates, efficiencies, priorities);
     }
 
-    void remove_producer(void* grid_ptr, int id) {
+    int remove_battery(void* grid_ptr, int id) {
         SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
-        grid->remove_producer(id);
+        return grid->remove_battery(id);
     }
 
-    void add_consumer(void* grid_ptr, int id, const char* type, double base_demand) {
+    void list_batteries(void* grid_ptr, int* ids, double* capacities, double* stored) {
         SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
-        grid->add_consumer(EnergyConsumer(id, std::string(type), base_demand));
+        grid->list_batteries(ids, capacities, stored);
     }
 
-    void remove_consumer(void* grid_ptr, int id) {
+    int set_fleet_policy(void* grid_ptr, int policy) {
         SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
-        grid->remove_consumer(id);
+        return grid->set_fleet_policy(policy);
+    }
+
+    int set_dispatch_mode(void* grid_ptr, int mode, int horizon, int levels, int grid_charging) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->set_dispatch_mode(mode, horizon, levels, grid_charging != 0);
+    }
+
+    int set_dispatch_tariff(void* grid_ptr, const double* prices, int n) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->set_dispatch_tariff(prices, n);
+    }
+
+    int query_producers(void* grid_ptr, int kind, int id_min, int id_max, int* ids, int* kinds, double* outputs, int max_count) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->query_producers(kind, id_min, id_max, ids, kinds, outputs, max_count);
+    }
+
+    int query_consumers(void* grid_ptr, int kind, int id_min, int id_max, int* ids, int* kinds, double* demands, int max_count) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->query_consumers(kind, id_min, id_max, ids, kinds, demands, max_count);
     }
 
     void update_grid(void* grid_ptr) {
@@ -43,6 +170,21 @@ extern "C" {
         grid->update();
     }
 
+    void run_grid(void* grid_ptr, int n_steps, double* out) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        grid->run(n_steps, out);
+    }
+
+    void replay_grid(void* grid_ptr, int n_steps, const double* producer_factors, const double* consumer_demand, double* out) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        grid->run(n_steps, out, producer_factors, consumer_demand);
+    }
+
+    void run_grid_ensemble(void* grid_ptr, int n_members, int n_steps, uint64_t seed, int n_threads, double* out) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        run_ensemble(*grid, n_members, n_steps, seed, static_cast<unsigned>(std::max(0, n_threads)), out);
+    }
+
     void update_battery(void* grid_ptr, double capacity, double charge_rate) {
         SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
         grid->updateBattery(capacity, charge_rate);
@@ -55,14 +197,75 @@ extern "C" {
 
     JsonString* get_grid_state(void* grid_ptr) {
         SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
-        json state = grid->get_state();
-        std::string state_str = state.dump();
+        std::string state_str = grid->state_json();
         JsonString* cstr = new JsonString;
         cstr->data = new char[state_str.size() + 1];
         strcpy(cstr->data, state_str.c_str());
         return cstr;
     }
 
+    void get_grid_state_into(void* grid_ptr, GridState* state) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        grid->fill_state(*state);
+    }
+
+    uint64_t get_grid_state_delta(void* grid_ptr, uint64_t since_version, GridState* state, uint32_t* changed_mask) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        return grid->get_state_delta(since_version, *state, *changed_mask);
+    }
+
+    void enable_grid_stats(void* grid_ptr, int enabled) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        grid->enable_stats(enabled != 0);
+    }
+
+    void get_grid_stats(void* grid_ptr, GridStats* stats) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        *stats = grid->get_stats();
+    }
+
+    void reset_grid_stats(void* grid_ptr) {
+        SmartGrid* grid = static_cast<SmartGrid*>(grid_ptr);
+        grid->reset_stats();
+    }
+
+    void* create_network(int n_threads) {
+        return new GridNetwork(static_cast<unsigned>(std::max(0, n_threads)));
+    }
+
+    int network_add_grid(void* network_ptr, void* grid_ptr) {
+        GridNetwork* network = static_cast<GridNetwork*>(network_ptr);
+        return network->add_grid(*static_cast<SmartGrid*>(grid_ptr));
+    }
+
+    int network_add_link(void* network_ptr, int from, int to, double capacity) {
+        GridNetwork* network = static_cast<GridNetwork*>(network_ptr);
+        return network->add_link(from, to, capacity);
+    }
+
+    void* network_get_grid(void* network_ptr, int index) {
+        GridNetwork* network = static_cast<GridNetwork*>(network_ptr);
+        SmartGrid* grid = network->grid(index);
+        return grid ? new SmartGrid(grid->fork()) : nullptr;
+    }
+
+    int network_size(void* network_ptr) {
+        return static_cast<int>(static_cast<GridNetwork*>(network_ptr)->size());
+    }
+
+    int network_n_links(void* network_ptr) {
+        return static_cast<int>(static_cast<GridNetwork*>(network_ptr)->n_links());
+    }
+
+    void run_network(void* network_ptr, int n_steps, double* out, double* grid_purchase, double* link_flow) {
+        GridNetwork* network = static_cast<GridNetwork*>(network_ptr);
+        network->run(n_steps, out, grid_purchase, link_flow);
+    }
+
+    void delete_network(void* network_ptr) {
+        delete static_cast<GridNetwork*>(network_ptr);
+    }
+
     void free_state(JsonString* cstr_ptr) {
         if (cstr_ptr) {
             delete[] cstr_ptr->data;